@@ -0,0 +1,358 @@
+"""
+Benchmark suite for the parking system.
+
+Times fee calculation, running fee refreshes for a full lot, park/pickup cycles
+and concurrent pickups on the file storage, payment appends as a car's history
+grows and history export, and writes the results to JSON.
+Given a baseline file from an earlier run it exits with status 1 when any
+benchmark got slower than the allowed threshold.
+
+    python benchmarks/run_benchmarks.py --output results.json
+    python benchmarks/run_benchmarks.py --output new.json --baseline results.json --threshold 0.2
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the repository root and src to the path, like the tests do
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / 'src'))
+
+from src.utils.datetime_helper import parse_epoch_minutes_column
+from src.services.event_ingest_service import EventIngestService
+from src.services.fee_accrual_tracker import FeeAccrualTracker
+from src.services.parking_service import ParkingService
+from src.services.pricing_service import PricingService
+from src.services.validation_service import ValidationService
+from src.utils import datetime_helper
+from src.utils.datetime_helper import parse_datetime
+from src.utils.file_handler import FileHandler
+from src.utils.memory_storage import InMemoryStorage
+from src.utils.tariff_table import get_tariff_table
+from src.utils.workload_generator import WorkloadGenerator
+
+DEFAULT_OUTPUT = 'benchmark_results.json'
+DEFAULT_THRESHOLD = 0.25  # fail when more than 25% slower than the baseline
+DEFAULT_REPEAT = 3
+
+ARRIVAL = datetime(2024, 3, 4, 9, 30)  # a Monday morning
+PLATE = '50A-12345'
+
+
+def plate(i):
+    """A valid car identity for index i"""
+    return f"{10 + (i // 100000) % 90:02d}{chr(65 + (i // 9000000) % 26)}-{i % 100000:05d}"
+
+
+def write_payment_history(storage, car_identity, count):
+    """Write count payment records straight to the JSON Lines log (setup only, no per-record fsync)"""
+    arrival_time = ARRIVAL - timedelta(days=count)
+    with open(storage._payments_file(car_identity), 'w') as f:
+        for _ in range(count):
+            departure_time = arrival_time + timedelta(hours=2)
+            f.write(json.dumps({
+                'arrival_time': arrival_time.strftime('%Y-%m-%d %H:%M'),
+                'departure_time': departure_time.strftime('%Y-%m-%d %H:%M'),
+                'total_fee': 20.0,
+                'payment_amount': 20.0,
+                'credits_used': 0,
+                'has_frequent_parking': False,
+                'timestamp': departure_time.isoformat()
+            }) + '\n')
+            arrival_time += timedelta(days=1)
+
+
+# Each benchmark is setup(scale, workdir) -> (operations, run). Setup runs before
+# every repeat on a fresh directory and only run() is timed.
+
+def fee_benchmark(stay, detailed=False, base_operations=20000):
+    def setup(scale, workdir):
+        operations = max(1, int(base_operations * scale))
+        departure_time = ARRIVAL + stay
+
+        def run():
+            if detailed:
+                # The breakdown is lazy, read it like a receipt would
+                for i in range(operations):
+                    _, calculation_details = PricingService.calculate_parking_fee(ARRIVAL, departure_time, i & 1)
+                    for _ in calculation_details:
+                        pass
+            else:
+                for i in range(operations):
+                    PricingService.calculate_total_fee(ARRIVAL, departure_time, i & 1)
+        return operations, run
+    return setup
+
+
+def parse_timestamps(column=False):
+    def setup(scale, workdir):
+        operations = max(1, int(100000 * scale))
+        # Distinct minutes and an empty cache, so every string is really parsed
+        strings = [
+            (ARRIVAL + timedelta(minutes=i)).strftime('%Y-%m-%d %H:%M') for i in range(operations)
+        ]
+        datetime_helper._parse_fixed.cache_clear()
+        datetime_helper._parse_fixed_minutes.cache_clear()
+
+        def run():
+            if column:
+                parse_epoch_minutes_column(strings)
+            else:
+                for text in strings:
+                    parse_datetime(text)
+        return operations, run
+    return setup
+
+
+def batch_validation(validate, make_value):
+    def setup(scale, workdir):
+        operations = max(1, int(1000000 * scale))
+        values = [make_value(i) for i in range(operations)]
+
+        def run():
+            validate(values)
+        return operations, run
+    return setup
+
+
+def lot_refresh(incremental):
+    def setup(scale, workdir):
+        cars = max(1, int(5000 * scale))
+        ticks = 60
+        # Cars that arrived over the last three days, refreshed once a minute for an hour
+        arrivals = [ARRIVAL - timedelta(minutes=(i * 7919) % (3 * 24 * 60) + 1) for i in range(cars)]
+        tracker = FeeAccrualTracker()
+        for i, arrival_time in enumerate(arrivals):
+            tracker.track(plate(i), arrival_time, i % 3 == 0)
+        tracker.refresh(ARRIVAL)
+
+        def run():
+            for tick in range(1, ticks + 1):
+                now = ARRIVAL + timedelta(minutes=tick)
+                if incremental:
+                    tracker.refresh(now)
+                else:
+                    for i, arrival_time in enumerate(arrivals):
+                        PricingService.calculate_total_fee(arrival_time, now, i % 3 == 0)
+        return ticks, run
+    return setup
+
+
+def park_pickup_cycle(scale, workdir):
+    operations = max(1, int(500 * scale))
+    parking_service = ParkingService(FileHandler(workdir))
+    arrival_str = ARRIVAL.strftime('%Y-%m-%d %H:%M')
+    departure_str = (ARRIVAL + timedelta(hours=2)).strftime('%Y-%m-%d %H:%M')
+
+    def run():
+        for i in range(operations):
+            parking_service.park_car(plate(i), arrival_str)
+            parking_service.pickup_car(plate(i), '100', departure_str)
+    return operations, run
+
+
+def concurrent_pickups(workers):
+    def setup(scale, workdir):
+        operations = max(1, int(500 * scale))
+        parking_service = ParkingService(FileHandler(workdir))
+        departure_str = (ARRIVAL + timedelta(hours=2)).strftime('%Y-%m-%d %H:%M')
+        for i in range(operations):
+            parking_service.park_car(plate(i), ARRIVAL.strftime('%Y-%m-%d %H:%M'))
+
+        def pickup(i):
+            parking_service.pickup_car(plate(i), '100', departure_str)
+
+        def run():
+            # Rush hour: pickups at several gates share journal fsyncs
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(pickup, range(operations)))
+        return operations, run
+    return setup
+
+
+def save_payment_with_history(history_size):
+    def setup(scale, workdir):
+        operations = max(1, int(200 * scale))
+        storage = FileHandler(workdir)
+        write_payment_history(storage, PLATE, int(history_size * scale))
+        payment_data = {
+            'arrival_time': '2024-03-04 09:30', 'departure_time': '2024-03-04 11:30',
+            'total_fee': 20.0, 'payment_amount': 20.0, 'credits_used': 0,
+            'has_frequent_parking': False, 'timestamp': '2024-03-04T11:30:00'
+        }
+
+        def run():
+            for _ in range(operations):
+                storage.save_payment_record(PLATE, payment_data)
+        return operations, run
+    return setup
+
+
+def generate_history(history_size, incremental=False):
+    def setup(scale, workdir):
+        storage = FileHandler(workdir)
+        parking_service = ParkingService(storage)
+        write_payment_history(storage, PLATE, int(history_size * scale))
+        if incremental:
+            # Export once, then add a single visit so only it is appended
+            parking_service.generate_history(PLATE)
+            parking_service.park_car(PLATE, '2030-01-07 09:00')
+            parking_service.pickup_car(PLATE, '100', '2030-01-07 11:00')
+
+        def run():
+            parking_service.generate_history(PLATE)
+        return 1, run
+    return setup
+
+
+def ingest_generated_week(storage_factory):
+    def setup(scale, workdir):
+        events = list(WorkloadGenerator(seed=1, cars=max(10, int(2000 * scale))).iter_events(days=7))
+        ingest_service = EventIngestService(ParkingService(storage_factory(workdir)))
+
+        def run():
+            ingest_service.ingest(enumerate(events))
+        return len(events), run
+    return setup
+
+
+BENCHMARKS = {
+    'pricing.total_fee.short_stay': fee_benchmark(timedelta(hours=2)),
+    'pricing.total_fee.daily_stay': fee_benchmark(timedelta(hours=26)),
+    'pricing.total_fee.multi_month_stay': fee_benchmark(timedelta(days=92, hours=5)),
+    'pricing.fee_details.short_stay': fee_benchmark(timedelta(hours=2), detailed=True),
+    'pricing.fee_details.multi_month_stay': fee_benchmark(timedelta(days=92, hours=5), True, 500),
+    'parsing.parse_datetime': parse_timestamps(),
+    'parsing.parse_epoch_minutes_column': parse_timestamps(column=True),
+    'validation.car_identities': batch_validation(ValidationService.validate_car_identities, plate),
+    'validation.frequent_parking_numbers': batch_validation(
+        ValidationService.validate_frequent_parking_numbers, lambda i: f"{i % 100000:05d}"
+    ),
+    'accrual.refresh_5000_cars.incremental': lot_refresh(incremental=True),
+    'accrual.refresh_5000_cars.full_recalculation': lot_refresh(incremental=False),
+    'file_storage.park_pickup_cycle': park_pickup_cycle,
+    'file_storage.concurrent_pickups.8_gates': concurrent_pickups(8),
+    'file_storage.save_payment_record.empty_history': save_payment_with_history(0),
+    'file_storage.save_payment_record.10k_history': save_payment_with_history(10000),
+    'file_storage.save_payment_record.100k_history': save_payment_with_history(100000),
+    'history.generate_history.full_10k': generate_history(10000),
+    'history.generate_history.full_100k': generate_history(100000),
+    'history.generate_history.incremental_100k': generate_history(100000, incremental=True),
+    'ingest.generated_week.memory': ingest_generated_week(lambda workdir: InMemoryStorage()),
+    'ingest.generated_week.file': ingest_generated_week(FileHandler),
+}
+
+
+def run_benchmark(setup, scale, repeat):
+    """Best of repeat runs, each on a fresh temporary data directory"""
+    best = None
+    for _ in range(repeat):
+        workdir = Path(tempfile.mkdtemp(prefix='parking_bench_'))
+        try:
+            operations, run = setup(scale, workdir)
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return {
+        'operations': operations,
+        'seconds': best,
+        'seconds_per_op': best / operations,
+        'ops_per_second': operations / best if best > 0 else 0.0
+    }
+
+
+def run_suite(names, scale=1.0, repeat=DEFAULT_REPEAT, report=print):
+    # Compile the tariff up front so the first benchmark does not pay for it
+    get_tariff_table()
+    results = {}
+    for name in names:
+        result = run_benchmark(BENCHMARKS[name], scale, repeat)
+        results[name] = result
+        report(f"{name:<50} {result['seconds_per_op'] * 1e6:>12.1f} us/op {result['ops_per_second']:>12.0f} ops/s")
+    return {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'scale': scale,
+            'repeat': repeat
+        },
+        'results': results
+    }
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare per-operation times with a baseline run.
+    Returns (name, baseline_seconds_per_op, seconds_per_op, change) for every regression past threshold.
+    """
+    regressions = []
+    for name, result in results['results'].items():
+        previous = baseline['results'].get(name)
+        if not previous or not previous['seconds_per_op']:
+            continue
+        change = result['seconds_per_op'] / previous['seconds_per_op'] - 1
+        if change > threshold:
+            regressions.append((name, previous['seconds_per_op'], result['seconds_per_op'], change))
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Parking system benchmarks")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="where to write the JSON results")
+    parser.add_argument('--baseline', help="JSON results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction, e.g. 0.25 for 25%%")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="multiply operation counts and history sizes, e.g. 0.1 for a quick run")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="runs per benchmark, the best is kept")
+    parser.add_argument('--filter', default='', help="only run benchmarks whose name contains this text")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    names = [name for name in BENCHMARKS if args.filter in name]
+    if not names:
+        print(f"No benchmarks match '{args.filter}'")
+        return 2
+
+    results = run_suite(names, args.scale, args.repeat)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to: {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"No regressions past {args.threshold:.0%} against {args.baseline}")
+        return 0
+
+    print(f"\n--- REGRESSIONS PAST {args.threshold:.0%} ---")
+    for name, previous, current, change in regressions:
+        print(f"{name}: {previous * 1e6:.1f} -> {current * 1e6:.1f} us/op (+{change:.0%})")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -26,3 +26,11 @@ FREQUENT_PARKING_DISCOUNTS = {
     'night_early': 0.5,  # 50% discount for 17:00-Midnight, Midnight-08:00
     'other': 0.1,        # 10% discount for other times
 }
+
+# Maximum hours charged at the normal rate per day type and period,
+# hours beyond the limit are charged at double rate
+TIME_LIMITS = {
+    ('weekday', '08:00-16:59'): 2,
+    ('saturday', '08:00-16:59'): 4,
+    ('sunday', '08:00-16:59'): 8,
+}
@@ -7,14 +7,58 @@ PARKING_RECORDS_DIR = DATA_DIR / "parking_records"
 PAYMENTS_DIR = DATA_DIR / "payments"
 CREDITS_DIR = DATA_DIR / "credits"
 HISTORY_DIR = DATA_DIR / "history"
+LOCKS_DIR = DATA_DIR / "locks"
+SUMMARIES_DIR = DATA_DIR / "summaries"
+JOURNAL_DIR = DATA_DIR / "journal"
 
 # Create directories if they don't exist
-for directory in [DATA_DIR, PARKING_RECORDS_DIR, PAYMENTS_DIR, CREDITS_DIR, HISTORY_DIR]:
+for directory in [DATA_DIR, PARKING_RECORDS_DIR, PAYMENTS_DIR, CREDITS_DIR, HISTORY_DIR, LOCKS_DIR, SUMMARIES_DIR,
+                  JOURNAL_DIR]:
     directory.mkdir(parents=True, exist_ok=True)
 
+# Storage backend: 'file' (JSON files per car), 'sqlite' or 'memory' (no persistence)
+STORAGE_BACKEND = 'file'
+SQLITE_DB_PATH = DATA_DIR / "parking.db"
+
+# File backend read cache: plates kept per cache (parking records, credit balances), 0 disables it.
+# With the mtime check every hit costs a stat, needed when several gate processes share the data
+# directory; a single process can turn it off so cached reads never touch the disk.
+STORAGE_CACHE_SIZE = 4096
+STORAGE_CACHE_CHECK_MTIME = True
+
+# Whether several gate processes share the data directory (or database). A single process can
+# set it to False so ParkingService answers "is this car parked" from its in-memory index
+STORAGE_SHARED = True
+
+# Multi-gate server (run.py --serve)
+GATE_SERVER_HOST = "127.0.0.1"
+GATE_SERVER_PORT = 8765
+GATE_SERVER_WORKERS = 8
+
+# Worker processes for the revenue report (run.py --report), None uses every core
+REPORT_WORKERS = None
+
+# Operation latency metrics (run.py --metrics FILE enables them for one run)
+METRICS_ENABLED = False
+METRICS_FILE = DATA_DIR / "metrics.prom"
+
+# Pickup write-ahead journal: a segment is truncated once it grows past this size
+# and every pickup in it has been applied
+JOURNAL_SEGMENT_BYTES = 4 * 1024 * 1024
+
+# Seconds a pickup quote can be committed at the quoted fee
+QUOTE_TTL_SECONDS = 120
+
+# History lines shown per page in the console
+HISTORY_PAGE_SIZE = 20
+
 # File formats
 DATE_FORMAT = "%Y-%m-%d %H:%M"
 CURRENCY_FORMAT = "{:.2f}"
 
 # Car identity pattern
 CAR_IDENTITY_PATTERN = r'^[0-9]{2}[A-Z]-[0-9]{5}$'
+
+# Pricing config is recompiled when this file changes on disk
+PRICING_CONFIG_PATH = BASE_DIR / "config" / "pricing_rates.py"
+TARIFF_RELOAD_INTERVAL = 1.0  # seconds between mtime checks
@@ -1,12 +1,59 @@
 """Entry point script to run the parking system"""
 
+import argparse
 import sys
 import os
 
 # Add src directory to Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-from main import main
+from config.settings import GATE_SERVER_HOST, GATE_SERVER_PORT, METRICS_ENABLED, METRICS_FILE
+from src.utils.metrics import registry
+from main import main, ingest_events, serve_gates, revenue_report, simulate_tariff, import_file_storage
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Console Parking System")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--ingest', metavar='FILE',
+                      help="process a CSV or JSONL file of park/pickup events instead of the interactive menu")
+    mode.add_argument('--serve', action='store_true',
+                      help="run the multi-gate TCP server instead of the interactive menu")
+    mode.add_argument('--report', metavar='OUT', nargs='?', const='',
+                      help="print the fleet revenue report, optionally also writing it as JSON to OUT")
+    mode.add_argument('--simulate', metavar='PRICING_FILE',
+                      help="re-price past stays under a candidate pricing config and compare revenue")
+    mode.add_argument('--import-files', action='store_true',
+                      help="copy the JSON file storage into the SQLite database, once before switching backends")
+    parser.add_argument('--departure-from', metavar='YYYY-MM-DD', help="first departure date for --simulate")
+    parser.add_argument('--departure-to', metavar='YYYY-MM-DD', help="last departure date for --simulate")
+    parser.add_argument('--output', metavar='FILE', help="also write the --simulate result as JSON")
+    parser.add_argument('--host', default=GATE_SERVER_HOST, help="gate server host")
+    parser.add_argument('--port', type=int, default=GATE_SERVER_PORT, help="gate server port")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="record operation latencies and write them in Prometheus text format to FILE on exit")
+    return parser.parse_args()
+
+def run(args):
+    if args.ingest:
+        ingest_events(args.ingest)
+    elif args.simulate:
+        simulate_tariff(args.simulate, args.departure_from, args.departure_to, args.output)
+    elif args.report is not None:
+        revenue_report(args.report or None)
+    elif args.import_files:
+        import_file_storage()
+    elif args.serve:
+        serve_gates(args.host, args.port)
+    else:
+        main()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    metrics_file = args.metrics or (METRICS_FILE if METRICS_ENABLED else None)
+    if metrics_file:
+        registry.enable()
+    try:
+        run(args)
+    finally:
+        if metrics_file:
+            print(f"Metrics written to: {registry.write(metrics_file)}")
@@ -26,3 +26,7 @@ class InsufficientPaymentException(ParkingSystemException):
 class FileOperationException(ParkingSystemException):
     """Raised when file operations fail"""
     pass
+
+class QuoteExpiredException(ParkingSystemException):
+    """Raised when a pickup quote is unknown, expired or no longer matches the parking record"""
+    pass
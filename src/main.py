@@ -1,11 +1,18 @@
+import asyncio
+import json
 import sys
-from datetime import datetime
+from itertools import islice
 
 from services.parking_service import ParkingService
-from exceptions.parking_exceptions import *
+from services.event_ingest_service import EventIngestService, iter_events
+from services.gate_server import GateServer
+from services.revenue_report_service import RevenueReportService
+from services.tariff_simulation_service import TariffSimulationService
+from services.validation_service import ValidationService
 from utils.file_handler import FileHandler
-from models.parking_record import ParkingRecord
-from services.pricing_service import PricingService
+from utils.sqlite_handler import SQLiteHandler
+from exceptions.parking_exceptions import *
+from config.settings import HISTORY_PAGE_SIZE, SQLITE_DB_PATH
 
 class ParkingSystemApp:
     def __init__(self):
@@ -61,40 +68,24 @@ class ParkingSystemApp:
         try:
             car_identity = input("Enter car identity: ").strip()
             
-            # First, let's show the calculated fee
+            # Quote the fee once, the pickup charges exactly this quote
             try:
-                # We need to calculate the fee first to show to user
-                file_handler = FileHandler()
-                record_data = file_handler.load_parking_record(car_identity)
-                
-                if not record_data:
-                    raise CarNotFoundException(f"No parking record found for car {car_identity}")
-                
-                parking_record = ParkingRecord.from_dict(record_data)
-                departure_time = datetime.now()
-                has_frequent_parking = parking_record.frequent_parking_number is not None
-                
-                pricing_service = PricingService()
-                total_fee, calculation_details = pricing_service.calculate_parking_fee(
-                    parking_record.arrival_time,
-                    departure_time,
-                    has_frequent_parking
-                )
-                
-                # Show existing credits
-                existing_credits = file_handler.load_credit_balance(car_identity)
-                fee_after_credits = max(0, total_fee - existing_credits)
+                quote = self.parking_service.quote_pickup(car_identity)
+                total_fee = quote['total_fee']
+                existing_credits = quote['available_credits']
+                fee_after_credits = quote['fee_after_credits']
                 
                 print(f"\n--- PARKING CALCULATION ---")
-                print(f"Car Identity: {car_identity}")
-                print(f"Arrival Time: {parking_record.arrival_time}")
-                print(f"Departure Time: {departure_time}")
+                print(f"Car Identity: {quote['car_identity']}")
+                print(f"Arrival Time: {quote['arrival_time']}")
+                print(f"Departure Time: {quote['departure_time']}")
                 print(f"Total Parking Fee: ${total_fee:.2f}")
                 if existing_credits > 0:
                     print(f"Available Credits: ${existing_credits:.2f}")
                     print(f"Fee After Credits: ${fee_after_credits:.2f}")
                 
                 print(f"\nAmount to Pay: ${fee_after_credits:.2f}")
+                print(f"Quote valid until: {quote['expires_at']:%H:%M:%S}")
                 
             except Exception as e:
                 print(f"Error calculating fee: {e}")
@@ -102,7 +93,7 @@ class ParkingSystemApp:
             
             payment_amount = input(f"Enter payment amount (minimum ${fee_after_credits:.2f}): $").strip()
             
-            result = self.parking_service.pickup_car(car_identity, payment_amount)
+            result = self.parking_service.commit_pickup(quote['quote_token'], payment_amount)
             
             print(f"\n--- PICKUP SUCCESSFUL ---")
             print(f"Car Identity: {result['car_identity']}")
@@ -124,15 +115,36 @@ class ParkingSystemApp:
         print("\n--- VIEW HISTORY ---")
         try:
             car_identity = input("Enter car identity: ").strip()
+            arrival_from = input("Arrivals from (YYYY-MM-DD, optional): ").strip() or None
+            arrival_to = input("Arrivals to (YYYY-MM-DD, optional): ").strip() or None
             
-            result = self.parking_service.generate_history(car_identity)
+            result = self.parking_service.generate_history(car_identity, arrival_from, arrival_to)
             
             print(f"\n--- PARKING HISTORY FOR {car_identity} ---")
-            print(result['content'])
+            print(f"Total payment: ${result['total_payments']:.2f}")
+            print(f"Available credits: ${result['available_credits']:.2f}")
             print(f"History exported to: {result['filename']}")
-            print(f"Total Records: {result['records_count']}")
+            if arrival_from or arrival_to:
+                print(f"Total Records: {result['records_count']}")
+            else:
+                print(f"Total Records: {result['records_count']} ({result['new_records_count']} new since last export)")
+            
+            # Show the visits one page at a time, streamed from storage
+            lines = self.parking_service.iter_history_lines(car_identity, arrival_from, arrival_to)
+            page_number = 1
+            while True:
+                page = list(islice(lines, HISTORY_PAGE_SIZE))
+                if not page:
+                    break
+                print(f"\nParked Dates (page {page_number}):")
+                print(''.join(page), end='')
+                if len(page) < HISTORY_PAGE_SIZE:
+                    break
+                if input("Press Enter for the next page, or q to stop: ").strip().lower() == 'q':
+                    break
+                page_number += 1
             
-        except (InvalidCarIdentityException, CarNotFoundException) as e:
+        except (InvalidCarIdentityException, CarNotFoundException, InvalidDateTimeException) as e:
             print(f"\n✗ Error: {e}")
         except Exception as e:
             print(f"\n✗ Unexpected error: {e}")
@@ -174,5 +186,114 @@ def main():
         print(f"Failed to start application: {e}")
         sys.exit(1)
 
+def ingest_events(path):
+    """Non-interactive batch mode: stream a CSV/JSONL file of gate events through the service"""
+    def report_error(line_number, event, error):
+        print(f"✗ Line {line_number}: {error}")
+
+    try:
+        service = EventIngestService(ParkingService())
+        stats = service.ingest(iter_events(path), on_error=report_error)
+    except Exception as e:
+        print(f"Failed to ingest events: {e}")
+        sys.exit(1)
+
+    print(f"\n--- INGEST SUMMARY ---")
+    print(f"Events processed: {stats['processed']}")
+    print(f"Succeeded: {stats['succeeded']} (park: {stats['park']}, pickup: {stats['pickup']})")
+    print(f"Failed: {stats['failed']}")
+    print(f"Elapsed: {stats['elapsed_seconds']:.2f}s ({stats['events_per_second']:.0f} events/s)")
+    if stats['failed']:
+        sys.exit(2)
+
+def serve_gates(host, port):
+    """Server mode: accept park/quote/pickup requests from all lanes over TCP"""
+    async def serve():
+        server = GateServer(ParkingService())
+        bound_host, bound_port = await server.start(host, port)
+        print(f"Gate server listening on {bound_host}:{bound_port}")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        print("\nGate server stopped")
+    except Exception as e:
+        print(f"Failed to run gate server: {e}")
+        sys.exit(1)
+
+def revenue_report(output_path=None):
+    """Reporting mode: aggregate every car's payments into a fleet-wide revenue report"""
+    try:
+        report = RevenueReportService().generate_report()
+    except Exception as e:
+        print(f"Failed to generate revenue report: {e}")
+        sys.exit(1)
+
+    print(f"\n--- REVENUE REPORT ---")
+    print(f"Cars: {report['cars']}, visits: {report['total_visits']}")
+    print(f"Total revenue: ${report['total_revenue']:.2f}")
+    print(f"Credit liability: ${report['credit_liability']:.2f} ({report['cars_with_credit']} cars)")
+    print("\nMonthly revenue:")
+    for month, bucket in report['monthly'].items():
+        print(f"  {month}: ${bucket['revenue']:.2f} ({bucket['visits']} visits)")
+    print("\nBy day type:")
+    for day_type, revenue in report['by_day_type'].items():
+        print(f"  {day_type}: ${revenue:.2f}")
+    print("\nBy period:")
+    for period, revenue in report['by_period'].items():
+        print(f"  {period}: ${revenue:.2f}")
+    print(f"\nElapsed: {report['elapsed_seconds']:.2f}s")
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Full report (daily and weekly included) written to: {output_path}")
+
+def simulate_tariff(candidate_path, departure_from=None, departure_to=None, output_path=None):
+    """What-if mode: re-price past stays under a candidate pricing config"""
+    try:
+        departure_from = ValidationService.validate_date(departure_from)
+        departure_to = ValidationService.validate_date(departure_to)
+        result = TariffSimulationService().simulate(candidate_path, departure_from, departure_to)
+    except Exception as e:
+        print(f"Failed to simulate tariff: {e}")
+        sys.exit(1)
+
+    def show(label, revenue):
+        change = f" ({revenue['change_percent']:+.2f}%)" if revenue['change_percent'] is not None else ""
+        print(f"  {label}: ${revenue['old']:.2f} -> ${revenue['new']:.2f}{change}")
+
+    print(f"\n--- TARIFF SIMULATION: {candidate_path} ---")
+    print(f"Departures: {departure_from or 'start'} to {departure_to or 'end'}, visits: {result['visits']}")
+    show("Total revenue", result['total'])
+    for title, breakdown in (("By day type", 'by_day_type'), ("By period", 'by_period'),
+                             ("By member status", 'by_member_status')):
+        print(f"\n{title}:")
+        for key, revenue in result[breakdown].items():
+            show(key, revenue)
+    print(f"\nElapsed: {result['elapsed_seconds']:.2f}s")
+
+    if output_path:
+        with open(output_path, 'w') as f:
+            json.dump(result, f, indent=2)
+        print(f"Full result written to: {output_path}")
+
+def import_file_storage():
+    """Migration mode: copy the JSON file storage into the SQLite database"""
+    try:
+        sqlite_handler = SQLiteHandler(SQLITE_DB_PATH)
+        imported = sqlite_handler.import_files(FileHandler())
+        sqlite_handler.close()
+    except Exception as e:
+        print(f"Failed to import file storage: {e}")
+        sys.exit(1)
+
+    print(f"Imported {imported} cars into {SQLITE_DB_PATH}")
+    print("Set STORAGE_BACKEND = 'sqlite' in config/settings.py to use the database")
+
 if __name__ == "__main__":
     main()
@@ -2,6 +2,9 @@ import re
 from config.settings import CAR_IDENTITY_PATTERN
 from src.exceptions.parking_exceptions import InvalidCarIdentityException
 
+# Compiled once for every Car and for batch validation
+CAR_IDENTITY_REGEX = re.compile(CAR_IDENTITY_PATTERN)
+
 class Car:
     def __init__(self, identity):
         self.identity = self._validate_identity(identity)
@@ -11,7 +14,7 @@ class Car:
         if not identity:
             raise InvalidCarIdentityException("Car identity cannot be empty")
         
-        if not re.match(CAR_IDENTITY_PATTERN, identity):
+        if not CAR_IDENTITY_REGEX.match(identity):
             raise InvalidCarIdentityException(
                 f"Invalid car identity format: {identity}. "
                 "Expected format: XXX-XXXXX (e.g., 59C-12345)"
@@ -1,52 +1,97 @@
 
 from datetime import datetime
-from utils.datetime_helper import parse_datetime, format_datetime
+from utils.datetime_helper import (
+    parse_epoch_minutes, to_epoch_minutes, from_epoch_minutes, format_epoch_minutes
+)
+
+def _to_minutes(value):
+    """Epoch minutes from a datetime or a YYYY-MM-DD HH:MM string"""
+    if isinstance(value, int):
+        return value
+    if isinstance(value, datetime):
+        return to_epoch_minutes(value)
+    return parse_epoch_minutes(value)
 
 class ParkingRecord:
+    """
+    One visit, with times kept as integer minutes since the epoch.
+    Datetimes and strings are only built when asked for, and the serialized
+    dict is cached until the record changes.
+    """
+    __slots__ = (
+        'car_identity', 'frequent_parking_number', 'arrival_minute', 'departure_minute',
+        'total_fee', 'payment_amount', 'created_minute', '_data'
+    )
+    
     def __init__(self, car_identity, arrival_time, frequent_parking_number=None):
         self.car_identity = car_identity
-        self.arrival_time = arrival_time if isinstance(arrival_time, datetime) else parse_datetime(arrival_time)
+        self.arrival_minute = _to_minutes(arrival_time)
         self.frequent_parking_number = frequent_parking_number
-        self.departure_time = None
+        self.departure_minute = None
         self.total_fee = None
         self.payment_amount = None
-        self.created_at = datetime.now()
+        self.created_minute = to_epoch_minutes(datetime.now())
+        self._data = None
+    
+    @property
+    def arrival_time(self):
+        return from_epoch_minutes(self.arrival_minute)
+    
+    @property
+    def departure_time(self):
+        return from_epoch_minutes(self.departure_minute) if self.departure_minute is not None else None
+    
+    @property
+    def created_at(self):
+        return from_epoch_minutes(self.created_minute)
+    
+    @property
+    def has_frequent_parking(self):
+        return self.frequent_parking_number is not None
     
     def set_departure(self, departure_time, total_fee):
         """Set departure time and calculated fee"""
-        self.departure_time = departure_time if isinstance(departure_time, datetime) else parse_datetime(departure_time)
+        self.departure_minute = _to_minutes(departure_time)
         self.total_fee = total_fee
+        self._data = None
     
     def set_payment(self, payment_amount):
         """Set payment amount"""
         self.payment_amount = payment_amount
+        self._data = None
     
     def to_dict(self):
-        """Convert to dictionary for JSON serialization"""
-        return {
-            'car_identity': self.car_identity,
-            'arrival_time': format_datetime(self.arrival_time),
-            'departure_time': format_datetime(self.departure_time) if self.departure_time else None,
-            'frequent_parking_number': self.frequent_parking_number,
-            'total_fee': self.total_fee,
-            'payment_amount': self.payment_amount,
-            'created_at': format_datetime(self.created_at)
-        }
+        """Convert to dictionary for JSON serialization, formatted once per change"""
+        if self._data is None:
+            self._data = {
+                'car_identity': self.car_identity,
+                'arrival_time': format_epoch_minutes(self.arrival_minute),
+                'departure_time': (
+                    format_epoch_minutes(self.departure_minute) if self.departure_minute is not None else None
+                ),
+                'frequent_parking_number': self.frequent_parking_number,
+                'total_fee': self.total_fee,
+                'payment_amount': self.payment_amount,
+                'created_at': format_epoch_minutes(self.created_minute)
+            }
+        return self._data
+    
+    def release_dict(self):
+        """Drop the cached dict, for records kept in memory for the whole stay"""
+        self._data = None
     
     @classmethod
     def from_dict(cls, data):
-        """Create ParkingRecord from dictionary"""
-        record = cls(
-            data['car_identity'],
-            data['arrival_time'],
-            data.get('frequent_parking_number')
-        )
-        
-        if data.get('departure_time'):
-            record.departure_time = parse_datetime(data['departure_time'])
-        
+        """Create ParkingRecord from dictionary, parsing each time exactly once"""
+        record = cls.__new__(cls)
+        record.car_identity = data['car_identity']
+        record.frequent_parking_number = data.get('frequent_parking_number')
+        record.arrival_minute = _to_minutes(data['arrival_time'])
+        record.departure_minute = _to_minutes(data['departure_time']) if data.get('departure_time') else None
         record.total_fee = data.get('total_fee')
         record.payment_amount = data.get('payment_amount')
-        record.created_at = parse_datetime(data['created_at'])
-        
+        record.created_minute = (
+            _to_minutes(data['created_at']) if data.get('created_at') else record.arrival_minute
+        )
+        record._data = None
         return record
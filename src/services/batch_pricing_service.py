@@ -0,0 +1,113 @@
+import numpy as np
+
+from src.utils.tariff_table import get_tariff_table, MINUTES_PER_DAY
+
+# 1970-01-01 was a Thursday
+EPOCH_WEEKDAY = 3
+
+
+class BatchPricingService:
+    """
+    Vectorized fee calculation over arrays of epoch-minute timestamps.
+    Produces the same fees as PricingService.calculate_parking_fee.
+    """
+
+    def __init__(self, tariff=None):
+        # A fixed tariff is used as given, otherwise follow the active tariff
+        self.tariff = tariff
+        self._compiled_tariff = None
+
+    def calculate_parking_fees(self, arrival_minutes, departure_minutes, frequent_mask=None):
+        """
+        Calculate parking fees for arrays of arrival and departure epoch minutes.
+        Returns an array of fees rounded to 2 decimals.
+        """
+        self._compile(self.tariff or get_tariff_table())
+
+        arrivals = np.asarray(arrival_minutes, dtype=np.int64)
+        departures = np.asarray(departure_minutes, dtype=np.int64)
+        if frequent_mask is None:
+            frequent = np.zeros(arrivals.shape, dtype=np.int64)
+        else:
+            frequent = np.asarray(frequent_mask, dtype=bool).astype(np.int64)
+
+        if np.any(departures <= arrivals):
+            raise ValueError("Departure time must be after arrival time")
+
+        arrival_days, arrival_offsets = np.divmod(arrivals, MINUTES_PER_DAY)
+        departure_days, departure_offsets = np.divmod(departures, MINUTES_PER_DAY)
+        arrival_weekdays = (arrival_days + EPOCH_WEEKDAY) % 7
+        departure_weekdays = (departure_days + EPOCH_WEEKDAY) % 7
+
+        same_day = arrival_days == departure_days
+
+        # Head: arrival to midnight, or to departure when it is the same day
+        head_end = np.where(same_day, departure_offsets, MINUTES_PER_DAY)
+        total = self._segment_fees(arrival_weekdays, arrival_offsets, head_end, frequent)
+
+        # Tail: midnight to departure on the departure day
+        tail_end = np.where(same_day, 0, departure_offsets)
+        total += self._segment_fees(departure_weekdays, np.zeros_like(tail_end), tail_end, frequent)
+
+        # Full days in between, priced from the weekly prefix sums
+        full_days = np.maximum(departure_days - arrival_days - 1, 0)
+        weeks, remaining_days = np.divmod(full_days, 7)
+        first_weekday = (arrival_weekdays + 1) % 7
+        prefix = self._day_fee_prefix
+        total += (
+            weeks * prefix[frequent, 7]
+            + prefix[frequent, first_weekday + remaining_days]
+            - prefix[frequent, first_weekday]
+        )
+
+        return np.round(total, 2)
+
+    def _compile(self, tariff):
+        """Convert the tariff arrays to NumPy once per tariff"""
+        if self._compiled_tariff is tariff:
+            return
+
+        segments_per_day = len(tariff.periods)
+        self._periods_per_day = segments_per_day
+        self._period_starts = np.array(tariff.period_starts, dtype=np.int64)
+        self._period_ends = np.array(tariff.period_ends, dtype=np.int64)
+        self._flat = np.array(tariff.segment_flat, dtype=bool)[:segments_per_day]
+        self._limits = np.array(tariff.segment_limit).reshape(7, segments_per_day)
+        # [frequent, weekday, period]
+        self._normal_rates = np.array(tariff.normal_rates).reshape(2, 7, segments_per_day)
+        self._exceed_rates = np.array(tariff.exceed_rates).reshape(2, 7, segments_per_day)
+
+        # Prefix sums of full-day fees over two weeks, indexed [frequent, weekday]
+        weekdays = np.arange(7)
+        day_fees = np.array([
+            self._segment_fees(weekdays, np.zeros(7, dtype=np.int64),
+                               np.full(7, MINUTES_PER_DAY), np.full(7, frequent))
+            for frequent in (0, 1)
+        ])
+        self._day_fee_prefix = np.concatenate(
+            (np.zeros((2, 1)), np.cumsum(np.tile(day_fees, 2), axis=1)), axis=1
+        )
+        self._compiled_tariff = tariff
+
+    def _segment_fees(self, weekdays, starts, ends, frequent):
+        """Fees for [start, end) minute ranges that lie within a single day"""
+        total = np.zeros(starts.shape)
+        for p in range(self._periods_per_day):
+            minutes = np.minimum(ends, self._period_ends[p]) - np.maximum(starts, self._period_starts[p])
+            used = minutes > 0
+            normal_rates = self._normal_rates[frequent, weekdays, p]
+
+            hours = np.maximum(minutes, 0) / 60
+            limits = self._limits[weekdays, p]
+            exceeded = (limits > 0) & (hours > limits)
+
+            if self._flat[p]:
+                # Past its limit a flat period is charged once more, for the overtime part
+                total += np.where(used, normal_rates * np.where(exceeded, 2, 1), 0.0)
+                continue
+
+            normal_fee = normal_rates * np.where(exceeded, limits, np.ceil(hours))
+            exceed_fee = self._exceed_rates[frequent, weekdays, p] * np.ceil(np.where(exceeded, hours - limits, 0.0))
+            total += np.where(used, normal_fee + exceed_fee, 0.0)
+
+        return total
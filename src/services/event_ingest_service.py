@@ -0,0 +1,94 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from src.exceptions.parking_exceptions import ParkingSystemException
+
+EVENT_FIELDS = ['event', 'car_identity', 'timestamp', 'frequent_parking_number', 'payment_amount']
+
+
+def iter_events(path):
+    """
+    Stream gate events from a CSV (with header) or JSON Lines file.
+    Yields (line_number, event) pairs, one line in memory at a time.
+    """
+    path = Path(path)
+    with open(path, 'r', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            reader = csv.DictReader(f)
+            for event in reader:
+                yield reader.line_num, event
+        else:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    event = json.loads(line)
+                except ValueError as e:
+                    yield line_number, {'error': f"Invalid JSON: {e}"}
+                    continue
+                if not isinstance(event, dict):
+                    event = {'error': "Invalid event: must be a JSON object"}
+                yield line_number, event
+
+
+class EventIngestService:
+    """Replay park and pickup events through ParkingService without the interactive menus"""
+
+    def __init__(self, parking_service):
+        self.parking_service = parking_service
+
+    def process_event(self, event):
+        """Apply one event, raising ParkingSystemException when it is rejected"""
+        if not isinstance(event, dict):
+            raise ParkingSystemException("Invalid event: must be a JSON object")
+        if 'error' in event:
+            raise ParkingSystemException(event['error'])
+
+        event_type = (event.get('event') or '').strip().lower()
+        car_identity = event.get('car_identity') or ''
+        timestamp = event.get('timestamp') or ''
+
+        if event_type == 'park':
+            return self.parking_service.park_car(
+                car_identity, timestamp, event.get('frequent_parking_number') or None
+            )
+        if event_type == 'pickup':
+            payment_amount = event.get('payment_amount')
+            if payment_amount in (None, ''):
+                raise ParkingSystemException("Pickup event is missing payment_amount")
+            # Pickups are charged at the camera timestamp, never at replay time
+            if not timestamp:
+                raise ParkingSystemException("Pickup event is missing timestamp")
+            return self.parking_service.pickup_car(car_identity, str(payment_amount), timestamp)
+
+        raise ParkingSystemException(f"Unknown event type: {event_type or '(empty)'}")
+
+    def ingest(self, events, on_error=None):
+        """
+        Process (line_number, event) pairs, reporting failures through
+        on_error(line_number, event, error) and carrying on.
+        Returns throughput statistics.
+        """
+        stats = {'processed': 0, 'succeeded': 0, 'failed': 0, 'park': 0, 'pickup': 0}
+        start = time.perf_counter()
+
+        for line_number, event in events:
+            stats['processed'] += 1
+            try:
+                self.process_event(event)
+            except Exception as e:
+                stats['failed'] += 1
+                if on_error:
+                    on_error(line_number, event, e)
+                continue
+
+            stats['succeeded'] += 1
+            stats[event['event'].strip().lower()] += 1
+
+        stats['elapsed_seconds'] = time.perf_counter() - start
+        stats['events_per_second'] = (
+            stats['processed'] / stats['elapsed_seconds'] if stats['elapsed_seconds'] > 0 else 0.0
+        )
+        return stats
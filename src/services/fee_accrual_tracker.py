@@ -0,0 +1,141 @@
+import math
+from datetime import datetime, timedelta
+
+from src.services.pricing_service import PricingService
+from src.utils.tariff_table import get_tariff_table
+
+ONE_DAY = timedelta(days=1)
+SECONDS_PER_HOUR = 3600
+
+
+def _segment_fee(tariff, segment, hours, has_frequent_parking):
+    """Fee for hours spent in one segment, split at its daytime limit like iter_period_segments"""
+    time_limit = tariff.segment_limit[segment]
+    if time_limit and hours > time_limit:
+        return (tariff.period_fee(segment, time_limit, has_frequent_parking, 'normal')
+                + tariff.period_fee(segment, math.ceil(hours - time_limit), has_frequent_parking, 'exceed_time'))
+    return tariff.period_fee(segment, math.ceil(hours), has_frequent_parking, 'normal')
+
+
+class CarAccrual:
+    """
+    Running fee of one parked car: the fee of every period completed so far plus
+    the open period, which is the only one priced again as time goes on. Hours are
+    rounded up, so the fee is also kept until the open period's next hour starts.
+    """
+
+    __slots__ = ('arrival_time', 'has_frequent_parking', 'closed_fee',
+                 'open_start', 'open_end', 'day_start', 'segment',
+                 'cached_fee', 'cached_from', 'cached_until')
+
+    def __init__(self, arrival_time, has_frequent_parking, tariff):
+        self.arrival_time = arrival_time
+        self.has_frequent_parking = bool(has_frequent_parking)
+        self.reset(tariff)
+
+    def reset(self, tariff):
+        """Start accruing from arrival again, e.g. under a reloaded tariff"""
+        self.closed_fee = 0.0
+        self.open_start = self.arrival_time
+        self.day_start = self.arrival_time.replace(hour=0, minute=0, second=0, microsecond=0)
+        self.segment = tariff.segment_at(self.arrival_time)
+        self.open_end = self.day_start + tariff.segment_end_delta[self.segment]
+        self.cached_fee = None
+        self.cached_from = self.cached_until = self.arrival_time
+
+    def fee_at(self, now, tariff):
+        """Fee for a departure at now, the same amount PricingService charges"""
+        if self.cached_from <= now <= self.cached_until and self.cached_fee is not None:
+            return self.cached_fee
+        if now <= self.arrival_time:
+            return 0.0
+        if now < self.open_start:
+            # Asked about the past, price it from arrival without moving the accrual back
+            return PricingService.calculate_total_fee(self.arrival_time, now, self.has_frequent_parking, tariff)
+
+        # Close every period that ended since the last tick
+        segment_count = len(tariff.segment_period)
+        while now >= self.open_end:
+            hours = (self.open_end - self.open_start).total_seconds() / SECONDS_PER_HOUR
+            self.closed_fee += _segment_fee(tariff, self.segment, hours, self.has_frequent_parking)
+            if self.open_end - self.day_start == ONE_DAY:
+                self.day_start = self.open_end
+            self.open_start = self.open_end
+            self.segment = (self.segment + 1) % segment_count
+            self.open_end = self.day_start + tariff.segment_end_delta[self.segment]
+
+        if now == self.open_start:
+            return round(self.closed_fee, 2)
+        hours = (now - self.open_start).total_seconds() / SECONDS_PER_HOUR
+
+        # The open period's fee next changes when its billed hours (normal or overtime) go up
+        time_limit = tariff.segment_limit[self.segment]
+        if time_limit and hours > time_limit:
+            billed_hours = time_limit + math.ceil(hours - time_limit)
+        else:
+            billed_hours = math.ceil(hours)
+            if time_limit and billed_hours > time_limit:
+                billed_hours = time_limit
+
+        self.cached_fee = round(
+            self.closed_fee + _segment_fee(tariff, self.segment, hours, self.has_frequent_parking), 2
+        )
+        self.cached_from = now
+        self.cached_until = min(self.open_start + timedelta(hours=billed_hours), self.open_end)
+        return self.cached_fee
+
+
+class FeeAccrualTracker:
+    """
+    "Fee so far" for every parked car, for the exit-lane displays. Each car keeps the fee up
+    to its last completed pricing period, so a refresh only prices the open partial period.
+    Follows the active tariff unless one is given, restarting the accruals when it reloads.
+    """
+
+    def __init__(self, tariff=None):
+        self._fixed_tariff = tariff
+        self._tariff = tariff or get_tariff_table()
+        self._accruals = {}
+
+    def __len__(self):
+        return len(self._accruals)
+
+    def __contains__(self, car_identity):
+        return car_identity in self._accruals
+
+    def track(self, car_identity, arrival_time, has_frequent_parking=False):
+        self._accruals[car_identity] = CarAccrual(arrival_time, has_frequent_parking, self._tariff)
+
+    def untrack(self, car_identity):
+        self._accruals.pop(car_identity, None)
+
+    def sync(self, parking_records):
+        """Track exactly the given ParkingRecords, e.g. ParkingService.iter_parked_cars()"""
+        seen = set()
+        for parking_record in parking_records:
+            car_identity = parking_record.car_identity
+            seen.add(car_identity)
+            accrual = self._accruals.get(car_identity)
+            if accrual is None or accrual.arrival_time != parking_record.arrival_time:
+                self.track(car_identity, parking_record.arrival_time, parking_record.has_frequent_parking)
+        for car_identity in self._accruals.keys() - seen:
+            del self._accruals[car_identity]
+
+    def fee(self, car_identity, now=None):
+        """Fee so far for one car"""
+        tariff = self._current_tariff()
+        return self._accruals[car_identity].fee_at(now or datetime.now(), tariff)
+
+    def refresh(self, now=None):
+        """Fee so far for every tracked car, {car_identity: fee}"""
+        tariff = self._current_tariff()
+        now = now or datetime.now()
+        return {car_identity: accrual.fee_at(now, tariff) for car_identity, accrual in self._accruals.items()}
+
+    def _current_tariff(self):
+        tariff = self._fixed_tariff or get_tariff_table()
+        if tariff is not self._tariff:
+            self._tariff = tariff
+            for accrual in self._accruals.values():
+                accrual.reset(tariff)
+        return tariff
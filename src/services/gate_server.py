@@ -0,0 +1,168 @@
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from config.settings import GATE_SERVER_WORKERS
+from src.exceptions.parking_exceptions import ParkingSystemException
+from src.services.fee_accrual_tracker import FeeAccrualTracker
+from src.utils.metrics import registry
+
+
+def _with_details(result, request):
+    """Fee breakdowns are only built for requests that ask for them ("details": true)"""
+    calculation_details = result.pop('calculation_details', None)
+    if request.get('details') and calculation_details is not None:
+        result['calculation_details'] = list(calculation_details)
+    return result
+
+
+class GateServer:
+    """
+    Asyncio TCP server that lets every entry/exit lane talk to one shared ParkingService.
+    Protocol: one JSON object per line in each direction, e.g.
+        {"id": 1, "op": "park", "car_identity": "59C-12345", "timestamp": "2025-06-20 09:00"}
+        {"id": 1, "ok": true, "result": "Car 59C-12345 parked successfully at 2025-06-20 09:00"}
+    Service calls run in a thread pool; requests for the same plate are serialized.
+    """
+
+    def __init__(self, parking_service, max_workers=GATE_SERVER_WORKERS):
+        self.parking_service = parking_service
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='gate')
+        self.server = None
+        # Running fees of parked cars for the lane displays
+        self.fee_tracker = FeeAccrualTracker()
+        self._fees_lock = asyncio.Lock()
+        # plate -> [lock, users], only touched from the event loop
+        self._plate_locks = {}
+        self._operations = {
+            'park': self._park,
+            'quote': self._quote,
+            'pickup': self._pickup,
+            'commit': self._commit,
+            'count': self._count,
+            'fees': self._fees,
+            'metrics': self._metrics,
+        }
+
+    async def start(self, host, port):
+        """Start listening, returns the bound (host, port)"""
+        self.server = await asyncio.start_server(self._handle_client, host, port)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def _handle_client(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self.handle_request_line(line)
+                writer.write((json.dumps(response, default=str) + '\n').encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request_line(self, line):
+        """Decode one request line and return the response object"""
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {'ok': False, 'error': f"Invalid request: {e}"}
+
+        response = {'id': request.get('id')} if 'id' in request else {}
+        operation = self._operations.get(request.get('op'))
+        if operation is None:
+            response.update(ok=False, error=f"Unknown operation: {request.get('op')}")
+            return response
+
+        try:
+            response.update(ok=True, result=await operation(request))
+        except ParkingSystemException as e:
+            response.update(ok=False, error=str(e))
+        except Exception as e:
+            response.update(ok=False, error=f"Unexpected error: {e}")
+        return response
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    @asynccontextmanager
+    async def _plate_lock(self, car_identity):
+        """Serialize requests for one plate across all lanes"""
+        key = str(car_identity or '').strip().upper()
+        entry = self._plate_locks.setdefault(key, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._plate_locks[key]
+
+    async def _park(self, request):
+        async with self._plate_lock(request.get('car_identity')):
+            return await self._run(
+                self.parking_service.park_car,
+                request.get('car_identity'), request.get('timestamp'),
+                request.get('frequent_parking_number')
+            )
+
+    async def _quote(self, request):
+        async with self._plate_lock(request.get('car_identity')):
+            return _with_details(await self._run(
+                self.parking_service.quote_pickup,
+                request.get('car_identity'), request.get('timestamp')
+            ), request)
+
+    async def _commit(self, request):
+        # Charge a quote: {"op": "commit", "quote_token": ..., "payment_amount": ...}
+        quote = self.parking_service.get_quote(request.get('quote_token'))
+        async with self._plate_lock(quote['car_identity'] if quote else None):
+            return _with_details(await self._run(
+                self.parking_service.commit_pickup,
+                request.get('quote_token'), str(request.get('payment_amount'))
+            ), request)
+
+    async def _pickup(self, request):
+        async with self._plate_lock(request.get('car_identity')):
+            return _with_details(await self._run(
+                self.parking_service.pickup_car,
+                request.get('car_identity'), str(request.get('payment_amount')),
+                request.get('timestamp')
+            ), request)
+
+    async def _count(self, request):
+        return self.parking_service.count_parked_cars()
+
+    async def _fees(self, request):
+        # Fee so far of every parked car, at the optional timestamp. The tracker is
+        # not thread-safe, so refreshes run one at a time off the event loop
+        async with self._fees_lock:
+            return await self._run(self._refresh_fees, request.get('timestamp'))
+
+    def _refresh_fees(self, timestamp):
+        now = self.parking_service.validation_service.validate_datetime(timestamp) if timestamp else None
+        self.fee_tracker.sync(self.parking_service.iter_parked_cars())
+        return self.fee_tracker.refresh(now)
+
+    async def _metrics(self, request):
+        # Prometheus text format, empty while metrics are disabled
+        return registry.render()
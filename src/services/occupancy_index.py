@@ -0,0 +1,46 @@
+from src.models.parking_record import ParkingRecord
+
+
+class OccupancyIndex:
+    """
+    In-memory index of the cars currently in the lot, keyed by plate.
+    Holds the slotted ParkingRecord of each active car, built once from
+    storage and kept up to date by ParkingService.
+    """
+
+    def __init__(self):
+        self._active = {}
+
+    @classmethod
+    def from_storage(cls, storage):
+        """Build the index from the active parking records in storage"""
+        index = cls()
+        for record_data in storage.iter_parking_records():
+            if record_data.get('departure_time'):
+                continue
+            index.add(ParkingRecord.from_dict(record_data))
+        return index
+
+    def add(self, parking_record):
+        """Mark a car as parked"""
+        # Parked cars stay indexed for hours, their serialized dict is not worth keeping
+        parking_record.release_dict()
+        self._active[parking_record.car_identity] = parking_record
+
+    def remove(self, car_identity):
+        """Mark a car as gone, ignoring cars that are not in the index"""
+        self._active.pop(car_identity, None)
+
+    def get(self, car_identity):
+        """ParkingRecord for a plate, or None when the car is not parked"""
+        return self._active.get(car_identity)
+
+    def __contains__(self, car_identity):
+        return car_identity in self._active
+
+    def __len__(self):
+        return len(self._active)
+
+    def __iter__(self):
+        """Iterate over a snapshot of the active cars"""
+        return iter(list(self._active.values()))
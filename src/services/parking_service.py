@@ -1,17 +1,34 @@
-from datetime import datetime
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from itertools import islice
+
+from config.settings import QUOTE_TTL_SECONDS
 
 from src.models.parking_record import ParkingRecord
 from src.services.validation_service import ValidationService
-from src.services.pricing_service import PricingService
-from src.utils.file_handler import FileHandler
+from src.services.pricing_service import PricingService, LazyCalculationDetails
+from src.services.occupancy_index import OccupancyIndex
+from src.utils.storage import create_storage
+from src.utils.metrics import timed
+from src.utils.tariff_table import get_tariff_table
 from src.exceptions.parking_exceptions import *
 
 class ParkingService:
-    def __init__(self):
-        self.file_handler = FileHandler()
+    def __init__(self, storage=None, quote_ttl=QUOTE_TTL_SECONDS):
+        # Any ParkingStorage implementation, defaults to the backend in settings
+        self.storage = storage if storage is not None else create_storage()
+        self.occupancy = OccupancyIndex.from_storage(self.storage)
         self.validation_service = ValidationService()
         self.pricing_service = PricingService()
+        # Open pickup quotes: token -> (deadline, quote), in deadline order
+        self.quote_ttl = quote_ttl
+        self._quotes = OrderedDict()
+        self._quotes_lock = threading.Lock()
     
+    @timed('parking_service')
     def park_car(self, car_identity_str, arrival_time_str, frequent_parking_str=None):
         """Park a car - store parking record"""
         try:
@@ -20,16 +37,24 @@ class ParkingService:
             arrival_time = self.validation_service.validate_datetime(arrival_time_str)
             frequent_parking_number = self.validation_service.validate_frequent_parking_number(frequent_parking_str)
             
-            # Check if car is already parked
-            existing_record = self.file_handler.load_parking_record(car.identity)
-            if existing_record and not existing_record.get('departure_time'):
-                raise ParkingSystemException(f"Car {car.identity} is already parked")
-            
-            # Create parking record
-            parking_record = ParkingRecord(car.identity, arrival_time, frequent_parking_number)
-            
-            # Save to file
-            self.file_handler.save_parking_record(car.identity, parking_record.to_dict())
+            with self.storage.lock(car.identity):
+                # Check if car is already parked. The index is per process: when other gate
+                # processes share the storage they may have parked or picked up the car since
+                if not getattr(self.storage, 'shared', True):
+                    if car.identity in self.occupancy:
+                        raise ParkingSystemException(f"Car {car.identity} is already parked")
+                elif self.storage.load_parking_record(car.identity):
+                    raise ParkingSystemException(f"Car {car.identity} is already parked")
+                else:
+                    # An index hit without a record is a pickup made by another process
+                    self.occupancy.remove(car.identity)
+                
+                # Create parking record
+                parking_record = ParkingRecord(car.identity, arrival_time, frequent_parking_number)
+                
+                # Save to file
+                self.storage.save_parking_record(car.identity, parking_record.to_dict())
+                self.occupancy.add(parking_record)
             
             return f"Car {car.identity} parked successfully at {arrival_time_str}"
         
@@ -39,121 +64,367 @@ class ParkingService:
         except Exception as e:
             raise ParkingSystemException(f"Failed to park car: {e}")
     
-    def pickup_car(self, car_identity_str, payment_amount_str):
-        """Pickup a car - calculate fee and process payment"""
+    @timed('parking_service')
+    def pickup_car(self, car_identity_str, payment_amount_str, departure_time_str=None):
+        """Pickup a car - calculate fee and process payment, departing now unless a time is given"""
         try:
             # Validate car identity
             car = self.validation_service.validate_car_identity(car_identity_str)
             
-            # Load parking record
-            record_data = self.file_handler.load_parking_record(car.identity)
-            if not record_data:
-                raise CarNotFoundException(f"No parking record found for car {car.identity}")
-            
-            parking_record = ParkingRecord.from_dict(record_data)
-            
-            if parking_record.departure_time:
-                raise ParkingSystemException(f"Car {car.identity} has already been picked up")
-            
-            # Calculate fee
-            departure_time = datetime.now()
-            has_frequent_parking = parking_record.frequent_parking_number is not None
-            
-            total_fee, calculation_details = self.pricing_service.calculate_parking_fee(
-                parking_record.arrival_time,
-                departure_time,
-                has_frequent_parking
-            )
-            
-            # Load existing credits
-            existing_credits = self.file_handler.load_credit_balance(car.identity)
-            
-            # Apply credits to reduce fee
-            fee_after_credits = max(0, total_fee - existing_credits)
-            credits_used = min(existing_credits, total_fee)
-            
-            # Validate payment
-            payment_amount = self.validation_service.validate_payment_amount(
-                payment_amount_str, fee_after_credits
+            # Hold the plate lock from reading the record to writing credits
+            with self.storage.lock(car.identity):
+                parking_record, departure_time, total_fee, existing_credits, calculation_details = (
+                    self._price_pickup(car, departure_time_str)
+                )
+                return self._charge_pickup(
+                    car, parking_record, departure_time, total_fee, existing_credits,
+                    payment_amount_str, calculation_details
+                )
+        
+        except (InvalidCarIdentityException, CarNotFoundException, 
+                InsufficientPaymentException, ParkingSystemException) as e:
+            raise e
+        except Exception as e:
+            raise ParkingSystemException(f"Failed to pickup car: {e}")
+    
+    @timed('parking_service')
+    def quote_pickup(self, car_identity_str, departure_time_str=None):
+        """
+        Price a pickup now (or at the given time) and hold the price for quote_ttl seconds.
+        The returned quote_token is passed to commit_pickup, which charges exactly this quote.
+        """
+        try:
+            car = self.validation_service.validate_car_identity(car_identity_str)
+            parking_record, departure_time, total_fee, existing_credits, calculation_details = (
+                self._price_pickup(car, departure_time_str)
             )
             
-            # Calculate new credits
-            new_credits = existing_credits - credits_used + (payment_amount - fee_after_credits)
-            
-            # Update parking record
-            parking_record.set_departure(departure_time, total_fee)
-            parking_record.set_payment(payment_amount)
-            
-            # Save records
-            self.file_handler.save_parking_record(car.identity, parking_record.to_dict())
-            self.file_handler.save_payment_record(car.identity, {
-                'arrival_time': parking_record.to_dict()['arrival_time'],
-                'departure_time': parking_record.to_dict()['departure_time'],
-                'total_fee': total_fee,
-                'payment_amount': payment_amount,
-                'credits_used': credits_used,
-                'timestamp': datetime.now().isoformat()
-            })
-            self.file_handler.save_credit_balance(car.identity, new_credits)
-            
-            # Delete active parking record
-            self.file_handler.delete_parking_record(car.identity)
-            
-            return {
+            quote = {
+                'quote_token': uuid.uuid4().hex,
                 'car_identity': car.identity,
+                'arrival_time': parking_record.arrival_time,
+                'departure_time': departure_time,
                 'total_fee': total_fee,
-                'credits_used': credits_used,
-                'fee_after_credits': fee_after_credits,
-                'payment_amount': payment_amount,
-                'new_credits': new_credits,
-                'calculation_details': calculation_details
+                'available_credits': existing_credits,
+                'fee_after_credits': max(0, total_fee - existing_credits),
+                'calculation_details': calculation_details,
+                'expires_at': datetime.now() + timedelta(seconds=self.quote_ttl)
             }
+            
+            now = time.monotonic()
+            with self._quotes_lock:
+                # Quotes share one TTL, so the expired ones are at the front
+                while self._quotes and next(iter(self._quotes.values()))[0] <= now:
+                    self._quotes.popitem(last=False)
+                self._quotes[quote['quote_token']] = (now + self.quote_ttl, quote)
+            return dict(quote)
         
-        except (InvalidCarIdentityException, CarNotFoundException, 
+        except (InvalidCarIdentityException, CarNotFoundException,
+                InvalidDateTimeException, ParkingSystemException) as e:
+            raise e
+        except Exception as e:
+            raise ParkingSystemException(f"Failed to calculate fee: {e}")
+    
+    def get_quote(self, quote_token):
+        """The open quote for a token, None when unknown or expired"""
+        with self._quotes_lock:
+            entry = self._quotes.get(quote_token)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return dict(entry[1])
+    
+    @timed('parking_service')
+    def commit_pickup(self, quote_token, payment_amount_str):
+        """
+        Charge a quote from quote_pickup without pricing the stay again. The quote stays
+        open when the payment is rejected, so the driver can pay again before it expires.
+        """
+        try:
+            with self._quotes_lock:
+                entry = self._quotes.get(quote_token)
+                if entry is not None and entry[0] <= time.monotonic():
+                    del self._quotes[quote_token]
+                    raise QuoteExpiredException(
+                        f"Quote for car {entry[1]['car_identity']} has expired, please request a new one"
+                    )
+            if entry is None:
+                raise QuoteExpiredException("Unknown or expired quote, please request a new one")
+            quote = entry[1]
+            
+            car = self.validation_service.validate_car_identity(quote['car_identity'])
+            with self.storage.lock(car.identity):
+                record_data = self.storage.load_parking_record(car.identity)
+                if not record_data:
+                    raise CarNotFoundException(f"No parking record found for car {car.identity}")
+                parking_record = ParkingRecord.from_dict(record_data)
+                existing_credits = self.storage.load_credit_balance(car.identity)
+                
+                # The car must still be on the quoted stay with the quoted credits
+                if (parking_record.departure_minute is not None
+                        or parking_record.arrival_time != quote['arrival_time']
+                        or existing_credits != quote['available_credits']):
+                    raise QuoteExpiredException(
+                        f"Quote for car {car.identity} is no longer valid, please request a new one"
+                    )
+                
+                result = self._charge_pickup(
+                    car, parking_record, quote['departure_time'], quote['total_fee'],
+                    existing_credits, payment_amount_str, quote['calculation_details']
+                )
+            
+            with self._quotes_lock:
+                self._quotes.pop(quote_token, None)
+            return result
+        
+        except (InvalidCarIdentityException, CarNotFoundException,
                 InsufficientPaymentException, ParkingSystemException) as e:
             raise e
         except Exception as e:
             raise ParkingSystemException(f"Failed to pickup car: {e}")
     
-    def generate_history(self, car_identity_str):
-        """Generate parking history for a car"""
+    def _charge_pickup(self, car, parking_record, departure_time, total_fee, existing_credits,
+                       payment_amount_str, calculation_details):
+        """Take the payment for a priced stay and close it (caller holds the plate lock)"""
+        # Apply credits to reduce fee
+        fee_after_credits = max(0, total_fee - existing_credits)
+        credits_used = min(existing_credits, total_fee)
+        
+        # Validate payment
+        payment_amount = self.validation_service.validate_payment_amount(
+            payment_amount_str, fee_after_credits
+        )
+        
+        # Calculate new credits
+        new_credits = existing_credits - credits_used + (payment_amount - fee_after_credits)
+        
+        # Update parking record
+        parking_record.set_departure(departure_time, total_fee)
+        parking_record.set_payment(payment_amount)
+        
+        # Keep the history aggregates current so viewing history stays cheap
+        summary = self._load_history_summary(car.identity)
+        summary['total_paid'] += payment_amount
+        summary['visit_count'] += 1
+        
+        # Save payment, credits and aggregates, then close the active parking record
+        record_dict = parking_record.to_dict()
+        self.storage.record_pickup(car.identity, {
+            'arrival_time': record_dict['arrival_time'],
+            'departure_time': record_dict['departure_time'],
+            'total_fee': total_fee,
+            'payment_amount': payment_amount,
+            'credits_used': credits_used,
+            'has_frequent_parking': parking_record.has_frequent_parking,
+            'timestamp': datetime.now().isoformat()
+        }, new_credits, summary)
+        self.occupancy.remove(car.identity)
+        
+        return {
+            'car_identity': car.identity,
+            'total_fee': total_fee,
+            'credits_used': credits_used,
+            'fee_after_credits': fee_after_credits,
+            'payment_amount': payment_amount,
+            'new_credits': new_credits,
+            'calculation_details': calculation_details
+        }
+    
+    def _price_pickup(self, car, departure_time_str):
+        """
+        Load the active record and credits and calculate the fee at departure.
+        The per-period breakdown is returned unevaluated, it is only built if someone reads it.
+        """
+        # Load parking record
+        record_data = self.storage.load_parking_record(car.identity)
+        if not record_data:
+            # Picked up through another gate process, drop it from this process's index
+            self.occupancy.remove(car.identity)
+            raise CarNotFoundException(f"No parking record found for car {car.identity}")
+        
+        parking_record = ParkingRecord.from_dict(record_data)
+        
+        if parking_record.departure_minute is not None:
+            raise ParkingSystemException(f"Car {car.identity} has already been picked up")
+        
+        # Calculate fee
+        if departure_time_str is None:
+            departure_time = datetime.now()
+        else:
+            departure_time = self.validation_service.validate_datetime(departure_time_str)
+        has_frequent_parking = parking_record.has_frequent_parking
+        
+        # Price with the total-only path, the breakdown uses the same tariff when read later
+        tariff = get_tariff_table()
+        total_fee = self.pricing_service.calculate_total_fee(
+            parking_record.arrival_time,
+            departure_time,
+            has_frequent_parking,
+            tariff
+        )
+        calculation_details = LazyCalculationDetails(
+            parking_record.arrival_time, departure_time, has_frequent_parking, tariff
+        )
+        
+        # Load existing credits
+        existing_credits = self.storage.load_credit_balance(car.identity)
+        
+        return parking_record, departure_time, total_fee, existing_credits, calculation_details
+    
+    def count_parked_cars(self):
+        """Number of cars currently in the lot"""
+        return len(self.occupancy)
+    
+    def iter_parked_cars(self):
+        """Iterate over the cars currently in the lot (ParkingRecord objects)"""
+        return iter(self.occupancy)
+    
+    @timed('parking_service')
+    def generate_history(self, car_identity_str, arrival_from=None, arrival_to=None):
+        """
+        Export parking history for a car. Totals come from the running aggregates and
+        only payments made since the last export are appended to the history file.
+        With an arrival date range (YYYY-MM-DD, inclusive) the matching visits are
+        streamed to a separate export file instead.
+        """
         try:
             # Validate car identity
             car = self.validation_service.validate_car_identity(car_identity_str)
+            arrival_from = self.validation_service.validate_date(arrival_from)
+            arrival_to = self.validation_service.validate_date(arrival_to)
             
-            # Load payment records
-            payment_records = self.file_handler.load_payment_records(car.identity)
-            credit_balance = self.file_handler.load_credit_balance(car.identity)
-            
-            if not payment_records:
-                raise CarNotFoundException(f"No parking history found for car {car.identity}")
-            
-            # Calculate totals
-            total_payments = sum(record['payment_amount'] for record in payment_records)
-            
-            # Generate history content
-            history_content = f"Total payment: ${total_payments:.2f}\n"
-            history_content += f"Available credits: ${credit_balance:.2f}\n"
-            history_content += "Parked Dates:\n"
-            
-            for record in payment_records:
-                arrival = record['arrival_time']
-                departure = record['departure_time']
-                fee = record['total_fee']
-                history_content += f"{arrival} – {departure} ${fee:.2f}\n"
+            if arrival_from or arrival_to:
+                return self._export_history_range(car, arrival_from, arrival_to)
             
-            # Export to file
-            filename = self.file_handler.export_history_file(car.identity, history_content)
+            with self.storage.lock(car.identity):
+                summary = self._load_history_summary(car.identity)
+                if not summary['visit_count']:
+                    raise CarNotFoundException(f"No parking history found for car {car.identity}")
+                
+                credit_balance = self.storage.load_credit_balance(car.identity)
+                header = self._history_header(summary['total_paid'], credit_balance)
+                
+                # The file keeps the body of the last export up to its saved size, so lines of an
+                # export whose summary was never saved are dropped and written once more.
+                # Without a saved export, or when the file was removed, it is rebuilt from the first payment
+                append = (summary['exported_position'] is not None
+                          and summary.get('exported_bytes') is not None
+                          and self.storage.history_file_exists(car.identity))
+                position = summary['exported_position'] if append else 0
+                kept_bytes = summary['exported_bytes'] if append else None
+                new_records = 0
+                new_bytes = 0
+                
+                def new_lines():
+                    nonlocal position, new_records, new_bytes
+                    for position, record in self.storage.iter_payment_records_since(car.identity, position):
+                        line = self._history_line(record)
+                        new_records += 1
+                        new_bytes += len(line.encode())
+                        yield line
+                
+                filename = self.storage.update_history_file(car.identity, header, new_lines(), kept_bytes)
+                
+                summary['exported_position'] = position
+                summary['exported_bytes'] = (kept_bytes or 0) + new_bytes
+                summary['exported_count'] = (summary['exported_count'] if append else 0) + new_records
+                self.storage.save_history_summary(car.identity, summary)
             
             return {
                 'filename': filename,
-                'content': history_content,
-                'total_payments': total_payments,
+                'total_payments': summary['total_paid'],
                 'available_credits': credit_balance,
-                'records_count': len(payment_records)
+                'records_count': summary['visit_count'],
+                'new_records_count': new_records
             }
         
-        except (InvalidCarIdentityException, CarNotFoundException) as e:
+        except (InvalidCarIdentityException, CarNotFoundException, InvalidDateTimeException) as e:
             raise e
         except Exception as e:
             raise ParkingSystemException(f"Failed to generate history: {e}")
+    
+    def iter_history_lines(self, car_identity_str, arrival_from=None, arrival_to=None, offset=0, limit=None):
+        """
+        Stream formatted history lines for a car, optionally filtered by arrival date
+        (YYYY-MM-DD, inclusive) and paginated with offset/limit.
+        """
+        car = self.validation_service.validate_car_identity(car_identity_str)
+        arrival_from = self.validation_service.validate_date(arrival_from)
+        arrival_to = self.validation_service.validate_date(arrival_to)
+        
+        records = self._iter_history_records(car.identity, arrival_from, arrival_to)
+        stop = offset + limit if limit is not None else None
+        return (self._history_line(record) for record in islice(records, offset, stop))
+    
+    def _export_history_range(self, car, arrival_from, arrival_to):
+        """Stream the visits in an arrival date range to their own export file (two passes, bounded memory)"""
+        total_payments = 0
+        records_count = 0
+        for record in self._iter_history_records(car.identity, arrival_from, arrival_to):
+            total_payments += record['payment_amount']
+            records_count += 1
+        
+        if not records_count:
+            raise CarNotFoundException(f"No parking history found for car {car.identity} in the selected dates")
+        
+        credit_balance = self.storage.load_credit_balance(car.identity)
+        lines = (
+            self._history_line(record)
+            for record in self._iter_history_records(car.identity, arrival_from, arrival_to)
+        )
+        filename = self.storage.update_history_file(
+            car.identity,
+            self._history_header(total_payments, credit_balance),
+            lines,
+            suffix=f"_{arrival_from or 'start'}_{arrival_to or 'end'}"
+        )
+        
+        return {
+            'filename': filename,
+            'total_payments': total_payments,
+            'available_credits': credit_balance,
+            'records_count': records_count,
+            'new_records_count': records_count
+        }
+    
+    def _iter_history_records(self, car_identity, arrival_from, arrival_to):
+        """Payment records whose arrival date falls in [arrival_from, arrival_to]"""
+        for record in self.storage.iter_payment_records(car_identity):
+            arrival_date = record['arrival_time'][:10]
+            if arrival_from and arrival_date < arrival_from:
+                continue
+            if arrival_to and arrival_date > arrival_to:
+                continue
+            yield record
+    
+    def _load_history_summary(self, car_identity):
+        """Running aggregates for a car, rebuilt once from the payment log if missing"""
+        summary = self.storage.load_history_summary(car_identity)
+        if summary is not None:
+            return summary
+        
+        total_paid = 0
+        visit_count = 0
+        for record in self.storage.iter_payment_records(car_identity):
+            total_paid += record['payment_amount']
+            visit_count += 1
+        
+        return {
+            'total_paid': total_paid,
+            'visit_count': visit_count,
+            'exported_count': 0,
+            'exported_position': None,
+            'exported_bytes': None
+        }
+    
+    @staticmethod
+    def _history_header(total_payments, credit_balance):
+        """Totals shown above the visits, rewritten at every export"""
+        return (
+            f"Total payment: ${total_payments:.2f}\n"
+            f"Available credits: ${credit_balance:.2f}\n"
+            "Parked Dates:\n"
+        )
+    
+    @staticmethod
+    def _history_line(record):
+        return f"{record['arrival_time']} – {record['departure_time']} ${record['total_fee']:.2f}\n"
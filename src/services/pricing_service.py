@@ -1,73 +1,184 @@
-from config.pricing_rates import *
-from src.utils.datetime_helper import calculate_duration_by_periods
+from src.utils.datetime_helper import iter_period_segments
+from src.utils.tariff_table import get_tariff_table
+from src.utils.metrics import timed
+from datetime import datetime, timedelta
 import math
 
+# Any Monday 00:00 works as the reference week for the weekly fee total
+REFERENCE_WEEK_START = datetime(2024, 1, 1)
+ONE_DAY = timedelta(days=1)
+ONE_WEEK = timedelta(days=7)
+
+def _midnight(dt):
+    """Start of dt's day (naive datetimes; much cheaper than dt.replace(hour=0, ...))"""
+    return datetime(dt.year, dt.month, dt.day)
+
+
+class LazyCalculationDetails:
+    """
+    Per-period breakdown of a fee (date, day_type, period, hours, fee, flag), built only
+    when a caller iterates it, e.g. for a receipt or a dispute. Every iteration walks the
+    periods again; len() and indexing keep the list.
+    """
+
+    __slots__ = ('arrival_time', 'departure_time', 'has_frequent_parking', 'tariff', '_details')
+
+    def __init__(self, arrival_time, departure_time, has_frequent_parking=False, tariff=None):
+        self.arrival_time = arrival_time
+        self.departure_time = departure_time
+        self.has_frequent_parking = bool(has_frequent_parking)
+        self.tariff = tariff
+        self._details = None
+
+    def __iter__(self):
+        if self._details is not None:
+            return iter(self._details)
+        return PricingService.iter_calculation_details(
+            self.arrival_time, self.departure_time, self.has_frequent_parking, self.tariff
+        )
+
+    def __len__(self):
+        return len(self.to_list())
+
+    def __getitem__(self, index):
+        return self.to_list()[index]
+
+    def to_list(self):
+        if self._details is None:
+            # Not list(self), which would ask __len__ for a length hint
+            self._details = list(iter(self))
+        return self._details
+
+    def __repr__(self):
+        return f"LazyCalculationDetails({self.arrival_time!r}, {self.departure_time!r}, {self.has_frequent_parking!r})"
+
+
 class PricingService:
     @staticmethod
-    def calculate_parking_fee(arrival_time, departure_time, has_frequent_parking=False):
+    @timed('pricing_service')
+    def calculate_parking_fee(arrival_time, departure_time, has_frequent_parking=False, tariff=None):
         """
-        Calculate total parking fee based on arrival and departure times
+        Calculate total parking fee based on arrival and departure times.
+        Returns (total, LazyCalculationDetails); the breakdown costs nothing until iterated.
         """
         if departure_time <= arrival_time:
             raise ValueError("Departure time must be after arrival time")
-        
-        # Get duration breakdown by periods
-        duration_breakdown = calculate_duration_by_periods(arrival_time, departure_time)
-        
-        total_fee = 0.0
-        calculation_details = []
 
+        tariff = tariff or get_tariff_table()
+        total_fee = PricingService._total_fee(arrival_time, departure_time, bool(has_frequent_parking), tariff)
+        return total_fee, LazyCalculationDetails(arrival_time, departure_time, has_frequent_parking, tariff)
+
+    @staticmethod
+    def iter_calculation_details(arrival_time, departure_time, has_frequent_parking=False, tariff=None):
+        """Walk the stay period by period, yielding one breakdown dict per period"""
+        if departure_time <= arrival_time:
+            raise ValueError("Departure time must be after arrival time")
+
+        tariff = tariff or get_tariff_table()
+        has_frequent_parking = bool(has_frequent_parking)
 
         # Process each period in the duration breakdown
-        for date, day_type, period, hours, flag in duration_breakdown:
-            
+        for date, segment, hours, flag in iter_period_segments(arrival_time, departure_time, tariff):
+
             # Round up hours to the nearest hour
             hours = math.ceil(hours)
-            
-            period_fee = PricingService._calculate_period_fee(
-                date, day_type, period, hours, has_frequent_parking, flag
-            )
-            
-            # Append to calculation details
-            calculation_details.append({
+
+            yield {
                 'date': date,
-                'day_type': day_type,
-                'period': period,
+                'day_type': tariff.segment_day_type[segment],
+                'period': tariff.segment_period[segment],
                 'hours': hours,
-                'fee': period_fee,
+                'fee': tariff.period_fee(segment, hours, has_frequent_parking, flag),
                 'flag': flag,
                 'has_frequent_parking': has_frequent_parking
-            })
-            total_fee += period_fee
-        
-        return round(total_fee, 2), calculation_details
-    
+            }
+
     @staticmethod
-    def _calculate_period_fee(date, day_type, period, hours, has_frequent_parking, flag):
-        """Calculate fee for a specific period"""
-        # Get base fee from pricing rates
-        base_fee = PRICING_RATES[day_type][period]
-
-        # Determine if this is an early morning period (flat rate)
-        if period == '00:00-07:59':
-            if has_frequent_parking is True:
-                # Apply frequent parking discount for early morning
-                base_fee *= (1 - FREQUENT_PARKING_DISCOUNTS['night_early'])
-
-            return base_fee
-            
-        # Apply overtime multiplier if needed
-        if flag == 'exceed_time':
-            base_fee *= 2
-            
-        # Apply frequent parking discount if applicable
-        if has_frequent_parking:
-
-            if period == '17:00-23:59':
-                # Apply frequent parking discount for evening period
-                base_fee *= (1 - FREQUENT_PARKING_DISCOUNTS['night_early'])
+    @timed('pricing_service')
+    def calculate_total_fee(arrival_time, departure_time, has_frequent_parking=False, tariff=None):
+        """
+        Calculate total parking fee without the per-period breakdown.
+        Whole weeks are priced from the precomputed weekly fee total, so only
+        the partial head and tail days are walked period by period.
+        """
+        if departure_time <= arrival_time:
+            raise ValueError("Departure time must be after arrival time")
+
+        tariff = tariff or get_tariff_table()
+        return PricingService._total_fee(arrival_time, departure_time, bool(has_frequent_parking), tariff)
+
+    @staticmethod
+    def _total_fee(arrival_time, departure_time, has_frequent_parking, tariff):
+        # Periods never cross midnight, so the stay can be split there
+        arrival_day = _midnight(arrival_time)
+        head_end = arrival_day + ONE_DAY
+        whole_weeks = (departure_time - head_end).days // 7 if departure_time > head_end else 0
+
+        if whole_weeks == 0:
+            return round(PricingService._sum_period_fees(
+                arrival_time, departure_time, has_frequent_parking, tariff, arrival_day
+            ), 2)
+
+        tail_start = head_end + whole_weeks * ONE_WEEK
+        total_fee = PricingService._sum_period_fees(arrival_time, head_end, has_frequent_parking, tariff, arrival_day)
+        total_fee += whole_weeks * PricingService._weekly_fee(has_frequent_parking, tariff)
+        if departure_time > tail_start:
+            total_fee += PricingService._sum_period_fees(
+                tail_start, departure_time, has_frequent_parking, tariff, tail_start
+            )
+
+        return round(total_fee, 2)
+
+    @staticmethod
+    def _weekly_fee(has_frequent_parking, tariff):
+        """Fee for one full Monday-Sunday week, computed once per tariff and member status"""
+        weekly_fees = tariff.weekly_fees
+        if has_frequent_parking not in weekly_fees:
+            weekly_fees[has_frequent_parking] = PricingService._sum_period_fees(
+                REFERENCE_WEEK_START, REFERENCE_WEEK_START + ONE_WEEK, has_frequent_parking, tariff
+            )
+        return weekly_fees[has_frequent_parking]
+
+    @staticmethod
+    def _sum_period_fees(start_time, end_time, has_frequent_parking, tariff, day_start=None):
+        """
+        Walk the periods between two times and sum their fees (unrounded).
+        Same walk as iter_period_segments and the same additions as period_fee,
+        inlined because totals need no dates or breakdown. day_start is start_time's midnight.
+        """
+        total_fee = 0.0
+        current_time = start_time
+        if day_start is None:
+            day_start = _midnight(start_time)
+        segment = tariff.segment_at(start_time)
+        segment_count = len(tariff.segment_period)
+        segment_end_delta = tariff.segment_end_delta
+        segment_limit = tariff.segment_limit
+        segment_flat = tariff.segment_flat
+        normal_rates = tariff.normal_rates[has_frequent_parking]
+        exceed_rates = tariff.exceed_rates[has_frequent_parking]
+
+        while current_time < end_time:
+            period_end = day_start + segment_end_delta[segment]
+            actual_period_end = period_end if period_end < end_time else end_time
+            hours = (actual_period_end - current_time).total_seconds() / 3600
+            time_limit = segment_limit[segment]
+            rate = normal_rates[segment]
+
+            if time_limit and hours > time_limit:
+                if segment_flat[segment]:
+                    total_fee += rate
+                    total_fee += rate
+                else:
+                    total_fee += rate * math.ceil(time_limit)
+                    total_fee += exceed_rates[segment] * math.ceil(hours - time_limit)
+            elif segment_flat[segment]:
+                total_fee += rate
             else:
-                base_fee *= (1 - FREQUENT_PARKING_DISCOUNTS['other'])
-            
-        # Multiply by hours (for non-flat rate periods)
-        return base_fee * hours
+                total_fee += rate * math.ceil(hours)
+
+            current_time = actual_period_end
+            if period_end - day_start == ONE_DAY:
+                day_start = period_end
+            segment = (segment + 1) % segment_count
+        return total_fee
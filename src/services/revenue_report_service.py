@@ -0,0 +1,208 @@
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from config.settings import PAYMENTS_DIR, CREDITS_DIR, REPORT_WORKERS
+from src.services.pricing_service import PricingService
+from src.utils.datetime_helper import parse_datetime, iter_period_segments
+from src.utils.tariff_table import get_tariff_table
+
+# Each worker gets several shards so a few large payment logs do not leave cores idle
+SHARDS_PER_WORKER = 4
+
+
+def _empty_report():
+    return {
+        'daily': {},
+        'weekly': {},
+        'monthly': {},
+        'by_day_type': {},
+        'by_period': {},
+        'total_revenue': 0.0,
+        'total_payments': 0.0,
+        'total_visits': 0,
+        'credit_liability': 0.0,
+        'cars_with_credit': 0,
+        'cars': 0
+    }
+
+
+def _add_bucket(buckets, key, revenue, visits=1):
+    bucket = buckets.get(key)
+    if bucket is None:
+        buckets[key] = {'revenue': revenue, 'visits': visits}
+    else:
+        bucket['revenue'] += revenue
+        bucket['visits'] += visits
+
+
+def list_payment_files(payments_dir):
+    """One payment log per car, preferring the JSON Lines file over a legacy JSON array"""
+    files = {}
+    for path in Path(payments_dir).glob("*_payments.json"):
+        files[path.stem] = str(path)
+    for path in Path(payments_dir).glob("*_payments.jsonl"):
+        files[path.stem] = str(path)
+    return [files[stem] for stem in sorted(files)]
+
+
+def iter_payment_file(path):
+    """Payment records of one car, JSON Lines or a legacy JSON array"""
+    path = Path(path)
+    with open(path, 'r') as f:
+        if path.suffix == '.json':
+            yield from json.load(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def is_frequent_parking(record, tariff):
+    """Member status of a payment, inferred from the fee for records written before it was stored"""
+    has_frequent_parking = record.get('has_frequent_parking')
+    if has_frequent_parking is not None:
+        return bool(has_frequent_parking)
+    arrival_time = parse_datetime(record['arrival_time'])
+    departure_time = parse_datetime(record['departure_time'])
+    regular_fee = PricingService.calculate_total_fee(arrival_time, departure_time, False, tariff)
+    return abs(regular_fee - record['total_fee']) >= 0.005
+
+
+def _add_breakdown(segment_revenue, record, tariff):
+    """
+    Split one visit's fee over the tariff segments it covers. The split is priced with the
+    current tariff and scaled to the fee actually charged, so it always sums to revenue.
+    """
+    arrival_time = parse_datetime(record['arrival_time'])
+    departure_time = parse_datetime(record['departure_time'])
+    has_frequent_parking = is_frequent_parking(record, tariff)
+
+    fees = [
+        (segment, tariff.period_fee(segment, math.ceil(hours), has_frequent_parking, flag))
+        for _, segment, hours, flag in iter_period_segments(arrival_time, departure_time, tariff)
+    ]
+    priced = sum(fee for _, fee in fees)
+    if not priced:
+        return
+    scale = record['total_fee'] / priced
+    for segment, fee in fees:
+        segment_revenue[segment] += fee * scale
+
+
+def aggregate_shard(payment_files, credit_files):
+    """
+    Map step, run in a worker process: aggregate the payment logs and credit files of one shard.
+    Returns a partial report of plain dicts that merge_reports can combine.
+    """
+    tariff = get_tariff_table()
+    report = _empty_report()
+    week_keys = {}
+    # Breakdown is summed per tariff segment and folded into day types and periods at the end
+    segment_revenue = [0.0] * len(tariff.segment_period)
+
+    for path in payment_files:
+        report['cars'] += 1
+        for record in iter_payment_file(path):
+            revenue = record['total_fee']
+            day_key = record['departure_time'][:10]
+            week_key = week_keys.get(day_key)
+            if week_key is None:
+                year, week, _ = date.fromisoformat(day_key).isocalendar()
+                week_key = week_keys[day_key] = f"{year}-W{week:02d}"
+
+            _add_bucket(report['daily'], day_key, revenue)
+            _add_bucket(report['weekly'], week_key, revenue)
+            _add_bucket(report['monthly'], day_key[:7], revenue)
+            _add_breakdown(segment_revenue, record, tariff)
+            report['total_revenue'] += revenue
+            report['total_payments'] += record['payment_amount']
+            report['total_visits'] += 1
+
+    for segment, revenue in enumerate(segment_revenue):
+        if revenue:
+            day_type = tariff.segment_day_type[segment]
+            period = tariff.segment_period[segment]
+            report['by_day_type'][day_type] = report['by_day_type'].get(day_type, 0.0) + revenue
+            report['by_period'][period] = report['by_period'].get(period, 0.0) + revenue
+
+    for path in credit_files:
+        with open(path, 'r') as f:
+            credit_balance = json.load(f).get('credit_balance', 0.0)
+        if credit_balance > 0:
+            report['credit_liability'] += credit_balance
+            report['cars_with_credit'] += 1
+
+    return report
+
+
+def merge_reports(reports):
+    """Reduce step: combine partial reports into one"""
+    merged = _empty_report()
+    for report in reports:
+        for granularity in ('daily', 'weekly', 'monthly'):
+            for key, bucket in report[granularity].items():
+                _add_bucket(merged[granularity], key, bucket['revenue'], bucket['visits'])
+        for breakdown in ('by_day_type', 'by_period'):
+            for key, revenue in report[breakdown].items():
+                merged[breakdown][key] = merged[breakdown].get(key, 0.0) + revenue
+        for total in ('total_revenue', 'total_payments', 'total_visits',
+                      'credit_liability', 'cars_with_credit', 'cars'):
+            merged[total] += report[total]
+    return merged
+
+
+def _round_report(report):
+    """Sort buckets by key and round money to cents"""
+    for granularity in ('daily', 'weekly', 'monthly'):
+        report[granularity] = {
+            key: {'revenue': round(bucket['revenue'], 2), 'visits': bucket['visits']}
+            for key, bucket in sorted(report[granularity].items())
+        }
+    for breakdown in ('by_day_type', 'by_period'):
+        report[breakdown] = {key: round(value, 2) for key, value in sorted(report[breakdown].items())}
+    for total in ('total_revenue', 'total_payments', 'credit_liability'):
+        report[total] = round(report[total], 2)
+    return report
+
+
+class RevenueReportService:
+    """
+    Fleet-wide revenue report over the file backend's payment logs.
+    The payments and credits directories are split into shards that are aggregated
+    in a process pool and merged at the end.
+    """
+
+    def __init__(self, payments_dir=PAYMENTS_DIR, credits_dir=CREDITS_DIR, max_workers=REPORT_WORKERS):
+        self.payments_dir = Path(payments_dir)
+        self.credits_dir = Path(credits_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+
+    def generate_report(self):
+        """
+        Build the report: revenue and visits per day, ISO week and month (by departure date),
+        revenue by day type and pricing period, and outstanding customer credits.
+        """
+        start = time.perf_counter()
+        payment_files = list_payment_files(self.payments_dir)
+        credit_files = sorted(str(path) for path in self.credits_dir.glob("*_credits.json"))
+
+        shard_count = max(1, min(self.max_workers * SHARDS_PER_WORKER, len(payment_files) + len(credit_files)))
+        shards = [
+            (payment_files[i::shard_count], credit_files[i::shard_count])
+            for i in range(shard_count)
+        ]
+
+        if self.max_workers == 1:
+            partials = [aggregate_shard(*shard) for shard in shards]
+        else:
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                partials = list(executor.map(aggregate_shard, *zip(*shards)))
+
+        report = _round_report(merge_reports(partials))
+        report['elapsed_seconds'] = time.perf_counter() - start
+        return report
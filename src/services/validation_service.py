@@ -1,8 +1,70 @@
-from src.models.car import Car
+from datetime import datetime
+
+import numpy as np
+
+from src.models.car import Car, CAR_IDENTITY_REGEX
 from src.utils.frequent_parking_validator import validate_frequent_parking_number
 from src.utils.datetime_helper import parse_datetime
 from src.exceptions.parking_exceptions import *
 
+# Reasons reported by batch validation
+REASON_EMPTY = 'empty'
+REASON_FORMAT = 'invalid format'
+REASON_CHECK_DIGIT = 'invalid check digit'
+
+# Weights of the first 4 digits in the modulo 11 check digit
+CHECK_DIGIT_WEIGHTS = np.array([5, 4, 3, 2])
+
+
+class BatchValidationResult:
+    """
+    Per-item outcome of a batch validation: the values checked, a boolean mask
+    and a reason (None when valid) for every item.
+    """
+
+    __slots__ = ('values', 'valid', 'reasons')
+
+    def __init__(self, values, valid, reasons):
+        self.values = values
+        self.valid = valid
+        self.reasons = reasons
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def valid_count(self):
+        return int(self.valid.sum())
+
+    @property
+    def invalid_count(self):
+        return len(self.values) - self.valid_count
+
+    def iter_invalid(self):
+        """(index, value, reason) for every invalid item"""
+        for index in np.flatnonzero(~self.valid):
+            yield int(index), self.values[index], self.reasons[index]
+
+
+def _as_text_array(values):
+    """Values as a NumPy unicode array, None becoming ''"""
+    if isinstance(values, np.ndarray) and values.dtype.kind == 'U':
+        return values
+    return np.array(['' if value is None else str(value) for value in values], dtype=str)
+
+
+def _char_codes(texts, width):
+    """(n, width) array of code points, or None when every text is shorter than width"""
+    itemsize = texts.dtype.itemsize // 4
+    if len(texts) == 0 or itemsize < width:
+        return None
+    return texts.view(np.uint32).reshape(len(texts), itemsize)
+
+
+def _is_digit(codes):
+    return (codes >= ord('0')) & (codes <= ord('9'))
+
+
 class ValidationService:
     @staticmethod
     def validate_car_identity(identity):
@@ -27,6 +89,80 @@ class ValidationService:
         
         return number_str
     
+    @staticmethod
+    def validate_car_identities(identities):
+        """
+        Validate many car identities at once. Well-formed plates are checked with array
+        operations; anything else gets the same regex check Car uses.
+        """
+        texts = _as_text_array(identities)
+        valid = np.zeros(len(texts), dtype=bool)
+        codes = _char_codes(texts, 9)
+        if codes is not None:
+            letter = codes[:, 2]
+            valid = (
+                (np.char.str_len(texts) == 9)
+                & np.all(_is_digit(codes[:, [0, 1, 4, 5, 6, 7, 8]]), axis=1)
+                & (letter >= ord('A')) & (letter <= ord('Z'))
+                & (codes[:, 3] == ord('-'))
+            )
+
+        reasons = np.full(len(texts), None, dtype=object)
+        for index in np.flatnonzero(~valid):
+            identity = texts[index]
+            if not identity:
+                reasons[index] = REASON_EMPTY
+            elif CAR_IDENTITY_REGEX.match(identity):
+                valid[index] = True
+            else:
+                reasons[index] = REASON_FORMAT
+        return BatchValidationResult(texts, valid, reasons)
+    
+    @staticmethod
+    def validate_frequent_parking_numbers(numbers):
+        """
+        Validate many frequent parking numbers at once, computing the modulo 11 check
+        digits with array arithmetic. Accepts strings or an integer array of 5-digit numbers.
+        """
+        if isinstance(numbers, np.ndarray) and numbers.dtype.kind in 'iu':
+            in_range = (numbers >= 0) & (numbers <= 99999)
+            digits = (np.where(in_range, numbers, 0)[:, None] // np.array([10000, 1000, 100, 10, 1])) % 10
+            texts = numbers
+            well_formed = in_range
+        else:
+            texts = _as_text_array(numbers)
+            codes = _char_codes(texts, 5)
+            if codes is None:
+                digits = np.zeros((len(texts), 5), dtype=np.int64)
+                well_formed = np.zeros(len(texts), dtype=bool)
+            else:
+                codes = codes[:, :5]
+                well_formed = (np.char.str_len(texts) == 5) & np.all(_is_digit(codes), axis=1)
+                digits = codes.astype(np.int64) - ord('0')
+
+        check_digit = (digits[:, :4] @ CHECK_DIGIT_WEIGHTS) % 11
+        check_digit[check_digit == 10] = 0
+        valid = well_formed & (check_digit == digits[:, 4])
+
+        reasons = np.full(len(texts), None, dtype=object)
+        reasons[well_formed & ~valid] = REASON_CHECK_DIGIT
+        if texts.dtype.kind in 'iu':
+            reasons[~well_formed] = REASON_FORMAT
+            return BatchValidationResult(texts, valid, reasons)
+
+        for index in np.flatnonzero(~well_formed):
+            number = texts[index].strip()
+            if not number:
+                reasons[index] = REASON_EMPTY
+            elif validate_frequent_parking_number(number):
+                # Surrounding whitespace, accepted like validate_frequent_parking_number does
+                valid[index] = True
+            elif len(number) == 5 and number.isdigit():
+                reasons[index] = REASON_CHECK_DIGIT
+            else:
+                reasons[index] = REASON_FORMAT
+        return BatchValidationResult(texts, valid, reasons)
+    
     @staticmethod
     def validate_datetime(datetime_str):
         """Validate datetime string"""
@@ -35,6 +171,20 @@ class ValidationService:
         except InvalidDateTimeException:
             raise
     
+    @staticmethod
+    def validate_date(date_str):
+        """Validate optional YYYY-MM-DD date string, returns None when empty"""
+        if not date_str or date_str.strip() == '':
+            return None
+        
+        date_str = date_str.strip()
+        try:
+            datetime.strptime(date_str, '%Y-%m-%d')
+        except ValueError:
+            raise InvalidDateTimeException(f"Invalid date format: {date_str}. Expected format: YYYY-MM-DD")
+        
+        return date_str
+    
     @staticmethod
     def validate_payment_amount(amount_str, required_amount):
         """Validate payment amount"""
@@ -1,19 +1,141 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+import numpy as np
 
 from config.settings import DATE_FORMAT
 from src.exceptions.parking_exceptions import InvalidDateTimeException
+from src.utils.tariff_table import get_tariff_table, MINUTES_PER_DAY
+
+# Naive epoch used for integer minute timestamps
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.toordinal()
+ONE_DAY = timedelta(days=1)
+
+# Distinct timestamps remembered by the parsers
+PARSE_CACHE_SIZE = 65536
+
+# The sliced fast path only knows the default layout
+FIXED_LAYOUT = DATE_FORMAT == "%Y-%m-%d %H:%M"
+
+# Character positions in YYYY-MM-DD HH:MM
+DIGIT_POSITIONS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15]
+SEPARATORS = {4: '-', 7: '-', 10: ' ', 13: ':'}
+DAYS_IN_MONTH = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
 
 def parse_datetime(datetime_str):
     """Parse datetime string to datetime object"""
+    if FIXED_LAYOUT and type(datetime_str) is str and len(datetime_str) == 16:
+        return _parse_fixed(datetime_str)
+    return _parse_strptime(datetime_str)
+
+def parse_epoch_minutes(datetime_str):
+    """Parse datetime string straight to minutes since the epoch"""
+    if FIXED_LAYOUT and type(datetime_str) is str and len(datetime_str) == 16:
+        return _parse_fixed_minutes(datetime_str)
+    return to_epoch_minutes(_parse_strptime(datetime_str))
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_fixed(datetime_str):
+    """
+    Slice the fixed YYYY-MM-DD HH:MM layout directly. Anything that does not
+    match it exactly goes through strptime, so the accepted inputs and the
+    errors stay the same.
+    """
+    if (datetime_str[4] == '-' and datetime_str[7] == '-' and datetime_str[10] == ' '
+            and datetime_str[13] == ':' and datetime_str.isascii()):
+        year, month, day = datetime_str[0:4], datetime_str[5:7], datetime_str[8:10]
+        hour, minute = datetime_str[11:13], datetime_str[14:16]
+        if (year.isdigit() and month.isdigit() and day.isdigit()
+                and hour.isdigit() and minute.isdigit()):
+            try:
+                return datetime(int(year), int(month), int(day), int(hour), int(minute))
+            except ValueError:
+                raise InvalidDateTimeException(
+                    f"Invalid datetime format: {datetime_str}. Expected format: YYYY-MM-DD HH:MM"
+                )
+    return _parse_strptime(datetime_str)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_fixed_minutes(datetime_str):
+    return to_epoch_minutes(_parse_fixed(datetime_str))
+
+def _parse_strptime(datetime_str):
     try:
         return datetime.strptime(datetime_str, DATE_FORMAT)
     except ValueError:
         raise InvalidDateTimeException(f"Invalid datetime format: {datetime_str}. Expected format: YYYY-MM-DD HH:MM")
 
+def parse_epoch_minutes_column(datetime_strings):
+    """
+    Parse a column of YYYY-MM-DD HH:MM strings into an int64 array of epoch minutes.
+    Well-formed rows are decoded together; any other row goes through parse_epoch_minutes,
+    which accepts what strptime accepts and raises InvalidDateTimeException otherwise.
+    """
+    strings = list(datetime_strings)
+    result = np.zeros(len(strings), dtype=np.int64)
+    if not strings:
+        return result
+
+    chars = np.array(strings, dtype=str)
+    width = chars.dtype.itemsize // 4
+    if FIXED_LAYOUT and width >= 16:
+        codes = chars.view(np.uint32).reshape(len(strings), width)
+        ok = np.char.str_len(chars) == 16
+        for position, separator in SEPARATORS.items():
+            ok &= codes[:, position] == ord(separator)
+
+        digits = codes[:, DIGIT_POSITIONS].astype(np.int64) - ord('0')
+        ok &= np.all((digits >= 0) & (digits <= 9), axis=1)
+
+        year = digits[:, 0] * 1000 + digits[:, 1] * 100 + digits[:, 2] * 10 + digits[:, 3]
+        month = digits[:, 4] * 10 + digits[:, 5]
+        day = digits[:, 6] * 10 + digits[:, 7]
+        hour = digits[:, 8] * 10 + digits[:, 9]
+        minute = digits[:, 10] * 10 + digits[:, 11]
+
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_ok = (month >= 1) & (month <= 12)
+        month_days = DAYS_IN_MONTH[np.where(month_ok, month, 0)] + (leap & (month == 2))
+        ok &= (year >= 1) & month_ok & (day >= 1) & (day <= month_days) & (hour < 24) & (minute < 60)
+
+        # Days since 1970-01-01 from the civil date (March-based year)
+        shifted_year = year - (month <= 2)
+        era = shifted_year // 400
+        year_of_era = shifted_year - era * 400
+        day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+        day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+        days = era * 146097 + day_of_era - 719468
+
+        result[:] = np.where(ok, days * MINUTES_PER_DAY + hour * 60 + minute, 0)
+        fallback = np.flatnonzero(~ok)
+    else:
+        fallback = range(len(strings))
+
+    for index in fallback:
+        result[index] = parse_epoch_minutes(strings[index])
+    return result
+
 def format_datetime(dt):
     """Format datetime object to string"""
     return dt.strftime(DATE_FORMAT)
 
+def to_epoch_minutes(dt):
+    """Convert datetime object to whole minutes since the epoch"""
+    return (dt - EPOCH) // timedelta(minutes=1)
+
+def from_epoch_minutes(minutes):
+    """Convert minutes since the epoch to datetime object"""
+    return EPOCH + timedelta(minutes=minutes)
+
+def format_epoch_minutes(minutes):
+    """Format minutes since the epoch as YYYY-MM-DD HH:MM without building a datetime"""
+    days, minute_of_day = divmod(minutes, 24 * 60)
+    day = date.fromordinal(EPOCH_ORDINAL + days)
+    hour, minute = divmod(minute_of_day, 60)
+    return f"{day.year:04d}-{day.month:02d}-{day.day:02d} {hour:02d}:{minute:02d}"
+
 import calendar
 
 def get_day_type(dt):
@@ -35,69 +157,48 @@ def get_time_period(dt):
         return '17:00-23:59'
     
     
-def calculate_duration_by_periods(start_dt, end_dt):
+def calculate_duration_by_periods(start_dt, end_dt, tariff=None):
     """
     Calculate parking duration broken down by time periods and days
-    Returns list of (date, day_type, period, hours) tuples
+    Returns list of (date, day_type, period, hours, flag) tuples
+    """
+    tariff = tariff or get_tariff_table()
+    return [
+        (date, tariff.segment_day_type[segment], tariff.segment_period[segment], hours, flag)
+        for date, segment, hours, flag in iter_period_segments(start_dt, end_dt, tariff)
+    ]
+
+def iter_period_segments(start_dt, end_dt, tariff):
+    """
+    Walk the stay one pricing period at a time using the compiled tariff
+    Yields (date, segment, hours, flag) tuples
     """
-    duration_breakdown = []
     current_dt = start_dt
-    
-    # Define period boundaries
-    period_boundaries = {
-        '00:00-07:59': lambda dt: dt.replace(hour=8, minute=0, second=0, microsecond=0),
-        '08:00-16:59': lambda dt: dt.replace(hour=17, minute=0, second=0, microsecond=0),
-        '17:00-23:59': lambda dt: (dt.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1))
-    }
-    
-    # Define time limits for different day types and periods
-    time_limits = {
-        ('weekday', '08:00-16:59'): 2,
-        ('saturday', '08:00-16:59'): 4,
-        ('sunday', '08:00-16:59'): 8
-    }
+    current_date = start_dt.date()
+    day_start = datetime(start_dt.year, start_dt.month, start_dt.day)
+    segment = tariff.segment_at(start_dt)
+    segment_count = len(tariff.segment_period)
     
     while current_dt < end_dt:
-        current_date = current_dt.date()
-        day_type = get_day_type(current_dt)
-        current_period = get_time_period(current_dt)
-        
         # Calculate end of current period
-        period_end = period_boundaries[current_period](current_dt)
+        period_end = day_start + tariff.segment_end_delta[segment]
         actual_period_end = min(period_end, end_dt)
         
         hours_in_period = (actual_period_end - current_dt).total_seconds() / 3600
         
         # Check if this is a period with a time limit
-        time_limit = time_limits.get((day_type, current_period))
+        time_limit = tariff.segment_limit[segment]
         
         if time_limit and hours_in_period > time_limit:
-            # Add entry for the limited hours
-            duration_breakdown.append((
-                current_date,
-                day_type,
-                current_period,
-                time_limit,
-                "normal"
-            ))
-            # Add entry for excess hours
-            duration_breakdown.append((
-                current_date,
-                day_type,
-                current_period,
-                hours_in_period - time_limit,
-                "exceed_time"
-            ))
+            # Limited hours at the normal rate, excess hours at the overtime rate
+            yield current_date, segment, time_limit, "normal"
+            yield current_date, segment, hours_in_period - time_limit, "exceed_time"
         else:
-            # Normal entry
-            duration_breakdown.append((
-                current_date,
-                day_type,
-                current_period,
-                hours_in_period,
-                "normal"
-            ))
+            yield current_date, segment, hours_in_period, "normal"
 
+        # Segments are laid out in time order, so the next one follows directly
         current_dt = actual_period_end
-    
-    return duration_breakdown
+        if period_end - day_start == ONE_DAY:
+            day_start = period_end
+            current_date = period_end.date()
+        segment = (segment + 1) % segment_count
@@ -1,111 +1,394 @@
 import json
 import os
+import uuid
+import weakref
 from pathlib import Path
 from config.settings import *
-from exceptions.parking_exceptions import FileOperationException
+from src.exceptions.parking_exceptions import FileOperationException
+from src.utils.file_locking import PlateLockManager, atomic_write_json
+from src.utils.history_files import HistoryFileMixin
+from src.utils.metrics import timed
+from src.utils.pickup_journal import PickupJournal
+from src.utils.record_cache import RecordCache
 
-class FileHandler:
-    @staticmethod
-    def save_parking_record(car_identity, record_data):
+class FileHandler(HistoryFileMixin):
+    def __init__(self, data_dir=None, cache_size=STORAGE_CACHE_SIZE, check_mtime=STORAGE_CACHE_CHECK_MTIME,
+                 shared=STORAGE_SHARED):
+        """
+        Store files under data_dir, defaults to the configured data directories.
+        Parking records and credit balances are cached (cache_size plates each, 0 disables);
+        check_mtime confirms every cache hit against the file so other processes' writes are seen.
+        shared tells callers whether other processes write to the same directory.
+        """
+        self.shared = shared
+        if data_dir is None:
+            self.parking_records_dir = PARKING_RECORDS_DIR
+            self.payments_dir = PAYMENTS_DIR
+            self.credits_dir = CREDITS_DIR
+            self.history_dir = HISTORY_DIR
+            self.locks_dir = LOCKS_DIR
+            self.summaries_dir = SUMMARIES_DIR
+            self.journal_dir = JOURNAL_DIR
+        else:
+            data_dir = Path(data_dir)
+            self.parking_records_dir = data_dir / "parking_records"
+            self.payments_dir = data_dir / "payments"
+            self.credits_dir = data_dir / "credits"
+            self.history_dir = data_dir / "history"
+            self.locks_dir = data_dir / "locks"
+            self.summaries_dir = data_dir / "summaries"
+            self.journal_dir = data_dir / "journal"
+            for directory in [self.parking_records_dir, self.payments_dir, self.credits_dir,
+                              self.history_dir, self.summaries_dir]:
+                directory.mkdir(parents=True, exist_ok=True)
+        self.plate_locks = PlateLockManager(self.locks_dir)
+        self.record_cache = RecordCache(cache_size, check_mtime)
+        self.credit_cache = RecordCache(cache_size, check_mtime)
+
+        # Pickups of this process whose files could not all be written: plate -> journal entry
+        self._failed_pickups = {}
+
+        # Finish pickups that crashed processes journaled but did not fully apply
+        self.journal = PickupJournal(self.journal_dir)
+        self.journal.recover(self._replay_pickup)
+        # Closes the segment when the handler is collected or at exit, whichever comes first
+        self._close_journal = weakref.finalize(self, self.journal.close)
+
+    def close(self):
+        """Close the pickup journal, removing its segment when every pickup in it is applied"""
+        self._close_journal()
+
+    def lock(self, car_identity):
+        """Exclusive per-plate lock shared with other gate processes"""
+        return self.plate_locks.lock(car_identity)
+
+    @timed('file_handler')
+    def save_parking_record(self, car_identity, record_data):
         """Save parking record to file"""
         try:
-            filename = PARKING_RECORDS_DIR / f"{car_identity.replace('-', '_')}.json"
-            with open(filename, 'w') as f:
-                json.dump(record_data, f, indent=2)
+            filename = self._record_file(car_identity)
+            with self.lock(car_identity):
+                atomic_write_json(filename, record_data)
+                self.record_cache.invalidate(car_identity)
         except Exception as e:
             raise FileOperationException(f"Failed to save parking record: {e}")
-    
-    @staticmethod
-    def load_parking_record(car_identity):
+
+    @timed('file_handler')
+    def load_parking_record(self, car_identity):
         """Load parking record from file"""
+        if car_identity in self._failed_pickups:
+            self._finish_failed_pickup(car_identity)
         try:
-            filename = PARKING_RECORDS_DIR / f"{car_identity.replace('-', '_')}.json"
-            if not filename.exists():
-                return None
-            
-            with open(filename, 'r') as f:
-                return json.load(f)
+            filename = self._record_file(car_identity)
+            record_data = self.record_cache.get(car_identity, filename, lambda: _load_json(filename))
+            # Callers may modify the dict they get, the cached one must stay as stored
+            return dict(record_data) if record_data is not None else None
         except Exception as e:
             raise FileOperationException(f"Failed to load parking record: {e}")
-    
-    @staticmethod
-    def delete_parking_record(car_identity):
+
+    def _record_file(self, car_identity):
+        return self.parking_records_dir / f"{car_identity.replace('-', '_')}.json"
+
+    @timed('file_handler')
+    def delete_parking_record(self, car_identity):
         """Delete parking record file"""
         try:
-            filename = PARKING_RECORDS_DIR / f"{car_identity.replace('-', '_')}.json"
-            if filename.exists():
-                filename.unlink()
+            filename = self._record_file(car_identity)
+            with self.lock(car_identity):
+                if filename.exists():
+                    filename.unlink()
+                self.record_cache.invalidate(car_identity)
         except Exception as e:
             raise FileOperationException(f"Failed to delete parking record: {e}")
-    
-    @staticmethod
-    def save_payment_record(car_identity, payment_data):
-        """Save payment record"""
+
+    def iter_car_identities(self):
+        """Plates with a parking record, payments or credits on disk, sorted"""
+        stems = {path.stem for path in self.parking_records_dir.glob("*.json")}
+        stems.update(path.stem[:-len("_payments")] for path in self.payments_dir.glob("*_payments.json*"))
+        stems.update(path.stem[:-len("_credits")] for path in self.credits_dir.glob("*_credits.json"))
+        return iter(sorted(stem.replace('_', '-') for stem in stems))
+
+    @timed('file_handler')
+    def iter_parking_records(self):
+        """Stream all active parking records"""
         try:
-            filename = PAYMENTS_DIR / f"{car_identity.replace('-', '_')}_payments.json"
-            
-            # Load existing payments or create new list
-            payments = []
-            if filename.exists():
-                with open(filename, 'r') as f:
-                    payments = json.load(f)
-            
-            payments.append(payment_data)
-            
-            with open(filename, 'w') as f:
-                json.dump(payments, f, indent=2)
+            for filename in sorted(self.parking_records_dir.glob("*.json")):
+                # Another gate process may pick the car up between the glob and the read
+                record_data = _load_json(filename)
+                if record_data is not None:
+                    yield record_data
+        except Exception as e:
+            raise FileOperationException(f"Failed to load parking records: {e}")
+
+    @timed('file_handler')
+    def save_payment_record(self, car_identity, payment_data):
+        """Append payment record as one JSON line"""
+        try:
+            with self.lock(car_identity):
+                self._append_payments(car_identity, [payment_data])
         except Exception as e:
             raise FileOperationException(f"Failed to save payment record: {e}")
-    
-    @staticmethod
-    def load_payment_records(car_identity):
+
+    @timed('file_handler')
+    def save_payment_records(self, car_identity, payments):
+        """Append several payment records with one write and one fsync"""
+        try:
+            with self.lock(car_identity):
+                self._append_payments(car_identity, payments)
+        except Exception as e:
+            raise FileOperationException(f"Failed to save payment records: {e}")
+
+    def _append_payments(self, car_identity, payments, fsync=True):
+        """One write on an O_APPEND descriptor, synced before the caller releases the lock"""
+        data = ''.join(json.dumps(payment_data) + '\n' for payment_data in payments).encode()
+        fd = os.open(self._payments_file(car_identity), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+            if fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _payment_txids(self, car_identity):
+        """Transaction ids in the payment log, oldest first (legacy records have none)"""
+        filename = self._payments_file(car_identity)
+        if not filename.exists():
+            return []
+        with open(filename, 'rb') as f:
+            return [
+                json.loads(line).get('txid') for line in f
+                if line.endswith(b'\n') and line.strip()
+            ]
+
+    @timed('file_handler')
+    def load_payment_records(self, car_identity):
         """Load all payment records for a car"""
+        return list(self.iter_payment_records(car_identity))
+
+    @timed('file_handler')
+    def iter_payment_records(self, car_identity):
+        """Stream payment records for a car one line at a time"""
         try:
-            filename = PAYMENTS_DIR / f"{car_identity.replace('-', '_')}_payments.json"
+            filename = self._payments_file(car_identity)
             if not filename.exists():
-                return []
-            
+                return
+
             with open(filename, 'r') as f:
-                return json.load(f)
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
         except Exception as e:
             raise FileOperationException(f"Failed to load payment records: {e}")
-    
-    @staticmethod
-    def save_credit_balance(car_identity, credit_amount):
-        """Save customer credit balance"""
+
+    @timed('file_handler')
+    def iter_payment_records_since(self, car_identity, position=0):
+        """
+        Stream payment records written after position (a byte offset into the log).
+        Yields (next_position, record) pairs.
+        """
         try:
-            filename = CREDITS_DIR / f"{car_identity.replace('-', '_')}_credits.json"
+            filename = self._payments_file(car_identity)
+            if not filename.exists():
+                return
+
+            with open(filename, 'rb') as f:
+                f.seek(position)
+                for line in iter(f.readline, b''):
+                    if not line.endswith(b'\n'):
+                        # Partially written line, picked up on the next call
+                        break
+                    position += len(line)
+                    if line.strip():
+                        yield position, json.loads(line)
+        except Exception as e:
+            raise FileOperationException(f"Failed to load payment records: {e}")
+
+    def _payments_file(self, car_identity):
+        """Path of the JSON Lines payment log, migrating a legacy JSON array file first"""
+        filename = self.payments_dir / f"{car_identity.replace('-', '_')}_payments.jsonl"
+        legacy_filename = self.payments_dir / f"{car_identity.replace('-', '_')}_payments.json"
+
+        if legacy_filename.exists() and not filename.exists():
+            with self.lock(car_identity):
+                if legacy_filename.exists() and not filename.exists():
+                    with open(legacy_filename, 'r') as f:
+                        payments = json.load(f)
+
+                    temp_filename = filename.with_suffix('.jsonl.tmp')
+                    with open(temp_filename, 'w') as f:
+                        for payment_data in payments:
+                            f.write(json.dumps(payment_data) + '\n')
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                    temp_filename.replace(filename)
+                    legacy_filename.unlink()
+
+        return filename
+
+    @timed('file_handler')
+    def save_credit_balance(self, car_identity, credit_amount, txid=None, fsync=True):
+        """Save customer credit balance, txid names the pickup that produced it"""
+        try:
+            filename = self._credits_file(car_identity)
             credit_data = {
                 'car_identity': car_identity,
                 'credit_balance': credit_amount
             }
-            
-            with open(filename, 'w') as f:
-                json.dump(credit_data, f, indent=2)
+            if txid is not None:
+                credit_data['txid'] = txid
+
+            with self.lock(car_identity):
+                atomic_write_json(filename, credit_data, fsync)
+                self.credit_cache.invalidate(car_identity)
         except Exception as e:
             raise FileOperationException(f"Failed to save credit balance: {e}")
-    
+
     @staticmethod
-    def load_credit_balance(car_identity):
+    def _read_credit_balance(filename):
+        credit_data = _load_json(filename)
+        return credit_data.get('credit_balance', 0.0) if credit_data is not None else 0.0
+
+    def _credits_file(self, car_identity):
+        return self.credits_dir / f"{car_identity.replace('-', '_')}_credits.json"
+
+    def _credit_txid(self, car_identity):
+        filename = self._credits_file(car_identity)
+        if not filename.exists():
+            return None
+        with open(filename, 'r') as f:
+            return json.load(f).get('txid')
+
+    @timed('file_handler')
+    def load_credit_balance(self, car_identity):
         """Load customer credit balance"""
+        if car_identity in self._failed_pickups:
+            self._finish_failed_pickup(car_identity)
+        try:
+            filename = self._credits_file(car_identity)
+            return self.credit_cache.get(car_identity, filename, lambda: self._read_credit_balance(filename))
+        except Exception as e:
+            raise FileOperationException(f"Failed to load credit balance: {e}")
+
+    @timed('file_handler')
+    def load_history_summary(self, car_identity):
+        """Load the running history aggregates for a car, None if there are none yet"""
         try:
-            filename = CREDITS_DIR / f"{car_identity.replace('-', '_')}_credits.json"
+            filename = self.summaries_dir / f"{car_identity.replace('-', '_')}_summary.json"
             if not filename.exists():
-                return 0.0
-            
+                return None
+
             with open(filename, 'r') as f:
-                credit_data = json.load(f)
-                return credit_data.get('credit_balance', 0.0)
+                return json.load(f)
         except Exception as e:
-            raise FileOperationException(f"Failed to load credit balance: {e}")
-    
-    @staticmethod
-    def export_history_file(car_identity, history_content):
-        """Export history file"""
+            raise FileOperationException(f"Failed to load history summary: {e}")
+
+    @timed('file_handler')
+    def save_history_summary(self, car_identity, summary, fsync=True):
+        """Save the running history aggregates for a car"""
         try:
-            filename = HISTORY_DIR / f"{car_identity}.txt"
-            with open(filename, 'w') as f:
-                f.write(history_content)
-            return str(filename)
+            filename = self.summaries_dir / f"{car_identity.replace('-', '_')}_summary.json"
+            with self.lock(car_identity):
+                atomic_write_json(filename, summary, fsync)
         except Exception as e:
-            raise FileOperationException(f"Failed to export history file: {e}")
+            raise FileOperationException(f"Failed to save history summary: {e}")
+
+    @timed('file_handler')
+    def record_pickup(self, car_identity, payment_data, credit_amount, summary=None):
+        """
+        Store payment, credits and history aggregates and remove the active parking record.
+        The pickup is written to the journal first and that single write is the one that gets
+        fsynced (shared with concurrent pickups), the files themselves are updated unsynced.
+        If updating them fails the pickup is finished from its journal entry before returning;
+        when that fails as well the plate stays blocked until a later attempt finishes it.
+        """
+        txid = uuid.uuid4().hex
+        entry = {
+            'txid': txid,
+            'car_identity': car_identity,
+            'payment': dict(payment_data, txid=txid),
+            'credit_balance': credit_amount,
+            'summary': summary
+        }
+        with self.lock(car_identity):
+            self._finish_failed_pickup(car_identity)
+            try:
+                with self.journal.transaction(entry, self._pickup_paths(car_identity)):
+                    try:
+                        self._append_payments(car_identity, [entry['payment']], fsync=False)
+                    except Exception as e:
+                        raise FileOperationException(f"Failed to save payment record: {e}")
+                    if summary is not None:
+                        self.save_history_summary(car_identity, summary, fsync=False)
+                    # The credits carry the txid and mark the pickup as applied, so they go last
+                    self.save_credit_balance(car_identity, credit_amount, txid, fsync=False)
+                    self.delete_parking_record(car_identity)
+            except Exception:
+                # The pickup is already in the journal and may be half written, e.g. the payment
+                # without its credits. Finish it now; a retry must not charge the stay again
+                self._failed_pickups[car_identity] = entry
+                self._finish_failed_pickup(car_identity)
+
+    def _pickup_paths(self, car_identity):
+        """Files and directories a pickup changes without fsync"""
+        plate = car_identity.replace('-', '_')
+        return (
+            self._payments_file(car_identity),
+            self.summaries_dir / f"{plate}_summary.json",
+            self._credits_file(car_identity),
+            self.summaries_dir,
+            self.credits_dir,
+            self.parking_records_dir
+        )
+
+    def _finish_failed_pickup(self, car_identity):
+        """
+        Complete a pickup of this process that failed half-way, before the plate is used again.
+        Until that succeeds every load for the plate raises, so the stay cannot be charged twice.
+        """
+        with self.lock(car_identity):
+            entry = self._failed_pickups.pop(car_identity, None)
+            if entry is None:
+                return
+            try:
+                self._replay_pickup(entry)
+            except Exception as e:
+                self._failed_pickups[car_identity] = entry
+                raise FileOperationException(
+                    f"Pickup of car {car_identity} is incomplete and could not be finished yet: {e}"
+                )
+        self.journal.resolve(entry['txid'])
+
+    def _replay_pickup(self, entry):
+        """
+        Finish a journaled pickup, safe to run any number of times. Credits and the summary
+        are only restored while this pickup is still the latest payment of the car, so an
+        old journal entry never overwrites what later pickups wrote.
+        """
+        car_identity = entry['car_identity']
+        payment_data = entry['payment']
+        txid = entry['txid']
+        with self.lock(car_identity):
+            txids = self._payment_txids(car_identity)
+            if txid not in txids:
+                self._append_payments(car_identity, [payment_data])
+                txids.append(txid)
+
+            if txids[-1] == txid and self._credit_txid(car_identity) != txid:
+                if entry['summary'] is not None:
+                    self.save_history_summary(car_identity, entry['summary'])
+                self.save_credit_balance(car_identity, entry['credit_balance'], txid)
+
+            record = self.load_parking_record(car_identity)
+            if record is not None and record.get('arrival_time') == payment_data['arrival_time']:
+                self.delete_parking_record(car_identity)
+
+
+def _load_json(filename):
+    """Parsed JSON file, None when it does not exist"""
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
@@ -0,0 +1,80 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to in-process locking only
+    fcntl = None
+
+
+class PlateLockManager:
+    """
+    Per-plate advisory locks shared by every gate process using the same data directory.
+    Each plate has its own lock file held with fcntl.flock, so different plates never block
+    each other. Locks are re-entrant within a thread.
+    """
+
+    def __init__(self, locks_dir):
+        self.locks_dir = Path(locks_dir)
+        self.locks_dir.mkdir(parents=True, exist_ok=True)
+        self._held = threading.local()
+        self._thread_locks = {}
+        self._thread_locks_guard = threading.Lock()
+
+    @contextmanager
+    def lock(self, car_identity):
+        """Hold the lock for one plate"""
+        held = self._held.__dict__.setdefault('counts', {})
+        if held.get(car_identity):
+            held[car_identity] += 1
+            try:
+                yield
+            finally:
+                held[car_identity] -= 1
+            return
+
+        with self._thread_lock(car_identity):
+            filename = self.locks_dir / f"{car_identity.replace('-', '_')}.lock"
+            with open(filename, 'a') as f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                held[car_identity] = 1
+                try:
+                    yield
+                finally:
+                    held[car_identity] = 0
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _thread_lock(self, car_identity):
+        """In-process lock for the plate, used where flock is unavailable"""
+        if fcntl is not None:
+            return nullcontext()
+        with self._thread_locks_guard:
+            return self._thread_locks.setdefault(car_identity, threading.Lock())
+
+
+def atomic_write_json(filename, data, fsync=True):
+    """
+    Write JSON to a temporary file in the same directory, fsync it and rename it into place.
+    Callers whose changes are already durable elsewhere (the pickup journal) can skip the fsync.
+    """
+    filename = Path(filename)
+    fd, temp_name = tempfile.mkstemp(dir=filename.parent, prefix=f".{filename.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=2)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(temp_name, filename)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,72 @@
+import os
+
+from src.exceptions.parking_exceptions import FileOperationException
+from src.utils.metrics import timed
+
+
+class HistoryFileMixin:
+    """
+    History exports as text files under self.history_dir, for storage backends that keep
+    them on disk. Writes hold the plate lock from self.lock(car_identity).
+    """
+
+    @timed('history_files')
+    def export_history_file(self, car_identity, history_content):
+        """Export history file"""
+        try:
+            filename = self.history_dir / f"{car_identity}.txt"
+            with self.lock(car_identity):
+                write_history_file(filename, history_content, ())
+            return str(filename)
+        except Exception as e:
+            raise FileOperationException(f"Failed to export history file: {e}")
+
+    @timed('history_files')
+    def update_history_file(self, car_identity, header, lines, kept_bytes=None, suffix=''):
+        """
+        Write the header, the first kept_bytes of the existing body (none by default) and lines.
+        Lines are streamed to disk, suffix names a separate export such as a date range.
+        """
+        try:
+            filename = self.history_dir / f"{car_identity}{suffix}.txt"
+            with self.lock(car_identity):
+                write_history_file(filename, header, lines, kept_bytes)
+            return str(filename)
+        except Exception as e:
+            raise FileOperationException(f"Failed to export history file: {e}")
+
+    def history_file_exists(self, car_identity, suffix=''):
+        """Whether the history export is still on disk"""
+        return (self.history_dir / f"{car_identity}{suffix}.txt").exists()
+
+
+def write_history_file(filename, header, lines, kept_bytes=None):
+    """
+    Write a history export to a temporary file, fsync it and rename it into place.
+    With kept_bytes that much of the existing file's body (what follows its header lines)
+    is carried over under the new header; anything the old file has beyond it is dropped,
+    so lines written by an export whose position was never saved are not kept twice.
+    """
+    temp_filename = filename.with_suffix('.txt.tmp')
+    try:
+        with open(temp_filename, 'wb') as f:
+            f.write(header.encode())
+            if kept_bytes:
+                with open(filename, 'rb') as old:
+                    for _ in range(header.count('\n')):
+                        old.readline()
+                    remaining = kept_bytes
+                    while remaining:
+                        chunk = old.read(min(remaining, 1 << 20))
+                        if not chunk:
+                            raise ValueError(f"{filename} is shorter than its last export")
+                        f.write(chunk)
+                        remaining -= len(chunk)
+            for line in lines:
+                f.write(line.encode())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_filename, filename)
+    except BaseException:
+        temp_filename.unlink(missing_ok=True)
+        raise
@@ -0,0 +1,114 @@
+import copy
+import threading
+
+
+class InMemoryStorage:
+    """
+    Dict-backed storage for benchmarks, simulations and tests.
+    Nothing is written to disk, history exports are kept in history_files.
+    """
+
+    # Only threads of this process see the data
+    shared = False
+
+    def __init__(self):
+        self.parking_records = {}
+        self.payments = {}
+        self.credits = {}
+        self.history_files = {}
+        self.history_summaries = {}
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def lock(self, car_identity):
+        """Per-plate lock for threads sharing this storage"""
+        with self._locks_guard:
+            return self._locks.setdefault(car_identity, threading.RLock())
+
+    def save_parking_record(self, car_identity, record_data):
+        """Save parking record"""
+        self.parking_records[car_identity] = copy.copy(record_data)
+
+    def load_parking_record(self, car_identity):
+        """Load parking record"""
+        record_data = self.parking_records.get(car_identity)
+        return copy.copy(record_data) if record_data is not None else None
+
+    def delete_parking_record(self, car_identity):
+        """Delete parking record"""
+        self.parking_records.pop(car_identity, None)
+
+    def iter_parking_records(self):
+        """Stream all active parking records"""
+        for record_data in list(self.parking_records.values()):
+            yield copy.copy(record_data)
+
+    def save_payment_record(self, car_identity, payment_data):
+        """Save payment record"""
+        self.payments.setdefault(car_identity, []).append(copy.copy(payment_data))
+
+    def save_payment_records(self, car_identity, payments):
+        """Save several payment records"""
+        self.payments.setdefault(car_identity, []).extend(copy.copy(payment_data) for payment_data in payments)
+
+    def load_payment_records(self, car_identity):
+        """Load all payment records for a car"""
+        return list(self.iter_payment_records(car_identity))
+
+    def iter_payment_records(self, car_identity):
+        """Stream payment records for a car"""
+        for payment_data in self.payments.get(car_identity, []):
+            yield copy.copy(payment_data)
+
+    def iter_payment_records_since(self, car_identity, position=0):
+        """Stream payment records after position (a list index), yields (next_position, record) pairs"""
+        payments = self.payments.get(car_identity, [])
+        for index in range(position, len(payments)):
+            yield index + 1, copy.copy(payments[index])
+
+    def save_credit_balance(self, car_identity, credit_amount):
+        """Save customer credit balance"""
+        self.credits[car_identity] = credit_amount
+
+    def load_credit_balance(self, car_identity):
+        """Load customer credit balance"""
+        return self.credits.get(car_identity, 0.0)
+
+    def load_history_summary(self, car_identity):
+        """Load the running history aggregates for a car, None if there are none yet"""
+        summary = self.history_summaries.get(car_identity)
+        return dict(summary) if summary is not None else None
+
+    def save_history_summary(self, car_identity, summary):
+        """Save the running history aggregates for a car"""
+        self.history_summaries[car_identity] = dict(summary)
+
+    def record_pickup(self, car_identity, payment_data, credit_amount, summary=None):
+        """Store payment, credits and history aggregates and remove the active parking record"""
+        self.save_payment_record(car_identity, payment_data)
+        self.save_credit_balance(car_identity, credit_amount)
+        if summary is not None:
+            self.save_history_summary(car_identity, summary)
+        self.delete_parking_record(car_identity)
+
+    def export_history_file(self, car_identity, history_content):
+        """Keep the exported history in memory and return its name"""
+        filename = f"memory://{car_identity}.txt"
+        self.history_files[filename] = history_content
+        return filename
+
+    def update_history_file(self, car_identity, header, lines, kept_bytes=None, suffix=''):
+        """Write the header, the first kept_bytes of the existing body and lines to the in-memory export"""
+        filename = f"memory://{car_identity}{suffix}.txt"
+        body = ''
+        if kept_bytes:
+            old_body = self.history_files[filename].split('\n', header.count('\n'))[-1].encode()
+            if len(old_body) < kept_bytes:
+                raise ValueError(f"{filename} is shorter than its last export")
+            body = old_body[:kept_bytes].decode()
+        self.history_files[filename] = header + body + ''.join(lines)
+        return filename
+
+    def history_file_exists(self, car_identity, suffix=''):
+        """Whether the in-memory export exists"""
+        return f"memory://{car_identity}{suffix}.txt" in self.history_files
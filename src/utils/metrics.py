@@ -0,0 +1,147 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from bisect import bisect_left
+from pathlib import Path
+
+from config.settings import METRICS_ENABLED
+
+# Latency bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+DURATION_METRIC = 'parking_operation_duration_seconds'
+ERRORS_METRIC = 'parking_operation_errors_total'
+
+
+class Histogram:
+    """Latency histogram and error counter of one operation"""
+
+    __slots__ = ('buckets', 'bucket_counts', 'count', 'total', 'errors', '_lock')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # last one is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, failed=False):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.bucket_counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if failed:
+                self.errors += 1
+
+
+class MetricsRegistry:
+    """Histograms keyed by (component, operation), rendered in Prometheus text format"""
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = tuple(buckets)
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._histograms = {}
+
+    def histogram(self, component, operation):
+        key = (component, operation)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def render(self):
+        """Current metrics in the Prometheus text exposition format"""
+        histograms = sorted(self._histograms.items())
+        lines = [
+            f"# HELP {DURATION_METRIC} Time spent in parking system operations.",
+            f"# TYPE {DURATION_METRIC} histogram",
+        ]
+        for (component, operation), histogram in histograms:
+            labels = f'component="{component}",operation="{operation}"'
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (None,), histogram.bucket_counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound is None else repr(bound)
+                lines.append(f'{DURATION_METRIC}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{DURATION_METRIC}_sum{{{labels}}} {histogram.total!r}")
+            lines.append(f"{DURATION_METRIC}_count{{{labels}}} {histogram.count}")
+
+        lines.append(f"# HELP {ERRORS_METRIC} Parking system operations that raised an exception.")
+        lines.append(f"# TYPE {ERRORS_METRIC} counter")
+        for (component, operation), histogram in histograms:
+            lines.append(f'{ERRORS_METRIC}{{component="{component}",operation="{operation}"}} {histogram.errors}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        """Write the metrics to a file for the node exporter textfile collector (atomic rename)"""
+        path = Path(path)
+        temp_path = path.with_name(path.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            f.write(self.render())
+        os.replace(temp_path, path)
+        return str(path)
+
+
+registry = MetricsRegistry(enabled=METRICS_ENABLED)
+
+
+def timed(component, operation=None):
+    """
+    Record the latency of every call in the registry under (component, operation),
+    operation defaults to the function name. Generator functions are timed until exhausted.
+    While the registry is disabled the wrapper only checks the flag.
+    """
+    def decorate(func):
+        name = operation or func.__name__
+
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not registry.enabled:
+                    return (yield from func(*args, **kwargs))
+                histogram = registry.histogram(component, name)
+                start = time.perf_counter()
+                try:
+                    result = yield from func(*args, **kwargs)
+                except GeneratorExit:
+                    # Closed early by the consumer, not a failure
+                    histogram.observe(time.perf_counter() - start)
+                    raise
+                except BaseException:
+                    histogram.observe(time.perf_counter() - start, failed=True)
+                    raise
+                histogram.observe(time.perf_counter() - start)
+                return result
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return func(*args, **kwargs)
+            histogram = registry.histogram(component, name)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                histogram.observe(time.perf_counter() - start, failed=True)
+                raise
+            histogram.observe(time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorate
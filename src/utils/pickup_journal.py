@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from config.settings import JOURNAL_SEGMENT_BYTES
+
+try:
+    import fcntl
+except ImportError:  # Windows: segments of other live processes cannot be detected
+    fcntl = None
+
+
+class PickupJournal:
+    """
+    Write-ahead journal for pickups. Each pickup is one JSON line; concurrent pickups
+    share fsyncs (group commit): whichever thread finds no sync in progress syncs
+    everything written so far and the others just wait for it.
+
+    Every process writes its own segment file, held with an exclusive flock while the
+    process runs. Segments nobody holds belong to processes that died and are replayed
+    by recover(). A segment is truncated once it is large and all its pickups are applied.
+    """
+
+    def __init__(self, journal_dir, segment_bytes=JOURNAL_SEGMENT_BYTES):
+        self.journal_dir = Path(journal_dir)
+        self.journal_dir.mkdir(parents=True, exist_ok=True)
+        self.segment_bytes = segment_bytes
+        self.path = self.journal_dir / f"pickups-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl"
+        self._fd = None
+        self._cond = threading.Condition()
+        self._written = 0   # lines written to the segment
+        self._synced = 0    # lines known to be on disk
+        self._syncing = False
+        self._pending = 0   # pickups journaled but not yet applied
+        self._size = 0
+        # Pickups that failed half-way stay in the journal until resolve() is called
+        self._unresolved = set()
+        # Files the applied pickups wrote without fsync, flushed before the segment is dropped
+        self._touched = set()
+        self._flushing = False
+
+    def close(self):
+        """Close the segment, removing it when nothing in it needs replaying"""
+        with self._cond:
+            if self._fd is None:
+                return
+            idle = self._idle()
+            written = self._written
+            touched = set(self._touched)
+        if idle:
+            _fsync_paths(touched)
+        with self._cond:
+            if self._fd is None:
+                return
+            if idle and self._idle() and self._written == written:
+                self.path.unlink(missing_ok=True)
+            os.close(self._fd)
+            self._fd = None
+
+    @contextmanager
+    def transaction(self, entry, paths=()):
+        """
+        Make entry durable, then run the body that applies it. paths are the files
+        (and directories) the body changes without fsync.
+        """
+        self._append(entry)
+        try:
+            yield
+        except BaseException:
+            with self._cond:
+                self._unresolved.add(entry['txid'])
+                self._touched.update(paths)
+                self._pending -= 1
+            raise
+        with self._cond:
+            self._pending -= 1
+            self._touched.update(paths)
+        self._truncate_if_idle()
+
+    def resolve(self, txid):
+        """Mark a failed pickup as repaired, so the segment can be truncated again"""
+        with self._cond:
+            self._unresolved.discard(txid)
+        self._truncate_if_idle()
+
+    def _idle(self):
+        return not self._pending and not self._unresolved
+
+    def _append(self, entry):
+        line = (json.dumps(entry) + '\n').encode()
+        with self._cond:
+            if self._fd is None:
+                self._open()
+            os.write(self._fd, line)
+            self._size += len(line)
+            self._written += 1
+            self._pending += 1
+            ticket = self._written
+
+            while self._synced < ticket:
+                if self._syncing:
+                    self._cond.wait()
+                    continue
+                # Become the leader: sync every line written so far in one go
+                self._syncing = True
+                target = self._written
+                self._cond.release()
+                try:
+                    os.fsync(self._fd)
+                finally:
+                    self._cond.acquire()
+                    self._syncing = False
+                    self._cond.notify_all()
+                self._synced = max(self._synced, target)
+
+    def _open(self):
+        # Lock the segment under a name recover() ignores, so nobody sees it unlocked
+        temp_path = self.path.with_name(f".{self.path.name}.tmp")
+        self._fd = os.open(temp_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        os.rename(temp_path, self.path)
+
+    def _truncate_if_idle(self):
+        """Drop applied pickups from a large segment once the files they wrote are on disk"""
+        with self._cond:
+            if self._fd is None or self._size < self.segment_bytes or not self._idle() or self._flushing:
+                return
+            self._flushing = True
+            written = self._written
+            touched = set(self._touched)
+
+        # Pickups keep being journaled while the files are flushed
+        try:
+            _fsync_paths(touched)
+        finally:
+            with self._cond:
+                self._flushing = False
+                # Anything journaled meanwhile may not be applied yet, try again later
+                if self._fd is not None and self._written == written and self._idle():
+                    os.ftruncate(self._fd, 0)
+                    self._size = 0
+                    self._touched -= touched
+
+    def recover(self, replay):
+        """
+        Replay the segments of processes that are gone, oldest line first.
+        replay(entry) must be idempotent: a segment is only removed after all its
+        entries were replayed, so a crash during recovery replays them again.
+        Returns the number of entries replayed.
+        """
+        replayed = 0
+        for path in sorted(self.journal_dir.glob("pickups-*.jsonl")):
+            if path == self.path:
+                continue
+            try:
+                fd = os.open(path, os.O_RDWR)
+            except FileNotFoundError:
+                continue  # another process starting up recovered it first
+            try:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # another live process owns it
+                    if not _is_same_file(fd, path):
+                        continue  # recovered and removed while we waited for the lock
+                with open(fd, 'rb', closefd=False) as f:
+                    for line in f:
+                        if not line.endswith(b'\n'):
+                            break  # torn final write, that pickup was never acknowledged
+                        replay(json.loads(line))
+                        replayed += 1
+                path.unlink()
+            finally:
+                os.close(fd)
+        return replayed
+
+
+def _is_same_file(fd, path):
+    """Whether path still names the file open as fd"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fd_stat = os.fstat(fd)
+    return (fd_stat.st_dev, fd_stat.st_ino) == (stat.st_dev, stat.st_ino)
+
+
+def _fsync_paths(paths):
+    """fsync files and directories, skipping ones that are gone or cannot be synced"""
+    for path in paths:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except OSError:
+            continue
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass  # directories cannot be synced on every platform
+        finally:
+            os.close(fd)
@@ -0,0 +1,69 @@
+import os
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+def _file_stamp(path):
+    """What identifies a version of a file: atomic rewrites get a new inode, appends a new size"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+
+class RecordCache:
+    """
+    Bounded LRU read-through cache of values loaded from per-plate files.
+    Writers must call invalidate(); with check_mtime every hit is confirmed by a stat
+    of the file, so changes made by other gate processes are noticed as well.
+    """
+
+    def __init__(self, max_entries, check_mtime=False):
+        self.max_entries = max_entries
+        self.check_mtime = check_mtime
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (stamp, value)
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, path, load):
+        """Cached value for key, calling load() on a miss"""
+        if self.max_entries <= 0:
+            return load()
+
+        stamp = _file_stamp(path) if self.check_mtime else None
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = load()
+        with self._lock:
+            # Skip storing when a write happened while loading, the value may predate it
+            if generation == self._generation:
+                self._entries[key] = (stamp, value)
+                self._entries.move_to_end(key)
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
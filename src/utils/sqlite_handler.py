@@ -0,0 +1,275 @@
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+from config.settings import *
+from src.exceptions.parking_exceptions import FileOperationException
+from src.utils.file_locking import PlateLockManager
+from src.utils.history_files import HistoryFileMixin
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS parking_records (
+    car_identity TEXT PRIMARY KEY,
+    arrival_time TEXT NOT NULL,
+    departure_time TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_parking_records_arrival ON parking_records (arrival_time);
+CREATE INDEX IF NOT EXISTS idx_parking_records_departure ON parking_records (departure_time);
+
+CREATE TABLE IF NOT EXISTS payments (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    car_identity TEXT NOT NULL,
+    arrival_time TEXT NOT NULL,
+    departure_time TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_payments_car ON payments (car_identity, id);
+CREATE INDEX IF NOT EXISTS idx_payments_arrival ON payments (arrival_time);
+CREATE INDEX IF NOT EXISTS idx_payments_departure ON payments (departure_time);
+
+CREATE TABLE IF NOT EXISTS credits (
+    car_identity TEXT PRIMARY KEY,
+    credit_balance REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS history_summaries (
+    car_identity TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+class SQLiteHandler(HistoryFileMixin):
+    """
+    SQLite storage with the same operations as FileHandler.
+    Each thread gets its own connection, the database runs in WAL mode.
+    """
+
+    def __init__(self, db_path=SQLITE_DB_PATH, history_dir=HISTORY_DIR, shared=STORAGE_SHARED):
+        self.db_path = str(db_path)
+        self.shared = shared
+        self.history_dir = Path(history_dir)
+        self.plate_locks = PlateLockManager(Path(self.db_path).parent / "locks")
+        self._local = threading.local()
+        try:
+            with self._connection() as conn:
+                conn.executescript(SCHEMA)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to open database: {e}")
+
+    def _connection(self):
+        """Connection for the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def lock(self, car_identity):
+        """Exclusive per-plate lock shared with other gate processes"""
+        return self.plate_locks.lock(car_identity)
+
+    def close(self):
+        """Close the connection of the current thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def save_parking_record(self, car_identity, record_data):
+        """Save parking record"""
+        try:
+            with self._connection() as conn:
+                self._upsert_parking_record(conn, car_identity, record_data)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to save parking record: {e}")
+
+    def load_parking_record(self, car_identity):
+        """Load parking record"""
+        try:
+            row = self._connection().execute(
+                "SELECT data FROM parking_records WHERE car_identity = ?", (car_identity,)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to load parking record: {e}")
+
+    def delete_parking_record(self, car_identity):
+        """Delete parking record"""
+        try:
+            with self._connection() as conn:
+                conn.execute("DELETE FROM parking_records WHERE car_identity = ?", (car_identity,))
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to delete parking record: {e}")
+
+    def iter_parking_records(self):
+        """Stream all active parking records"""
+        try:
+            cursor = self._connection().execute("SELECT data FROM parking_records ORDER BY car_identity")
+            for (data,) in cursor:
+                yield json.loads(data)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to load parking records: {e}")
+
+    def save_payment_record(self, car_identity, payment_data):
+        """Save payment record"""
+        try:
+            with self._connection() as conn:
+                self._insert_payment(conn, car_identity, payment_data)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to save payment record: {e}")
+
+    def save_payment_records(self, car_identity, payments):
+        """Save several payment records in one transaction"""
+        try:
+            with self._connection() as conn:
+                for payment_data in payments:
+                    self._insert_payment(conn, car_identity, payment_data)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to save payment records: {e}")
+
+    def load_payment_records(self, car_identity):
+        """Load all payment records for a car"""
+        return list(self.iter_payment_records(car_identity))
+
+    def iter_payment_records(self, car_identity):
+        """Stream payment records for a car in payment order"""
+        try:
+            cursor = self._connection().execute(
+                "SELECT data FROM payments WHERE car_identity = ? ORDER BY id", (car_identity,)
+            )
+            for (data,) in cursor:
+                yield json.loads(data)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to load payment records: {e}")
+
+    def iter_payment_records_since(self, car_identity, position=0):
+        """Stream payment records after position (a payment id), yields (next_position, record) pairs"""
+        try:
+            cursor = self._connection().execute(
+                "SELECT id, data FROM payments WHERE car_identity = ? AND id > ? ORDER BY id",
+                (car_identity, position)
+            )
+            for payment_id, data in cursor:
+                yield payment_id, json.loads(data)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to load payment records: {e}")
+
+    def save_credit_balance(self, car_identity, credit_amount):
+        """Save customer credit balance"""
+        try:
+            with self._connection() as conn:
+                self._upsert_credit_balance(conn, car_identity, credit_amount)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to save credit balance: {e}")
+
+    def load_credit_balance(self, car_identity):
+        """Load customer credit balance"""
+        try:
+            row = self._connection().execute(
+                "SELECT credit_balance FROM credits WHERE car_identity = ?", (car_identity,)
+            ).fetchone()
+            return row[0] if row else 0.0
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to load credit balance: {e}")
+
+    def load_history_summary(self, car_identity):
+        """Load the running history aggregates for a car, None if there are none yet"""
+        try:
+            row = self._connection().execute(
+                "SELECT data FROM history_summaries WHERE car_identity = ?", (car_identity,)
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to load history summary: {e}")
+
+    def save_history_summary(self, car_identity, summary):
+        """Save the running history aggregates for a car"""
+        try:
+            with self._connection() as conn:
+                self._upsert_history_summary(conn, car_identity, summary)
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to save history summary: {e}")
+
+    def import_files(self, file_handler):
+        """
+        One-shot import of the JSON file storage (a FileHandler) before switching
+        STORAGE_BACKEND to 'sqlite'. Each plate is copied in one transaction and plates the
+        database already knows are skipped, so an interrupted import can simply be run again.
+        History exports are rebuilt at their next export. Returns the number of plates imported.
+        """
+        imported = 0
+        for car_identity in file_handler.iter_car_identities():
+            try:
+                with self._connection() as conn:
+                    if self._has_plate(conn, car_identity):
+                        continue
+                    record_data = file_handler.load_parking_record(car_identity)
+                    if record_data is not None:
+                        self._upsert_parking_record(conn, car_identity, record_data)
+                    for payment_data in file_handler.iter_payment_records(car_identity):
+                        self._insert_payment(conn, car_identity, payment_data)
+                    self._upsert_credit_balance(conn, car_identity, file_handler.load_credit_balance(car_identity))
+                    summary = file_handler.load_history_summary(car_identity)
+                    if summary is not None:
+                        # Export positions point into the JSON payment log, not at payment ids
+                        summary = dict(summary, exported_position=None, exported_bytes=None, exported_count=0)
+                        self._upsert_history_summary(conn, car_identity, summary)
+                imported += 1
+            except sqlite3.Error as e:
+                raise FileOperationException(f"Failed to import car {car_identity}: {e}")
+        return imported
+
+    @staticmethod
+    def _has_plate(conn, car_identity):
+        return any(
+            conn.execute(f"SELECT 1 FROM {table} WHERE car_identity = ? LIMIT 1", (car_identity,)).fetchone()
+            for table in ('parking_records', 'payments', 'credits')
+        )
+
+    def record_pickup(self, car_identity, payment_data, credit_amount, summary=None):
+        """Store payment, credits and history aggregates and close the parking record in one transaction"""
+        try:
+            with self._connection() as conn:
+                self._insert_payment(conn, car_identity, payment_data)
+                self._upsert_credit_balance(conn, car_identity, credit_amount)
+                if summary is not None:
+                    self._upsert_history_summary(conn, car_identity, summary)
+                conn.execute("DELETE FROM parking_records WHERE car_identity = ?", (car_identity,))
+        except sqlite3.Error as e:
+            raise FileOperationException(f"Failed to record pickup: {e}")
+
+    @staticmethod
+    def _upsert_parking_record(conn, car_identity, record_data):
+        conn.execute(
+            "INSERT OR REPLACE INTO parking_records (car_identity, arrival_time, departure_time, data) "
+            "VALUES (?, ?, ?, ?)",
+            (car_identity, record_data['arrival_time'], record_data.get('departure_time'),
+             json.dumps(record_data))
+        )
+
+    @staticmethod
+    def _insert_payment(conn, car_identity, payment_data):
+        conn.execute(
+            "INSERT INTO payments (car_identity, arrival_time, departure_time, data) VALUES (?, ?, ?, ?)",
+            (car_identity, payment_data['arrival_time'], payment_data['departure_time'],
+             json.dumps(payment_data))
+        )
+
+    @staticmethod
+    def _upsert_credit_balance(conn, car_identity, credit_amount):
+        conn.execute(
+            "INSERT OR REPLACE INTO credits (car_identity, credit_balance) VALUES (?, ?)",
+            (car_identity, credit_amount)
+        )
+
+    @staticmethod
+    def _upsert_history_summary(conn, car_identity, summary):
+        conn.execute(
+            "INSERT OR REPLACE INTO history_summaries (car_identity, data) VALUES (?, ?)",
+            (car_identity, json.dumps(summary))
+        )
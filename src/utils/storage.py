@@ -0,0 +1,62 @@
+from typing import ContextManager, Iterable, Iterator, Optional, Protocol
+
+from config.settings import STORAGE_BACKEND, SQLITE_DB_PATH
+from src.utils.file_handler import FileHandler
+from src.utils.memory_storage import InMemoryStorage
+from src.utils.sqlite_handler import SQLiteHandler
+
+
+class ParkingStorage(Protocol):
+    """Operations ParkingService needs from a storage backend"""
+
+    # Whether other processes write to the same data, so in-memory state may be stale
+    shared: bool
+
+    def lock(self, car_identity: str) -> ContextManager: ...
+
+    def save_parking_record(self, car_identity: str, record_data: dict) -> None: ...
+
+    def load_parking_record(self, car_identity: str) -> Optional[dict]: ...
+
+    def delete_parking_record(self, car_identity: str) -> None: ...
+
+    def iter_parking_records(self) -> Iterator[dict]: ...
+
+    def save_payment_record(self, car_identity: str, payment_data: dict) -> None: ...
+
+    def save_payment_records(self, car_identity: str, payments: Iterable[dict]) -> None: ...
+
+    def load_payment_records(self, car_identity: str) -> list: ...
+
+    def iter_payment_records(self, car_identity: str) -> Iterator[dict]: ...
+
+    def iter_payment_records_since(self, car_identity: str, position: int = 0) -> Iterator[tuple]: ...
+
+    def save_credit_balance(self, car_identity: str, credit_amount: float) -> None: ...
+
+    def load_credit_balance(self, car_identity: str) -> float: ...
+
+    def load_history_summary(self, car_identity: str) -> Optional[dict]: ...
+
+    def save_history_summary(self, car_identity: str, summary: dict) -> None: ...
+
+    def record_pickup(self, car_identity: str, payment_data: dict, credit_amount: float,
+                      summary: Optional[dict] = None) -> None: ...
+
+    def export_history_file(self, car_identity: str, history_content: str) -> str: ...
+
+    def update_history_file(self, car_identity: str, header: str, lines: Iterable[str],
+                            kept_bytes: Optional[int] = None, suffix: str = '') -> str: ...
+
+    def history_file_exists(self, car_identity: str, suffix: str = '') -> bool: ...
+
+
+def create_storage(backend=STORAGE_BACKEND):
+    """Create the storage backend named in settings ('file', 'sqlite' or 'memory')"""
+    if backend == 'file':
+        return FileHandler()
+    if backend == 'sqlite':
+        return SQLiteHandler(SQLITE_DB_PATH)
+    if backend == 'memory':
+        return InMemoryStorage()
+    raise ValueError(f"Unknown storage backend: {backend}")
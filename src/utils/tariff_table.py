@@ -0,0 +1,158 @@
+import os
+import runpy
+import threading
+import time
+from array import array
+from datetime import timedelta
+
+from config.settings import PRICING_CONFIG_PATH, TARIFF_RELOAD_INTERVAL
+
+MINUTES_PER_DAY = 24 * 60
+
+# Day type for each weekday (Monday=0 ... Sunday=6)
+DAY_TYPE_BY_WEEKDAY = ('weekday',) * 5 + ('saturday', 'sunday')
+
+# Night period is charged as a flat rate, night and evening get the larger discount
+FLAT_RATE_PERIODS = ('00:00-07:59',)
+NIGHT_EARLY_PERIODS = ('00:00-07:59', '17:00-23:59')
+
+
+def _parse_period(period):
+    """Convert '08:00-16:59' into (480, 1020) minutes of day"""
+    start, end = period.split('-')
+    start_hour, start_minute = map(int, start.split(':'))
+    end_hour, end_minute = map(int, end.split(':'))
+    return start_hour * 60 + start_minute, end_hour * 60 + end_minute + 1
+
+
+class TariffTable:
+    """
+    Pricing config compiled into flat arrays.
+    A segment is one pricing period on one weekday (segment = weekday * periods + period),
+    segment_by_minute maps every minute of the week to its segment.
+    Rate arrays are indexed [has_frequent_parking][segment] with discounts already applied.
+    """
+
+    def __init__(self, pricing_rates, time_limits, discounts):
+        self.periods = tuple(pricing_rates['weekday'])
+        bounds = [_parse_period(period) for period in self.periods]
+        self._check_periods_cover_day(bounds)
+
+        self.period_starts = array('H', [start for start, _ in bounds])
+        self.period_ends = array('H', [end for _, end in bounds])
+
+        self.segment_by_minute = array('B')
+        self.segment_day_type = []
+        self.segment_period = []
+        self.segment_end = array('H')
+        self.segment_limit = array('d')
+        self.segment_flat = array('B')
+        self.normal_rates = (array('d'), array('d'))
+        self.exceed_rates = (array('d'), array('d'))
+
+        for weekday, day_type in enumerate(DAY_TYPE_BY_WEEKDAY):
+            for p, period in enumerate(self.periods):
+                segment = len(self.segment_period)
+                start, end = bounds[p]
+                rate = pricing_rates[day_type][period]
+                discount = discounts['night_early'] if period in NIGHT_EARLY_PERIODS else discounts['other']
+
+                self.segment_day_type.append(day_type)
+                self.segment_period.append(period)
+                self.segment_end.append(end)
+                self.segment_limit.append(time_limits.get((day_type, period), 0))
+                self.segment_flat.append(period in FLAT_RATE_PERIODS)
+                self.normal_rates[False].append(rate)
+                self.normal_rates[True].append(rate * (1 - discount))
+                self.exceed_rates[False].append(rate * 2)
+                self.exceed_rates[True].append(rate * 2 * (1 - discount))
+                self.segment_by_minute.extend([segment] * (end - start))
+
+        self.segment_day_type = tuple(self.segment_day_type)
+        self.segment_period = tuple(self.segment_period)
+        self.segment_end_delta = tuple(timedelta(minutes=end) for end in self.segment_end)
+
+        # Filled lazily by PricingService, keyed by has_frequent_parking
+        self.weekly_fees = {}
+
+    @staticmethod
+    def _check_periods_cover_day(bounds):
+        """Periods must be contiguous and cover 00:00-23:59"""
+        expected_start = 0
+        for start, end in bounds:
+            if start != expected_start or end <= start:
+                raise ValueError("Pricing periods must be contiguous and cover the whole day")
+            expected_start = end
+        if expected_start != MINUTES_PER_DAY:
+            raise ValueError("Pricing periods must be contiguous and cover the whole day")
+
+    def segment_at(self, dt):
+        """Segment index for a datetime"""
+        return self.segment_by_minute[dt.weekday() * MINUTES_PER_DAY + dt.hour * 60 + dt.minute]
+
+    def period_fee(self, segment, hours, has_frequent_parking, flag):
+        """Fee for a whole number of hours spent in one segment"""
+        if self.segment_flat[segment]:
+            return self.normal_rates[has_frequent_parking][segment]
+        if flag == 'exceed_time':
+            return self.exceed_rates[has_frequent_parking][segment] * hours
+        return self.normal_rates[has_frequent_parking][segment] * hours
+
+
+def compile_tariff(config):
+    """Compile a pricing config namespace (module globals) into a TariffTable"""
+    return TariffTable(
+        config['PRICING_RATES'],
+        config['TIME_LIMITS'],
+        config['FREQUENT_PARKING_DISCOUNTS']
+    )
+
+
+def load_tariff_table(path, base_path=None):
+    """
+    Execute a pricing config file and compile it. Settings the file does not
+    define are taken from base_path, so a candidate tariff can change only the rates.
+    """
+    config = runpy.run_path(str(base_path)) if base_path is not None else {}
+    config.update(runpy.run_path(str(path)))
+    return compile_tariff(config)
+
+
+_reload_lock = threading.Lock()
+# (mtime_ns, next_check, table) swapped as a single reference
+_current = None
+
+
+def get_tariff_table():
+    """
+    Return the active tariff, recompiling it when the pricing config changes on disk.
+    The file is checked at most once per TARIFF_RELOAD_INTERVAL.
+    """
+    current = _current
+    if current is not None and time.monotonic() < current[1]:
+        return current[2]
+    return _reload_if_changed()
+
+
+def _reload_if_changed():
+    global _current
+
+    with _reload_lock:
+        current = _current
+        now = time.monotonic()
+        if current is not None and now < current[1]:
+            return current[2]
+
+        mtime = os.stat(PRICING_CONFIG_PATH).st_mtime_ns
+        table = current[2] if current is not None else None
+        if current is None or mtime != current[0]:
+            try:
+                table = load_tariff_table(PRICING_CONFIG_PATH)
+            except Exception:
+                # Keep serving the old tariff while the file is being edited
+                if table is None:
+                    raise
+                mtime = current[0]
+
+        _current = (mtime, now + TARIFF_RELOAD_INTERVAL, table)
+        return table
@@ -0,0 +1,285 @@
+"""
+Synthetic lot traffic for load tests, benchmarks and hardware sizing.
+
+Plates and frequent parking numbers are always valid, arrivals follow hourly
+profiles per day type and stay lengths depend on the tariff period the car
+arrives in. The same seed always produces the same output.
+
+    python -m src.utils.workload_generator events --cars 10000 --days 7 --output events.csv
+    python -m src.utils.workload_generator populate --data-dir /tmp/lot --cars 100000 --visits 50
+"""
+
+import argparse
+import csv
+import heapq
+import json
+import math
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from config.settings import DATE_FORMAT
+from src.services.event_ingest_service import EVENT_FIELDS
+from src.services.pricing_service import PricingService
+from src.utils.datetime_helper import get_day_type, get_time_period
+
+# Plate space of CAR_IDENTITY_PATTERN: 2 digits, 1 letter, 5 digits
+PLATE_SPACE = 100 * 26 * 100000
+
+# Relative arrivals per hour of day (0-23)
+HOURLY_ARRIVAL_WEIGHTS = {
+    'weekday': (1, 1, 1, 1, 1, 2, 5, 12, 16, 12, 9, 8, 9, 8, 7, 7, 8, 10, 9, 7, 5, 3, 2, 1),
+    'saturday': (1, 1, 1, 1, 1, 1, 2, 3, 6, 9, 11, 12, 12, 11, 10, 9, 9, 9, 10, 10, 8, 6, 3, 2),
+    'sunday': (1, 1, 1, 1, 1, 1, 1, 2, 4, 7, 9, 10, 10, 10, 9, 8, 8, 7, 7, 6, 4, 3, 2, 1),
+}
+
+# Share of weekday traffic on each day type
+DAY_TYPE_TRAFFIC = {'weekday': 1.0, 'saturday': 0.8, 'sunday': 0.6}
+
+# Stay lengths by arrival day type and period: (probability, median hours, spread) mixtures
+STAY_PROFILES = {
+    ('weekday', '00:00-07:59'): ((0.7, 5.0, 0.4), (0.3, 1.0, 0.6)),
+    ('weekday', '08:00-16:59'): ((0.6, 1.5, 0.6), (0.35, 8.5, 0.15), (0.05, 60.0, 0.8)),
+    ('weekday', '17:00-23:59'): ((0.8, 2.5, 0.5), (0.2, 13.0, 0.2)),
+    ('saturday', '00:00-07:59'): ((0.8, 4.0, 0.5), (0.2, 1.0, 0.6)),
+    ('saturday', '08:00-16:59'): ((0.9, 3.0, 0.5), (0.1, 30.0, 0.6)),
+    ('saturday', '17:00-23:59'): ((0.75, 3.0, 0.4), (0.25, 12.0, 0.3)),
+    ('sunday', '00:00-07:59'): ((0.8, 4.0, 0.5), (0.2, 1.0, 0.6)),
+    ('sunday', '08:00-16:59'): ((0.9, 4.0, 0.5), (0.1, 20.0, 0.5)),
+    ('sunday', '17:00-23:59'): ((0.85, 2.0, 0.5), (0.15, 14.0, 0.2)),
+}
+
+MIN_STAY_MINUTES = 10
+MAX_STAY_MINUTES = 60 * 24 * 30
+
+
+def frequent_parking_number(first_four_digits):
+    """Append the modulo 11 check digit to a 4-digit number"""
+    digits = f"{first_four_digits:04d}"
+    check_digit = sum(int(digit) * weight for digit, weight in zip(digits, (5, 4, 3, 2))) % 11
+    return digits + str(0 if check_digit == 10 else check_digit)
+
+
+class WorkloadGenerator:
+    """
+    Seeded generator of cars, gate events and payment histories.
+    Car i always maps to the same plate and membership for a given seed.
+    """
+
+    def __init__(self, seed=0, cars=1000, member_ratio=0.2):
+        if not 0 < cars <= PLATE_SPACE:
+            raise ValueError(f"cars must be between 1 and {PLATE_SPACE}")
+        self.seed = seed
+        self.cars = cars
+        self.member_ratio = member_ratio
+
+        # Cars are spread over the plate space by an affine bijection, so plates
+        # are unique without storing them
+        rng = random.Random(seed)
+        multiplier = rng.randrange(1, PLATE_SPACE)
+        while math.gcd(multiplier, PLATE_SPACE) != 1:
+            multiplier += 1
+        self._plate_multiplier = multiplier
+        self._plate_offset = rng.randrange(PLATE_SPACE)
+        self._member_salt = rng.getrandbits(32)
+
+    def plate(self, car_index):
+        """Car identity matching CAR_IDENTITY_PATTERN, unique per index"""
+        n = (car_index * self._plate_multiplier + self._plate_offset) % PLATE_SPACE
+        prefix, rest = divmod(n, 26 * 100000)
+        letter, digits = divmod(rest, 100000)
+        return f"{prefix:02d}{chr(65 + letter)}-{digits:05d}"
+
+    def frequent_number(self, car_index):
+        """Frequent parking number of a member car, None for other cars"""
+        member_hash = (car_index * 2654435761 + self._member_salt) & 0xFFFFFFFF
+        if member_hash >= self.member_ratio * 0x100000000:
+            return None
+        return frequent_parking_number(member_hash % 10000)
+
+    def stay_minutes(self, rng, arrival_time):
+        """Stay length for a car arriving at arrival_time"""
+        profile = STAY_PROFILES[(get_day_type(arrival_time), get_time_period(arrival_time))]
+        pick = rng.random()
+        for probability, median_hours, spread in profile:
+            pick -= probability
+            if pick <= 0:
+                break
+        minutes = int(rng.lognormvariate(math.log(median_hours * 60), spread))
+        return min(max(minutes, MIN_STAY_MINUTES), MAX_STAY_MINUTES)
+
+    def iter_arrival_times(self, rng, start, days, arrivals_per_day):
+        """Arrival times over the given days, denser in busy hours"""
+        for day in range(days):
+            day_start = start + timedelta(days=day)
+            day_type = get_day_type(day_start)
+            weights = HOURLY_ARRIVAL_WEIGHTS[day_type]
+            daily_total = arrivals_per_day * DAY_TYPE_TRAFFIC[day_type]
+            for hour, weight in enumerate(weights):
+                rate = daily_total * weight / sum(weights) / 60  # arrivals per minute
+                minute = rng.expovariate(rate) if rate else 60
+                while minute < 60:
+                    yield day_start + timedelta(hours=hour, minutes=int(minute))
+                    minute += rng.expovariate(rate)
+
+    def payment_for(self, rng, fee):
+        """Cash handed over for a fee, rounded up to whole dollars and sometimes to the next $5"""
+        payment = math.ceil(fee)
+        if rng.random() < 0.3:
+            payment = math.ceil(fee / 5) * 5
+        return payment
+
+    def iter_events(self, start=datetime(2024, 1, 1), days=7, arrivals_per_day=None, close_out=True):
+        """
+        Stream park and pickup events in time order, as dicts with EVENT_FIELDS keys.
+        A car is never parked twice at once; with close_out every parked car leaves at the end.
+        """
+        rng = random.Random(self.seed)
+        arrivals_per_day = arrivals_per_day or max(1, self.cars // 2)
+        departures = []  # (departure_time, car_index, arrival_time)
+        parked = set()
+
+        def pickup(departure_time, car_index, arrival_time):
+            parked.discard(car_index)
+            fee = PricingService.calculate_total_fee(
+                arrival_time, departure_time, self.frequent_number(car_index) is not None
+            )
+            return self._event('pickup', car_index, departure_time, payment_amount=self.payment_for(rng, fee))
+
+        for arrival_time in self.iter_arrival_times(rng, start, days, arrivals_per_day):
+            while departures and departures[0][0] <= arrival_time:
+                yield pickup(*heapq.heappop(departures))
+
+            car_index = rng.randrange(self.cars)
+            if car_index in parked:
+                continue
+            parked.add(car_index)
+            departure_time = arrival_time + timedelta(minutes=self.stay_minutes(rng, arrival_time))
+            heapq.heappush(departures, (departure_time, car_index, arrival_time))
+            yield self._event('park', car_index, arrival_time,
+                              frequent_parking_number=self.frequent_number(car_index))
+
+        while close_out and departures:
+            yield pickup(*heapq.heappop(departures))
+
+    def _event(self, event_type, car_index, timestamp, frequent_parking_number=None, payment_amount=None):
+        return {
+            'event': event_type,
+            'car_identity': self.plate(car_index),
+            'timestamp': timestamp.strftime(DATE_FORMAT),
+            'frequent_parking_number': frequent_parking_number,
+            'payment_amount': payment_amount
+        }
+
+    def visit_history(self, car_index, visits, end=datetime(2024, 1, 1)):
+        """
+        Payment records of one car's visits over the year before end, oldest first,
+        with credits carried from visit to visit like ParkingService.pickup_car.
+        Returns (records, final credit balance).
+        """
+        rng = random.Random(f"{self.seed}:{car_index}")
+        has_frequent_parking = self.frequent_number(car_index) is not None
+
+        # Visits are spread over the year before end, one car never overlaps itself
+        arrival_times = sorted(
+            end - timedelta(minutes=rng.randrange(365 * 24 * 60)) for _ in range(visits)
+        )
+        records = []
+        credits = 0.0
+        previous_departure = None
+        for arrival_time in arrival_times:
+            if previous_departure is not None and arrival_time <= previous_departure:
+                arrival_time = previous_departure + timedelta(minutes=rng.randrange(30, 24 * 60))
+            departure_time = arrival_time + timedelta(minutes=self.stay_minutes(rng, arrival_time))
+            previous_departure = departure_time
+
+            total_fee = PricingService.calculate_total_fee(arrival_time, departure_time, has_frequent_parking)
+            credits_used = min(credits, total_fee)
+            fee_after_credits = max(0, total_fee - credits)
+            payment_amount = self.payment_for(rng, fee_after_credits)
+            credits = credits - credits_used + (payment_amount - fee_after_credits)
+
+            records.append({
+                'arrival_time': arrival_time.strftime(DATE_FORMAT),
+                'departure_time': departure_time.strftime(DATE_FORMAT),
+                'total_fee': total_fee,
+                'payment_amount': payment_amount,
+                'credits_used': credits_used,
+                'has_frequent_parking': has_frequent_parking,
+                'timestamp': departure_time.isoformat()
+            })
+        return records, credits
+
+    def populate(self, storage, visits_per_car=20, end=datetime(2024, 1, 1), progress=None):
+        """
+        Fill a storage backend with payment history and credit balances for every car.
+        History aggregates are left to be rebuilt on first use. Returns the number of visits written.
+        """
+        total_visits = 0
+        for car_index in range(self.cars):
+            car_identity = self.plate(car_index)
+            records, credits = self.visit_history(car_index, visits_per_car, end)
+            storage.save_payment_records(car_identity, records)
+            storage.save_credit_balance(car_identity, credits)
+            total_visits += len(records)
+            if progress and (car_index + 1) % 1000 == 0:
+                progress(car_index + 1)
+        return total_visits
+
+
+def write_events(events, path):
+    """Write events as CSV (by .csv suffix) or JSON Lines, streaming; returns the number written"""
+    path = Path(path)
+    count = 0
+    with open(path, 'w', newline='') as f:
+        if path.suffix.lower() == '.csv':
+            writer = csv.DictWriter(f, fieldnames=EVENT_FIELDS)
+            writer.writeheader()
+            for event in events:
+                writer.writerow({key: '' if value is None else value for key, value in event.items()})
+                count += 1
+        else:
+            for event in events:
+                f.write(json.dumps({key: value for key, value in event.items() if value is not None}) + '\n')
+                count += 1
+    return count
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate synthetic parking lot traffic")
+    parser.add_argument('--seed', type=int, default=0, help="same seed, same output")
+    parser.add_argument('--cars', type=int, default=1000, help="number of distinct cars")
+    parser.add_argument('--member-ratio', type=float, default=0.2, help="share of cars with a frequent parking number")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    events = commands.add_parser('events', help="write a park/pickup event file for run.py --ingest")
+    events.add_argument('--output', required=True, help="CSV or JSONL file")
+    events.add_argument('--start', default='2024-01-01', help="first day (YYYY-MM-DD)")
+    events.add_argument('--days', type=int, default=7)
+    events.add_argument('--arrivals-per-day', type=int, help="weekday arrivals, default half the cars")
+
+    populate = commands.add_parser('populate', help="write payment history and credits into a data directory")
+    populate.add_argument('--data-dir', required=True)
+    populate.add_argument('--visits', type=int, default=20, help="visits per car")
+    return parser.parse_args()
+
+
+def main():
+    from src.utils.file_handler import FileHandler
+
+    args = parse_args()
+    generator = WorkloadGenerator(args.seed, args.cars, args.member_ratio)
+    if args.command == 'events':
+        start = datetime.strptime(args.start, '%Y-%m-%d')
+        count = write_events(generator.iter_events(start, args.days, args.arrivals_per_day), args.output)
+        print(f"Wrote {count} events to {args.output}")
+    else:
+        visits = generator.populate(
+            FileHandler(args.data_dir), args.visits,
+            progress=lambda cars: print(f"{cars} cars written", end='\r')
+        )
+        print(f"Wrote {visits} visits for {args.cars} cars to {args.data_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.models.parking_record import ParkingRecord
+from src.utils.datetime_helper import format_epoch_minutes, to_epoch_minutes
+
+
+class TestParkingRecord(unittest.TestCase):
+    def test_round_trip(self):
+        """Test that a record survives to_dict/from_dict unchanged"""
+        record = ParkingRecord('59C-12345', '2025-06-20 09:09', '12348')
+        record.set_departure(datetime(2025, 6, 21, 17, 45, 30), 42.5)
+        record.set_payment(50.0)
+
+        data = record.to_dict()
+        self.assertEqual(data['arrival_time'], '2025-06-20 09:09')
+        self.assertEqual(data['departure_time'], '2025-06-21 17:45')
+
+        copy = ParkingRecord.from_dict(data)
+        self.assertEqual(copy.to_dict(), data)
+        self.assertEqual(copy.arrival_time, datetime(2025, 6, 20, 9, 9))
+        self.assertTrue(copy.has_frequent_parking)
+
+    def test_serialized_once_until_changed(self):
+        """Test that to_dict is cached and refreshed after a change"""
+        record = ParkingRecord('59C-12345', datetime(2025, 6, 20, 9, 9))
+        first = record.to_dict()
+        self.assertIs(record.to_dict(), first)
+        self.assertIsNone(first['departure_time'])
+
+        record.set_departure('2025-06-20 11:00', 20.0)
+        self.assertEqual(record.to_dict()['departure_time'], '2025-06-20 11:00')
+
+    def test_compact_representation(self):
+        """Test that records use slots and integer minutes"""
+        record = ParkingRecord('59C-12345', '2025-06-20 09:09')
+        self.assertFalse(hasattr(record, '__dict__'))
+        self.assertIsInstance(record.arrival_minute, int)
+
+    def test_format_epoch_minutes(self):
+        """Test the fast formatter against strftime"""
+        moment = datetime(1999, 12, 31, 23, 59)
+        for _ in range(200):
+            self.assertEqual(format_epoch_minutes(to_epoch_minutes(moment)), moment.strftime('%Y-%m-%d %H:%M'))
+            moment += timedelta(days=53, minutes=617)
+
+
+if __name__ == '__main__':
+    unittest.main()
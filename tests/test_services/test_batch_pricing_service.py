@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.services.batch_pricing_service import BatchPricingService
+from src.services.pricing_service import PricingService
+from src.utils.datetime_helper import to_epoch_minutes
+from src.utils.tariff_table import TariffTable
+from config.pricing_rates import PRICING_RATES, TIME_LIMITS, FREQUENT_PARKING_DISCOUNTS
+
+class TestBatchPricingService(unittest.TestCase):
+
+    def setUp(self):
+        """Set up the pricing service instances for testing"""
+        self.batch_pricing_service = BatchPricingService()
+        self.pricing_service = PricingService()
+
+    def test_batch_fee_matches_known_cases(self):
+        """Test the documented sample cases through the batch API"""
+        arrival = to_epoch_minutes(datetime(2023, 11, 10, 8, 0))
+        departure = to_epoch_minutes(datetime(2023, 11, 12, 19, 30))
+
+        fees = self.batch_pricing_service.calculate_parking_fees(
+            [arrival, arrival], [departure, departure], [False, True]
+        )
+
+        self.assertEqual(list(fees), [347.00, 262.30])
+
+    def test_batch_fee_matches_per_record_path(self):
+        """Test random stays against PricingService.calculate_parking_fee"""
+        rng = random.Random(42)
+        start = datetime(2023, 1, 1)
+        arrivals, departures, frequent = [], [], []
+        for _ in range(500):
+            arrival = start + timedelta(minutes=rng.randrange(0, 60 * 24 * 60))
+            departure = arrival + timedelta(minutes=rng.choice([
+                rng.randrange(1, 600), rng.randrange(1, 5000), rng.randrange(1, 120000)
+            ]))
+            arrivals.append(arrival)
+            departures.append(departure)
+            frequent.append(rng.random() < 0.5)
+
+        fees = self.batch_pricing_service.calculate_parking_fees(
+            [to_epoch_minutes(dt) for dt in arrivals],
+            [to_epoch_minutes(dt) for dt in departures],
+            frequent
+        )
+
+        for fee, arrival, departure, has_frequent_parking in zip(fees, arrivals, departures, frequent):
+            expected, _ = self.pricing_service.calculate_parking_fee(arrival, departure, has_frequent_parking)
+            self.assertEqual(fee, expected)
+
+    def test_limited_flat_period_matches_per_record_path(self):
+        """Test that a flat period with a time limit is charged like PricingService does"""
+        time_limits = {**TIME_LIMITS, ('weekday', '00:00-07:59'): 4}
+        tariff = TariffTable(PRICING_RATES, time_limits, FREQUENT_PARKING_DISCOUNTS)
+        arrivals = [datetime(2023, 11, 9, 0, 0), datetime(2023, 11, 9, 0, 0), datetime(2023, 11, 8, 22, 0)]
+        departures = [datetime(2023, 11, 9, 3, 0), datetime(2023, 11, 9, 7, 0), datetime(2023, 11, 12, 9, 0)]
+
+        for frequent in (False, True):
+            fees = BatchPricingService(tariff).calculate_parking_fees(
+                [to_epoch_minutes(dt) for dt in arrivals],
+                [to_epoch_minutes(dt) for dt in departures],
+                [frequent] * len(arrivals)
+            )
+            for fee, arrival, departure in zip(fees, arrivals, departures):
+                expected, _ = self.pricing_service.calculate_parking_fee(arrival, departure, frequent, tariff)
+                self.assertEqual(fee, expected)
+
+        # Past the 4 hour limit the night is charged twice
+        self.assertEqual(fees[1], 2 * fees[0])
+
+    def test_departure_before_arrival(self):
+        """Test that invalid stays are rejected"""
+        with self.assertRaises(ValueError):
+            self.batch_pricing_service.calculate_parking_fees([100], [100])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.exceptions.parking_exceptions import ParkingSystemException
+from src.services.event_ingest_service import EventIngestService, iter_events
+from src.services.parking_service import ParkingService
+from src.utils.memory_storage import InMemoryStorage
+
+class TestEventIngestService(unittest.TestCase):
+
+    def setUp(self):
+        """Set up an ingest service on in-memory storage"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = InMemoryStorage()
+        self.ingest_service = EventIngestService(ParkingService(self.storage))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_ingest_csv(self):
+        """Test park and pickup events with their own departure timestamps"""
+        path = os.path.join(self.temp_dir, 'events.csv')
+        with open(path, 'w') as f:
+            f.write("event,car_identity,timestamp,frequent_parking_number,payment_amount\n")
+            f.write("park,50A-12345,2023-11-10 08:00,,\n")
+            f.write("park,51A-12345,2023-11-10 08:00,12348,\n")
+            f.write("pickup,50A-12345,2023-11-12 19:30,,400\n")
+            f.write("pickup,51A-12345,2023-11-12 19:30,,262.30\n")
+
+        stats = self.ingest_service.ingest(iter_events(path))
+
+        self.assertEqual(stats['succeeded'], 4)
+        self.assertEqual(self.storage.load_payment_records('50A-12345')[0]['total_fee'], 347.00)
+        self.assertEqual(self.storage.load_payment_records('51A-12345')[0]['total_fee'], 262.30)
+        self.assertAlmostEqual(self.storage.load_credit_balance('50A-12345'), 53.00)
+
+    def test_errors_do_not_stop_ingest(self):
+        """Test that bad events are reported and the rest are processed"""
+        path = os.path.join(self.temp_dir, 'events.jsonl')
+        events = [
+            {'event': 'park', 'car_identity': 'bad', 'timestamp': '2023-11-10 08:00'},
+            {'event': 'pickup', 'car_identity': '50A-12345', 'timestamp': '2023-11-10 09:00', 'payment_amount': 10},
+            {'event': 'park', 'car_identity': '50A-12345', 'timestamp': '2023-11-10 08:00'},
+            {'event': 'fly', 'car_identity': '50A-12345'},
+        ]
+        with open(path, 'w') as f:
+            for event in events:
+                f.write(json.dumps(event) + '\n')
+            f.write("{not json\n")
+
+        errors = []
+        stats = self.ingest_service.ingest(
+            iter_events(path), on_error=lambda line, event, error: errors.append(line)
+        )
+
+        self.assertEqual(stats['processed'], 5)
+        self.assertEqual(stats['succeeded'], 1)
+        self.assertEqual(errors, [1, 2, 4, 5])
+
+    def test_non_object_lines_are_invalid_events(self):
+        """Test that JSON lines which are not objects are reported as invalid events"""
+        path = os.path.join(self.temp_dir, 'events.jsonl')
+        with open(path, 'w') as f:
+            f.write('[]\n"x"\n')
+
+        errors = []
+        stats = self.ingest_service.ingest(
+            iter_events(path), on_error=lambda line, event, error: errors.append((line, str(error)))
+        )
+
+        self.assertEqual(stats['failed'], 2)
+        self.assertEqual(errors, [
+            (1, "Invalid event: must be a JSON object"), (2, "Invalid event: must be a JSON object")
+        ])
+        with self.assertRaises(ParkingSystemException):
+            self.ingest_service.process_event(['park'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import unittest
+import sys
+import os
+from datetime import datetime, timedelta
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.models.parking_record import ParkingRecord
+from src.services.fee_accrual_tracker import FeeAccrualTracker
+from src.services.pricing_service import PricingService
+from src.utils.tariff_table import get_tariff_table, load_tariff_table
+from config.settings import PRICING_CONFIG_PATH
+
+class TestFeeAccrualTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = FeeAccrualTracker(get_tariff_table())
+
+    def assert_matches_pricing(self, arrival_time, has_frequent_parking, hours, step=timedelta(minutes=7)):
+        """Tick the tracker minute by minute and compare with a full calculation each time"""
+        self.tracker.track('59C-12345', arrival_time, has_frequent_parking)
+        now = arrival_time + step
+        while now <= arrival_time + timedelta(hours=hours):
+            expected = PricingService.calculate_total_fee(arrival_time, now, has_frequent_parking)
+            self.assertEqual(self.tracker.fee('59C-12345', now), expected, f"at {now}")
+            now += step
+
+    def test_weekday_two_hour_limit(self):
+        """Test ticking through the weekday daytime limit and into the evening"""
+        self.assert_matches_pricing(datetime(2024, 3, 8, 8, 0), False, 12)
+
+    def test_saturday_four_hour_limit(self):
+        """Test ticking through the Saturday daytime limit"""
+        self.assert_matches_pricing(datetime(2024, 3, 9, 7, 30), True, 12)
+
+    def test_sunday_eight_hour_limit_across_midnight(self):
+        """Test ticking through the Sunday limit, midnight and the Monday night rate"""
+        self.assert_matches_pricing(datetime(2024, 3, 10, 6, 45), False, 30, timedelta(minutes=13))
+
+    def test_long_gap_between_ticks(self):
+        """Test a first tick days after arrival and a look back at an earlier time"""
+        arrival_time = datetime(2024, 3, 4, 9, 10)
+        self.tracker.track('59C-12345', arrival_time)
+        later = arrival_time + timedelta(days=9, hours=3)
+        earlier = arrival_time + timedelta(hours=5)
+
+        self.assertEqual(self.tracker.fee('59C-12345', later), PricingService.calculate_total_fee(arrival_time, later))
+        self.assertEqual(self.tracker.fee('59C-12345', earlier), PricingService.calculate_total_fee(arrival_time, earlier))
+        self.assertEqual(self.tracker.fee('59C-12345', arrival_time), 0.0)
+
+    def test_sync_with_parked_cars(self):
+        """Test that sync adds new cars, drops departed ones and restarts re-parked ones"""
+        first = ParkingRecord('59C-12345', datetime(2024, 3, 8, 8, 0))
+        second = ParkingRecord('59C-12346', datetime(2024, 3, 8, 9, 0), '12348')
+        self.tracker.sync([first, second])
+        self.assertEqual(self.tracker.refresh(datetime(2024, 3, 8, 10, 0)), {'59C-12345': 20.0, '59C-12346': 9.0})
+
+        again = ParkingRecord('59C-12346', datetime(2024, 3, 8, 17, 0), '12348')
+        self.tracker.sync([again])
+
+        self.assertNotIn('59C-12345', self.tracker)
+        self.assertEqual(self.tracker.refresh(datetime(2024, 3, 8, 19, 0)), {'59C-12346': 5.0})
+
+    def test_tariff_reload_restarts_accrual(self):
+        """Test that a new tariff reprices the cars from arrival"""
+        tracker = FeeAccrualTracker()
+        tracker.track('59C-12345', datetime(2024, 3, 8, 8, 0))
+        tracker.fee('59C-12345', datetime(2024, 3, 8, 12, 0))
+
+        reloaded = load_tariff_table(PRICING_CONFIG_PATH)
+        tracker._fixed_tariff = reloaded
+        departure_time = datetime(2024, 3, 8, 18, 30)
+
+        self.assertEqual(
+            tracker.fee('59C-12345', departure_time),
+            PricingService.calculate_total_fee(datetime(2024, 3, 8, 8, 0), departure_time, tariff=reloaded)
+        )
+        self.assertIs(tracker._tariff, reloaded)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+import sys
+import os
+import asyncio
+import json
+import threading
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.gate_server import GateServer
+from src.services.parking_service import ParkingService
+from src.utils.memory_storage import InMemoryStorage
+
+class TestGateServer(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        """Start a gate server on a free local port"""
+        self.storage = InMemoryStorage()
+        self.server = GateServer(ParkingService(self.storage), max_workers=4)
+        self.host, self.port = await self.server.start('127.0.0.1', 0)
+
+    async def asyncTearDown(self):
+        await self.server.close()
+
+    async def send(self, *requests):
+        """Open one lane connection and send requests in order"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        responses = []
+        for request in requests:
+            writer.write((json.dumps(request) + '\n').encode())
+            await writer.drain()
+            responses.append(json.loads(await reader.readline()))
+        writer.close()
+        await writer.wait_closed()
+        return responses
+
+    async def test_park_quote_pickup(self):
+        """Test a full cycle over the line-delimited JSON protocol"""
+        park, quote, pickup, count = await self.send(
+            {'id': 1, 'op': 'park', 'car_identity': '50A-12345', 'timestamp': '2023-11-10 08:00'},
+            {'id': 2, 'op': 'quote', 'car_identity': '50A-12345', 'timestamp': '2023-11-12 19:30'},
+            {'id': 3, 'op': 'pickup', 'car_identity': '50A-12345', 'timestamp': '2023-11-12 19:30',
+             'payment_amount': 347},
+            {'id': 4, 'op': 'count'},
+        )
+
+        self.assertTrue(park['ok'])
+        self.assertEqual(quote['result']['total_fee'], 347.00)
+        self.assertEqual(pickup['id'], 3)
+        self.assertEqual(pickup['result']['new_credits'], 0)
+        self.assertEqual(count['result'], 0)
+
+    async def test_quote_commit(self):
+        """Test the two-phase pickup: the commit charges the quoted fee"""
+        park, quote = await self.send(
+            {'op': 'park', 'car_identity': '50A-12345', 'timestamp': '2024-03-08 08:00'},
+            {'op': 'quote', 'car_identity': '50A-12345', 'timestamp': '2024-03-08 10:00', 'details': True},
+        )
+        token = quote['result']['quote_token']
+        commit, again = await self.send(
+            {'op': 'commit', 'quote_token': token, 'payment_amount': 20},
+            {'op': 'commit', 'quote_token': token, 'payment_amount': 20},
+        )
+
+        self.assertEqual(quote['result']['total_fee'], 20.0)
+        self.assertEqual(quote['result']['calculation_details'][0]['hours'], 2)
+        self.assertEqual(commit['result']['total_fee'], 20.0)
+        self.assertNotIn('calculation_details', commit['result'])
+        self.assertFalse(again['ok'])
+        self.assertIn('quote', again['error'])
+
+    async def test_fees_so_far(self):
+        """Test the running fees shown on the lane displays"""
+        responses = await self.send(
+            {'op': 'park', 'car_identity': '50A-12345', 'timestamp': '2024-03-08 08:00'},
+            {'op': 'park', 'car_identity': '50A-12346', 'timestamp': '2024-03-09 08:00'},
+            {'op': 'fees', 'timestamp': '2024-03-09 10:00'},
+            {'op': 'pickup', 'car_identity': '50A-12345', 'timestamp': '2024-03-09 10:00',
+             'payment_amount': 1000},
+            {'op': 'fees', 'timestamp': '2024-03-09 10:00'},
+        )
+
+        self.assertEqual(responses[2]['result']['50A-12346'], 6.0)
+        self.assertEqual(responses[2]['result']['50A-12345'], responses[3]['result']['total_fee'])
+        self.assertEqual(responses[4]['result'], {'50A-12346': 6.0})
+
+    async def test_fees_refresh_off_the_event_loop(self):
+        """Test that the fee refresh runs in the worker pool, not on the event loop"""
+        refresh = self.server.fee_tracker.refresh
+        threads = []
+
+        def record_thread(now=None):
+            threads.append(threading.current_thread().name)
+            return refresh(now)
+
+        self.server.fee_tracker.refresh = record_thread
+        await self.send({'op': 'fees', 'timestamp': '2024-03-09 10:00'})
+
+        self.assertTrue(threads[0].startswith('gate'))
+
+    async def test_concurrent_lanes_same_plate(self):
+        """Test that two lanes parking the same car cannot both succeed"""
+        request = {'op': 'park', 'car_identity': '50A-12345', 'timestamp': '2023-11-10 08:00'}
+        results = await asyncio.gather(*(self.send(request) for _ in range(6)))
+
+        self.assertEqual(sum(responses[0]['ok'] for responses in results), 1)
+
+    async def test_invalid_request(self):
+        """Test error responses for malformed requests"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        writer.write(b'not json\n{"op": "fly"}\n')
+        await writer.drain()
+        first = json.loads(await reader.readline())
+        second = json.loads(await reader.readline())
+        writer.close()
+        await writer.wait_closed()
+
+        self.assertFalse(first['ok'])
+        self.assertIn('Unknown operation', second['error'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.parking_service import ParkingService
+from src.utils.file_handler import FileHandler
+
+class TestHistoryExport(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a parking service on a temporary data directory"""
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        self.parking_service = ParkingService(FileHandler(self.data_dir))
+
+    def visit(self, arrival, departure, payment):
+        self.parking_service.park_car('50A-12345', arrival)
+        return self.parking_service.pickup_car('50A-12345', payment, departure)
+
+    def read_history(self):
+        with open(self.data_dir / 'history' / '50A-12345.txt', encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_incremental_export(self):
+        """Test that only new payments are appended and the header is kept current"""
+        self.visit('2023-11-10 08:00', '2023-11-10 10:00', '20')
+        self.visit('2023-11-11 08:00', '2023-11-11 10:00', '10')
+
+        result = self.parking_service.generate_history('50A-12345')
+        self.assertEqual(result['new_records_count'], 2)
+        self.assertEqual(result['total_payments'], 30)
+
+        self.visit('2023-11-12 08:00', '2023-11-12 10:00', '10')
+        result = self.parking_service.generate_history('50A-12345')
+
+        self.assertEqual(result['new_records_count'], 1)
+        self.assertEqual(result['records_count'], 3)
+        self.assertAlmostEqual(result['available_credits'], 10.00)
+
+        lines = self.read_history()
+        self.assertEqual(lines[0], 'Total payment: $40.00')
+        self.assertEqual(lines[1], 'Available credits: $10.00')
+        self.assertEqual(lines[2], 'Parked Dates:')
+        self.assertEqual(lines[3:], [
+            '2023-11-10 08:00 – 2023-11-10 10:00 $20.00',
+            '2023-11-11 08:00 – 2023-11-11 10:00 $6.00',
+            '2023-11-12 08:00 – 2023-11-12 10:00 $4.00',
+        ])
+
+        # Nothing new: the file is left as it is
+        self.assertEqual(self.parking_service.generate_history('50A-12345')['new_records_count'], 0)
+        self.assertEqual(len(self.read_history()), 6)
+
+    def test_interrupted_export_does_not_repeat_lines(self):
+        """Test that an export whose summary was not saved leaves each visit once in the file"""
+        self.visit('2023-11-10 08:00', '2023-11-10 10:00', '20')
+        self.parking_service.generate_history('50A-12345')
+        self.visit('2023-11-11 08:00', '2023-11-11 10:00', '10')
+
+        storage = self.parking_service.storage
+        with mock.patch.object(storage, 'save_history_summary', side_effect=OSError("crash")):
+            with self.assertRaises(Exception):
+                self.parking_service.generate_history('50A-12345')
+        self.assertEqual(len(self.read_history()), 5)
+
+        result = self.parking_service.generate_history('50A-12345')
+
+        self.assertEqual(result['new_records_count'], 1)
+        self.assertEqual(self.read_history(), [
+            'Total payment: $30.00',
+            'Available credits: $4.00',
+            'Parked Dates:',
+            '2023-11-10 08:00 – 2023-11-10 10:00 $20.00',
+            '2023-11-11 08:00 – 2023-11-11 10:00 $6.00',
+        ])
+
+    def test_deleted_export_is_rebuilt(self):
+        """Test that a history file removed after an export is written again in full"""
+        self.visit('2023-11-10 08:00', '2023-11-10 10:00', '20')
+        self.parking_service.generate_history('50A-12345')
+        os.remove(self.data_dir / 'history' / '50A-12345.txt')
+
+        result = self.parking_service.generate_history('50A-12345')
+
+        self.assertEqual(result['new_records_count'], 1)
+        self.assertEqual(self.read_history()[3:], ['2023-11-10 08:00 – 2023-11-10 10:00 $20.00'])
+
+    def test_date_filtered_export_and_pages(self):
+        """Test arrival date filters and offset/limit pagination"""
+        self.visit('2023-11-10 08:00', '2023-11-10 10:00', '20')
+        self.visit('2023-11-11 08:00', '2023-11-11 10:00', '10')
+        self.visit('2023-11-12 08:00', '2023-11-12 10:00', '10')
+
+        result = self.parking_service.generate_history('50A-12345', '2023-11-11', '2023-11-12')
+
+        self.assertEqual(result['records_count'], 2)
+        self.assertEqual(result['total_payments'], 20)
+        with open(result['filename'], encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], 'Total payment: $20.00')
+        self.assertEqual(len(lines), 5)
+
+        pages = [
+            list(self.parking_service.iter_history_lines('50A-12345', offset=offset, limit=2))
+            for offset in (0, 2, 4)
+        ]
+        self.assertEqual([len(page) for page in pages], [2, 1, 0])
+        self.assertTrue(pages[1][0].startswith('2023-11-12 08:00'))
+
+        later = list(self.parking_service.iter_history_lines('50A-12345', arrival_from='2023-11-12'))
+        self.assertEqual(len(later), 1)
+
+    def test_history_without_aggregates(self):
+        """Test that existing payment logs without aggregates are exported in full"""
+        payments_file = self.data_dir / 'payments' / '50A_12345_payments.json'
+        with open(payments_file, 'w') as f:
+            json.dump([{
+                'arrival_time': '2025-06-19 11:11',
+                'departure_time': '2025-06-19 16:56',
+                'total_fee': 57.61,
+                'payment_amount': 60.0,
+                'credits_used': 0.0
+            }], f)
+
+        result = self.parking_service.generate_history('50A-12345')
+
+        self.assertEqual(result['records_count'], 1)
+        self.assertEqual(result['total_payments'], 60.0)
+        self.assertEqual(self.read_history()[3], '2025-06-19 11:11 – 2025-06-19 16:56 $57.61')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.parking_service import ParkingService
+from src.exceptions.parking_exceptions import ParkingSystemException
+from src.utils.file_handler import FileHandler
+from src.utils.memory_storage import InMemoryStorage
+
+class TestOccupancyIndex(unittest.TestCase):
+
+    def setUp(self):
+        """Set up storage with one car already parked before startup"""
+        self.storage = InMemoryStorage()
+        self.storage.save_parking_record('65C-12345', {
+            'car_identity': '65C-12345',
+            'arrival_time': '2025-06-20 09:09',
+            'departure_time': None,
+            'frequent_parking_number': None,
+            'total_fee': None,
+            'payment_amount': None,
+            'created_at': '2025-06-20 10:12'
+        })
+        self.parking_service = ParkingService(self.storage)
+
+    def test_index_built_at_startup(self):
+        """Test that existing parking records are loaded into the index"""
+        self.assertEqual(self.parking_service.count_parked_cars(), 1)
+        self.assertIn('65C-12345', self.parking_service.occupancy)
+
+    def test_duplicate_check_uses_index_for_unshared_storage(self):
+        """Test that parking with process-local storage does not read the record back"""
+        with mock.patch.object(self.storage, 'load_parking_record') as load_parking_record:
+            self.parking_service.park_car('59C-12345', '2025-06-20 10:00')
+            with self.assertRaises(ParkingSystemException):
+                self.parking_service.park_car('65C-12345', '2025-06-20 10:00')
+
+        load_parking_record.assert_not_called()
+
+    def test_record_removed_during_startup_is_skipped(self):
+        """Test that a record picked up by another process while the index is built is ignored"""
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        file_handler = FileHandler(data_dir)
+        file_handler.save_parking_record('59C-12345', {'car_identity': '59C-12345', 'arrival_time': '2025-06-20 10:00'})
+        gone = file_handler.parking_records_dir / '60C_12345.json'
+
+        with mock.patch.object(Path, 'glob', return_value=[gone, file_handler._record_file('59C-12345')]):
+            parking_service = ParkingService(file_handler)
+
+        self.assertEqual(parking_service.count_parked_cars(), 1)
+
+    def test_indexed_record_keeps_no_dict(self):
+        """Test that the record in the index does not hold on to its serialized dict"""
+        self.parking_service.park_car('59C-12345', '2025-06-20 10:00', '12348')
+
+        self.assertIsNone(self.parking_service.occupancy.get('59C-12345')._data)
+
+    def test_index_follows_park_and_pickup(self):
+        """Test that park and pickup keep the index up to date"""
+        self.parking_service.park_car('59C-12345', '2025-06-20 10:00', '12348')
+
+        self.assertEqual(self.parking_service.count_parked_cars(), 2)
+        active_car = self.parking_service.occupancy.get('59C-12345')
+        self.assertTrue(active_car.has_frequent_parking)
+        self.assertEqual(
+            sorted(car.car_identity for car in self.parking_service.iter_parked_cars()),
+            ['59C-12345', '65C-12345']
+        )
+
+        self.parking_service.pickup_car('59C-12345', '10000000')
+
+        self.assertEqual(self.parking_service.count_parked_cars(), 1)
+        self.assertNotIn('59C-12345', self.parking_service.occupancy)
+
+    def test_pickup_by_other_process_is_noticed(self):
+        """Test that a car picked up through another gate process can park here again"""
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        entry = ParkingService(FileHandler(data_dir))
+        exit_lane = ParkingService(FileHandler(data_dir))
+
+        entry.park_car('59C-22222', '2025-06-20 08:00')
+        exit_lane.pickup_car('59C-22222', '10000000', '2025-06-20 10:00')
+        entry.park_car('59C-22222', '2025-06-20 12:00')
+
+        self.assertEqual(entry.count_parked_cars(), 1)
+        self.assertEqual(entry.occupancy.get('59C-22222').arrival_time.hour, 12)
+        with self.assertRaises(ParkingSystemException):
+            exit_lane.park_car('59C-22222', '2025-06-20 13:00')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.parking_service import ParkingService
+from src.utils.memory_storage import InMemoryStorage
+from src.services.pricing_service import PricingService
+from src.exceptions.parking_exceptions import (
+    ParkingSystemException, CarNotFoundException, InsufficientPaymentException, QuoteExpiredException
+)
+
+class TestParkingService(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a parking service on in-memory storage"""
+        self.storage = InMemoryStorage()
+        self.parking_service = ParkingService(self.storage)
+
+    def test_park_and_pickup(self):
+        """Test a full park/pickup cycle without touching the filesystem"""
+        self.parking_service.park_car('59C-12345', '2023-11-10 08:00', '12348')
+        self.assertIsNotNone(self.storage.load_parking_record('59C-12345'))
+
+        result = self.parking_service.pickup_car('59C-12345', '10000000')
+
+        self.assertIsNone(self.storage.load_parking_record('59C-12345'))
+        self.assertEqual(len(self.storage.load_payment_records('59C-12345')), 1)
+        self.assertAlmostEqual(result['new_credits'], 10000000 - result['total_fee'])
+        self.assertAlmostEqual(self.storage.load_credit_balance('59C-12345'), result['new_credits'])
+
+        history = self.parking_service.generate_history('59C-12345')
+        self.assertEqual(history['records_count'], 1)
+        self.assertIn(history['filename'], self.storage.history_files)
+
+    def test_park_twice(self):
+        """Test that a parked car cannot be parked again"""
+        self.parking_service.park_car('59C-12345', '2023-11-10 08:00')
+
+        with self.assertRaises(ParkingSystemException):
+            self.parking_service.park_car('59C-12345', '2023-11-10 09:00')
+
+    def test_pickup_unknown_car(self):
+        """Test picking up a car that is not parked"""
+        with self.assertRaises(CarNotFoundException):
+            self.parking_service.pickup_car('59C-12345', '10')
+
+    def test_commit_charges_quote_without_repricing(self):
+        """Test that commit_pickup charges the quoted fee and departure time"""
+        self.parking_service.park_car('59C-12345', '2024-03-08 08:00')
+        quote = self.parking_service.quote_pickup('59C-12345', '2024-03-08 10:00')
+
+        self.assertEqual(quote['total_fee'], 20.0)
+        self.assertEqual(sum(detail['fee'] for detail in quote['calculation_details']), 20.0)
+
+        with mock.patch.object(PricingService, 'calculate_total_fee', side_effect=AssertionError), \
+                mock.patch.object(PricingService, 'calculate_parking_fee', side_effect=AssertionError):
+            result = self.parking_service.commit_pickup(quote['quote_token'], '25')
+
+        self.assertEqual(result['total_fee'], 20.0)
+        self.assertEqual(result['new_credits'], 5.0)
+        payment = self.storage.load_payment_records('59C-12345')[0]
+        self.assertEqual(payment['departure_time'], '2024-03-08 10:00')
+        self.assertIsNone(self.parking_service.get_quote(quote['quote_token']))
+
+    def test_pickup_details_are_built_on_demand(self):
+        """Test that the pickup result carries a breakdown that is only walked when read"""
+        self.parking_service.park_car('59C-12345', '2024-03-08 08:00')
+
+        with mock.patch.object(PricingService, 'iter_calculation_details',
+                               wraps=PricingService.iter_calculation_details) as iter_details:
+            result = self.parking_service.pickup_car('59C-12345', '1000', '2024-03-08 19:00')
+            self.assertEqual(iter_details.call_count, 0)
+            calculation_details = list(result['calculation_details'])
+
+        self.assertEqual([detail['flag'] for detail in calculation_details], ['normal', 'exceed_time', 'normal'])
+        self.assertEqual(sum(detail['fee'] for detail in calculation_details), result['total_fee'])
+
+    def test_quote_stays_open_after_rejected_payment(self):
+        """Test that an insufficient payment can be retried on the same quote"""
+        self.parking_service.park_car('59C-12345', '2024-03-08 08:00')
+        quote = self.parking_service.quote_pickup('59C-12345', '2024-03-08 10:00')
+
+        with self.assertRaises(InsufficientPaymentException):
+            self.parking_service.commit_pickup(quote['quote_token'], '10')
+        result = self.parking_service.commit_pickup(quote['quote_token'], '20')
+
+        self.assertEqual(result['payment_amount'], 20.0)
+        with self.assertRaises(QuoteExpiredException):
+            self.parking_service.commit_pickup(quote['quote_token'], '20')
+
+    def test_expired_quote(self):
+        """Test that a quote past its time to live is refused"""
+        parking_service = ParkingService(self.storage, quote_ttl=0)
+        parking_service.park_car('59C-12345', '2024-03-08 08:00')
+        quote = parking_service.quote_pickup('59C-12345', '2024-03-08 10:00')
+
+        with self.assertRaises(QuoteExpiredException):
+            parking_service.commit_pickup(quote['quote_token'], '20')
+        self.assertIsNotNone(self.storage.load_parking_record('59C-12345'))
+
+    def test_quote_for_changed_stay_is_refused(self):
+        """Test that a quote cannot charge a stay that changed after it was made"""
+        self.parking_service.park_car('59C-12345', '2024-03-08 08:00')
+        quote = self.parking_service.quote_pickup('59C-12345', '2024-03-08 10:00')
+        self.parking_service.pickup_car('59C-12345', '20', '2024-03-08 10:00')
+
+        with self.assertRaises(CarNotFoundException):
+            self.parking_service.commit_pickup(quote['quote_token'], '20')
+
+        self.parking_service.park_car('59C-12345', '2024-03-09 08:00')
+        with self.assertRaises(QuoteExpiredException):
+            self.parking_service.commit_pickup(quote['quote_token'], '20')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 import sys
 import os
+from datetime import timedelta
+from unittest import mock
 
 # Add the parent directory to the path so Python can find the src module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
@@ -43,6 +45,45 @@ class TestPricingService(unittest.TestCase):
         # Check if the fee is calculated correctly
         self.assertEqual(fee, 262.30)
 
+    def test_total_fee_matches_period_walk(self):
+        """Test the closed-form total against the full period walk for long stays"""
+        arrivals = ['2023-11-10 08:00', '2023-11-11 23:15', '2023-11-13 00:00', '2023-11-15 16:59']
+        durations = [timedelta(hours=2), timedelta(days=6, hours=23), timedelta(days=8, minutes=1),
+                     timedelta(days=30, hours=5), timedelta(days=92, hours=17, minutes=42)]
+
+        for arrival_str in arrivals:
+            arrival_time = self.validation_service.validate_datetime(arrival_str)
+            for duration in durations:
+                for has_frequent_parking in (False, True):
+                    details = self.pricing_service.iter_calculation_details(
+                        arrival_time, arrival_time + duration, has_frequent_parking
+                    )
+                    expected = round(sum(detail['fee'] for detail in details), 2)
+                    fee = self.pricing_service.calculate_total_fee(
+                        arrival_time, arrival_time + duration, has_frequent_parking
+                    )
+                    self.assertEqual(fee, expected)
+
+    def test_calculation_details_are_lazy(self):
+        """Test that the breakdown is only built when iterated and can be iterated again"""
+        arrival_time = self.validation_service.validate_datetime('2023-11-10 08:00')
+        departure_time = self.validation_service.validate_datetime('2023-11-12 19:30')
+
+        with mock.patch.object(PricingService, 'iter_calculation_details',
+                               wraps=PricingService.iter_calculation_details) as iter_details:
+            fee, calculation_details = self.pricing_service.calculate_parking_fee(arrival_time, departure_time)
+            self.assertEqual(iter_details.call_count, 0)
+
+            first = list(calculation_details)
+            second = list(calculation_details)
+
+        self.assertEqual(iter_details.call_count, 2)
+        self.assertEqual(first, second)
+        self.assertEqual(round(sum(detail['fee'] for detail in first), 2), fee)
+        self.assertEqual(len(calculation_details), len(first))
+        self.assertEqual(calculation_details[0]['period'], '08:00-16:59')
+        self.assertEqual(calculation_details[0]['flag'], 'normal')
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.parking_service import ParkingService
+from src.services.revenue_report_service import RevenueReportService
+from src.utils.file_handler import FileHandler
+
+class TestRevenueReportService(unittest.TestCase):
+
+    def setUp(self):
+        """Record a few pickups on a temporary data directory"""
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        parking_service = ParkingService(FileHandler(self.data_dir))
+
+        visits = [
+            ('50A-12345', None, '2023-11-10 08:00', '2023-11-10 10:00', '25'),  # Friday, $20
+            ('50A-12345', None, '2023-11-11 08:00', '2023-11-11 10:00', '6'),   # Saturday, $6
+            ('51B-54321', '12348', '2023-11-13 17:00', '2023-11-13 19:00', '10'),  # Monday evening, member
+        ]
+        for car_identity, frequent_number, arrival, departure, payment in visits:
+            parking_service.park_car(car_identity, arrival, frequent_number)
+            parking_service.pickup_car(car_identity, payment, departure)
+
+        # A legacy array file without the member flag
+        with open(self.data_dir / 'payments' / '52C-11111_payments.json', 'w') as f:
+            json.dump([{
+                'arrival_time': '2023-12-03 08:00', 'departure_time': '2023-12-03 09:00',
+                'total_fee': 2.0, 'payment_amount': 2.0, 'credits_used': 0
+            }], f)
+
+    def report(self, max_workers):
+        return RevenueReportService(
+            self.data_dir / 'payments', self.data_dir / 'credits', max_workers
+        ).generate_report()
+
+    def test_report_totals(self):
+        """Test revenue buckets, breakdowns and credit liability"""
+        report = self.report(1)
+
+        self.assertEqual(report['cars'], 3)
+        self.assertEqual(report['total_visits'], 4)
+        self.assertAlmostEqual(report['total_revenue'], 20 + 6 + 5 + 2)
+        self.assertEqual(report['daily']['2023-11-10'], {'revenue': 20.0, 'visits': 1})
+        self.assertEqual(report['weekly']['2023-W45'], {'revenue': 26.0, 'visits': 2})
+        self.assertEqual(report['monthly']['2023-12'], {'revenue': 2.0, 'visits': 1})
+        self.assertEqual(report['by_day_type'], {'saturday': 6.0, 'sunday': 2.0, 'weekday': 25.0})
+        self.assertEqual(report['by_period'], {'08:00-16:59': 28.0, '17:00-23:59': 5.0})
+        self.assertAlmostEqual(report['credit_liability'], 5 + 5)
+        self.assertEqual(report['cars_with_credit'], 2)
+
+    def test_process_pool_matches_single_process(self):
+        """Test that sharding across worker processes does not change the result"""
+        single = self.report(1)
+        pooled = self.report(2)
+        del single['elapsed_seconds'], pooled['elapsed_seconds']
+        self.assertEqual(single, pooled)
+
+if __name__ == '__main__':
+    unittest.main()
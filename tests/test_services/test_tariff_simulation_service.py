@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.parking_service import ParkingService
+from src.services.tariff_simulation_service import TariffSimulationService
+from src.utils.file_handler import FileHandler
+
+# Only the rates change, time limits come from the current config
+CANDIDATE_CONFIG = """
+PRICING_RATES = {
+    'weekday': {'00:00-07:59': 20.00, '08:00-16:59': 20.00, '17:00-23:59': 5.00},
+    'saturday': {'00:00-07:59': 20.00, '08:00-16:59': 3.00, '17:00-23:59': 5.00},
+    'sunday': {'00:00-07:59': 20.00, '08:00-16:59': 2.00, '17:00-23:59': 5.00},
+}
+FREQUENT_PARKING_DISCOUNTS = {'night_early': 0.5, 'other': 0.5}
+"""
+
+class TestTariffSimulationService(unittest.TestCase):
+
+    def setUp(self):
+        """Record a few pickups and write a candidate tariff"""
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        parking_service = ParkingService(FileHandler(self.data_dir))
+
+        visits = [
+            ('50A-12345', None, '2023-11-10 08:00', '2023-11-10 10:00'),    # Friday day, $20
+            ('50A-12345', None, '2023-11-11 08:00', '2023-11-11 10:00'),    # Saturday day, $6
+            ('51B-54321', '12348', '2023-11-13 08:00', '2023-11-13 10:00'),  # Monday day, member $18
+            ('51B-54321', '12348', '2023-12-04 17:00', '2023-12-04 19:00'),  # Monday evening, member $5
+        ]
+        for car_identity, frequent_number, arrival, departure in visits:
+            parking_service.park_car(car_identity, arrival, frequent_number)
+            parking_service.pickup_car(car_identity, '100', departure)
+
+        self.candidate = self.data_dir / 'candidate_rates.py'
+        self.candidate.write_text(CANDIDATE_CONFIG)
+
+    def simulate(self, max_workers, **kwargs):
+        service = TariffSimulationService(self.data_dir / 'payments', max_workers=max_workers)
+        return service.simulate(self.candidate, **kwargs)
+
+    def test_old_and_new_revenue(self):
+        """Test totals and breakdowns under the candidate tariff"""
+        result = self.simulate(1)
+
+        self.assertEqual(result['visits'], 4)
+        self.assertEqual(result['total']['old'], 49.0)
+        self.assertEqual(result['total']['new'], 40 + 6 + 20 + 5)
+        self.assertEqual(result['by_day_type']['weekday'], {
+            'old': 43.0, 'new': 65.0, 'change': 22.0, 'change_percent': 51.16
+        })
+        self.assertEqual(result['by_period']['17:00-23:59']['new'], 5.0)
+        self.assertEqual(result['by_member_status']['member']['old'], 23.0)
+        self.assertEqual(result['by_member_status']['member']['new'], 25.0)
+        self.assertEqual(result['by_member_status']['non_member']['new'], 46.0)
+
+    def test_departure_range_and_pool(self):
+        """Test the date filter and that worker processes give the same answer"""
+        result = self.simulate(2, departure_from='2023-11-11', departure_to='2023-11-30')
+        self.assertEqual(result['visits'], 2)
+        self.assertEqual(result['total']['old'], 24.0)
+
+        pooled = self.simulate(2)
+        single = self.simulate(1)
+        del pooled['elapsed_seconds'], single['elapsed_seconds']
+        self.assertEqual(pooled, single)
+
+if __name__ == '__main__':
+    unittest.main()
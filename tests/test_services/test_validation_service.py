@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+import random
+
+import numpy as np
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.models.car import Car
+from src.exceptions.parking_exceptions import InvalidCarIdentityException
+from src.services.validation_service import (
+    ValidationService, REASON_EMPTY, REASON_FORMAT, REASON_CHECK_DIGIT
+)
+from src.utils.frequent_parking_validator import validate_frequent_parking_number
+
+class TestBatchValidation(unittest.TestCase):
+
+    def test_car_identities(self):
+        """Test batch plate validation against Car"""
+        identities = ['59C-12345', '', '59c-12345', '5AC-12345', '59C-1234', None, '01E-00001', '59C-12345\n']
+        result = ValidationService.validate_car_identities(identities)
+
+        for identity, valid in zip(identities, result.valid):
+            try:
+                Car(identity)
+                expected = True
+            except InvalidCarIdentityException:
+                expected = False
+            self.assertEqual(bool(valid), expected, identity)
+
+        self.assertEqual(result.reasons[1], REASON_EMPTY)
+        self.assertEqual(result.reasons[2], REASON_FORMAT)
+        self.assertEqual(result.invalid_count, 5)
+        self.assertEqual([index for index, _, _ in result.iter_invalid()], [1, 2, 3, 4, 5])
+
+    def test_frequent_parking_numbers(self):
+        """Test vectorized check digits against the per-number validator"""
+        rng = random.Random(4)
+        numbers = [f"{rng.randrange(100000):05d}" for _ in range(5000)]
+        numbers += ['12348', ' 12348 ', '12343', '1234', 'abcde', '', None]
+        result = ValidationService.validate_frequent_parking_numbers(numbers)
+
+        expected = [bool(number) and validate_frequent_parking_number(number.strip()) for number in numbers]
+        self.assertEqual(result.valid.tolist(), expected)
+        self.assertEqual(list(result.reasons[-5:]),
+                         [REASON_CHECK_DIGIT, REASON_FORMAT, REASON_FORMAT, REASON_EMPTY, REASON_EMPTY])
+
+    def test_frequent_parking_number_integers(self):
+        """Test an integer array of 5-digit numbers"""
+        result = ValidationService.validate_frequent_parking_numbers(np.array([12348, 12343, 1236, 123456, -1]))
+
+        self.assertEqual(result.valid.tolist(), [True, False, validate_frequent_parking_number('01236'), False, False])
+        self.assertEqual(list(result.reasons[3:]), [REASON_FORMAT, REASON_FORMAT])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,16 @@
 import unittest
 import sys
 import os
+import random
+from datetime import datetime, timedelta
 
 # Add the parent directory to the path so Python can find the src module
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from src.utils.datetime_helper import calculate_duration_by_periods
+from src.utils.datetime_helper import (
+    calculate_duration_by_periods, parse_datetime, parse_epoch_minutes, parse_epoch_minutes_column, to_epoch_minutes
+)
+from src.exceptions.parking_exceptions import InvalidDateTimeException
 from src.services.validation_service import ValidationService
 
 class TestDatetimeHelper(unittest.TestCase):
@@ -39,5 +44,41 @@ class TestDatetimeHelper(unittest.TestCase):
         self.assertEqual(second_period[3], 7.0)                # hours
         self.assertEqual(second_period[4], 'exceed_time')      # flag
 
+    def test_parse_datetime_matches_strptime(self):
+        """Test the fixed-layout parser against strptime, including lenient inputs"""
+        moment = datetime(1999, 2, 28, 23, 59)
+        for _ in range(300):
+            text = moment.strftime('%Y-%m-%d %H:%M')
+            self.assertEqual(parse_datetime(text), moment)
+            self.assertEqual(parse_epoch_minutes(text), to_epoch_minutes(moment))
+            moment += timedelta(days=17, minutes=419)
+
+        # Not exactly 16 characters: handled by strptime as before
+        self.assertEqual(parse_datetime('2023-1-5 8:00'), datetime(2023, 1, 5, 8, 0))
+
+    def test_parse_datetime_errors(self):
+        """Test that invalid inputs keep raising the same exception and message"""
+        for text in ['2023-02-29 10:00', '2023-11-10 24:00', '2023-11-10T10:00', '2023/11/10 10:00', 'abc', '']:
+            with self.assertRaises(InvalidDateTimeException) as context:
+                parse_datetime(text)
+            self.assertEqual(
+                str(context.exception),
+                f"Invalid datetime format: {text}. Expected format: YYYY-MM-DD HH:MM"
+            )
+
+    def test_parse_epoch_minutes_column(self):
+        """Test the column parser against the per-record conversion"""
+        rng = random.Random(5)
+        moments = [datetime(1600, 1, 1) + timedelta(minutes=rng.randrange(600 * 525600)) for _ in range(2000)]
+        strings = [moment.strftime('%Y-%m-%d %H:%M') for moment in moments]
+        strings.append('2023-1-5 8:00')
+        moments.append(datetime(2023, 1, 5, 8, 0))
+
+        minutes = parse_epoch_minutes_column(strings)
+        self.assertEqual(minutes.tolist(), [to_epoch_minutes(moment) for moment in moments])
+
+        with self.assertRaises(InvalidDateTimeException):
+            parse_epoch_minutes_column(['2024-02-29 10:00', '2023-02-29 10:00'])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
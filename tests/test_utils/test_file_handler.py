@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.file_handler import FileHandler
+
+def add_credits(data_dir, count):
+    """Read-modify-write the credit balance under the plate lock"""
+    file_handler = FileHandler(data_dir)
+    for _ in range(count):
+        with file_handler.lock('59C-12345'):
+            balance = file_handler.load_credit_balance('59C-12345')
+            file_handler.save_credit_balance('59C-12345', balance + 1)
+
+class TestFileHandler(unittest.TestCase):
+
+    def setUp(self):
+        """Create a file handler on a temporary data directory"""
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.temp_dir = self.data_dir / 'payments'
+        self.file_handler = FileHandler(self.data_dir)
+        self.addCleanup(shutil.rmtree, self.data_dir)
+
+    def test_payments_are_appended_as_json_lines(self):
+        """Test that each payment is written as one line"""
+        self.file_handler.save_payment_record('59C-12345', {'total_fee': 10.0, 'payment_amount': 10.0})
+        self.file_handler.save_payment_record('59C-12345', {'total_fee': 20.0, 'payment_amount': 25.0})
+
+        with open(self.temp_dir / '59C_12345_payments.jsonl') as f:
+            lines = f.readlines()
+
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[1])['payment_amount'], 25.0)
+        self.assertEqual([p['total_fee'] for p in self.file_handler.load_payment_records('59C-12345')], [10.0, 20.0])
+
+    def test_legacy_json_payments_are_migrated(self):
+        """Test that an existing JSON array file is converted on first access"""
+        legacy_file = self.temp_dir / '59C_12345_payments.json'
+        with open(legacy_file, 'w') as f:
+            json.dump([{'total_fee': 10.0}, {'total_fee': 20.0}], f, indent=2)
+
+        self.file_handler.save_payment_record('59C-12345', {'total_fee': 30.0})
+
+        self.assertFalse(legacy_file.exists())
+        self.assertEqual([p['total_fee'] for p in self.file_handler.load_payment_records('59C-12345')], [10.0, 20.0, 30.0])
+
+    def test_missing_payments(self):
+        """Test loading payments for a car without history"""
+        self.assertEqual(self.file_handler.load_payment_records('01E-00001'), [])
+
+    def test_plate_lock_across_processes(self):
+        """Test that concurrent gate processes do not lose credit updates"""
+        processes = [multiprocessing.Process(target=add_credits, args=(str(self.data_dir), 25)) for _ in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        self.assertEqual(self.file_handler.load_credit_balance('59C-12345'), 100)
+
+    def test_atomic_writes_leave_no_temp_files(self):
+        """Test that records are replaced atomically"""
+        self.file_handler.save_parking_record('59C-12345', {'arrival_time': '2023-11-10 08:00'})
+        self.file_handler.save_credit_balance('59C-12345', 5.0)
+
+        self.assertEqual(self.file_handler.load_parking_record('59C-12345'), {'arrival_time': '2023-11-10 08:00'})
+        leftovers = [path.name for path in self.data_dir.rglob('*.tmp')]
+        self.assertEqual(leftovers, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.exceptions.parking_exceptions import CarNotFoundException
+from src.services.parking_service import ParkingService
+from src.utils.file_handler import FileHandler
+from src.utils.metrics import MetricsRegistry, registry, timed
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        """Set up a parking service on a temporary data directory with metrics on"""
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        self.parking_service = ParkingService(FileHandler(self.data_dir))
+        registry.reset()
+        registry.enable()
+        self.addCleanup(registry.reset)
+        self.addCleanup(registry.disable)
+
+    def test_operations_are_recorded(self):
+        """Test that service, storage and pricing calls show up with counts and errors"""
+        self.parking_service.park_car('50A-12345', '2023-11-10 08:00')
+        self.parking_service.pickup_car('50A-12345', '20', '2023-11-10 10:00')
+        with self.assertRaises(CarNotFoundException):
+            self.parking_service.pickup_car('50A-12345', '20', '2023-11-10 11:00')
+
+        pickups = registry.histogram('parking_service', 'pickup_car')
+        self.assertEqual(pickups.count, 2)
+        self.assertEqual(pickups.errors, 1)
+        self.assertEqual(registry.histogram('file_handler', 'record_pickup').count, 1)
+        self.assertEqual(registry.histogram('pricing_service', 'calculate_total_fee').count, 1)
+
+        text = registry.render()
+        self.assertIn('# TYPE parking_operation_duration_seconds histogram', text)
+        self.assertIn(
+            'parking_operation_duration_seconds_bucket{component="parking_service",'
+            'operation="pickup_car",le="+Inf"} 2', text
+        )
+        self.assertIn('parking_operation_errors_total{component="parking_service",operation="pickup_car"} 1', text)
+
+        filename = registry.write(os.path.join(self.data_dir, 'metrics.prom'))
+        with open(filename) as f:
+            self.assertEqual(f.read(), text)
+
+    def test_disabled_registry_records_nothing(self):
+        """Test that nothing is recorded while metrics are off"""
+        registry.disable()
+        self.parking_service.park_car('50A-12345', '2023-11-10 08:00')
+        self.assertNotIn('park_car', registry.render())
+
+    def test_buckets_and_generators(self):
+        """Test cumulative buckets and that generators are timed until exhausted"""
+        local = MetricsRegistry(enabled=True, buckets=(0.1, 1.0))
+        histogram = local.histogram('test', 'op')
+        for seconds in (0.05, 0.5, 5.0):
+            histogram.observe(seconds)
+        text = local.render()
+        self.assertIn('le="0.1"} 1', text)
+        self.assertIn('le="1.0"} 2', text)
+        self.assertIn('le="+Inf"} 3', text)
+
+        @timed('test')
+        def numbers():
+            yield from range(3)
+
+        self.assertEqual(list(numbers()), [0, 1, 2])
+        self.assertEqual(registry.histogram('test', 'numbers').count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
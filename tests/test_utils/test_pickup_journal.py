@@ -0,0 +1,235 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+import gc
+import threading
+import time
+import weakref
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.exceptions.parking_exceptions import FileOperationException
+from src.utils.file_handler import FileHandler
+from src.utils.pickup_journal import PickupJournal
+
+PLATE = '59C-12345'
+ARRIVAL = '2024-03-04 08:00'
+
+
+def pickup_entry(txid, arrival_time=ARRIVAL, credit_balance=5.0):
+    return {
+        'txid': txid,
+        'car_identity': PLATE,
+        'payment': {
+            'arrival_time': arrival_time, 'departure_time': '2024-03-04 10:00',
+            'total_fee': 20.0, 'payment_amount': 25.0, 'credits_used': 0.0,
+            'has_frequent_parking': False, 'timestamp': '2024-03-04T10:00:00', 'txid': txid
+        },
+        'credit_balance': credit_balance,
+        'summary': {'total_paid': 25.0, 'visit_count': 1, 'exported_position': None, 'exported_count': 0}
+    }
+
+
+class TestPickupJournal(unittest.TestCase):
+
+    def setUp(self):
+        """A data directory with one car parked"""
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+        self.file_handler = FileHandler(self.data_dir)
+        self.file_handler.save_parking_record(PLATE, {'car_identity': PLATE, 'arrival_time': ARRIVAL})
+
+    def crash_after_journaling(self, *entries):
+        """Journal pickups from a 'process' that dies before applying them"""
+        journal = PickupJournal(self.data_dir / 'journal')
+        for entry in entries:
+            journal._append(entry)
+        os.close(journal._fd)  # releases the segment lock like a dead process would
+        journal._fd = None
+
+    def test_pickup_is_applied_and_leaves_no_journal_behind(self):
+        """Test that a normal pickup updates every file and its segment is removed on close"""
+        self.file_handler.record_pickup(PLATE, {'arrival_time': ARRIVAL, 'total_fee': 20.0}, 5.0)
+
+        payments = self.file_handler.load_payment_records(PLATE)
+        self.assertEqual(len(payments), 1)
+        self.assertIn('txid', payments[0])
+        self.assertEqual(self.file_handler.load_credit_balance(PLATE), 5.0)
+        self.assertIsNone(self.file_handler.load_parking_record(PLATE))
+
+        self.file_handler.journal.close()
+        self.assertEqual(list((self.data_dir / 'journal').glob('*.jsonl')), [])
+
+    def test_replay_applies_journaled_pickup(self):
+        """Test that a pickup journaled before a crash is applied on startup"""
+        self.crash_after_journaling(pickup_entry('tx1'))
+
+        recovered = FileHandler(self.data_dir)
+
+        self.assertEqual([p['txid'] for p in recovered.load_payment_records(PLATE)], ['tx1'])
+        self.assertEqual(recovered.load_credit_balance(PLATE), 5.0)
+        self.assertEqual(recovered.load_history_summary(PLATE)['visit_count'], 1)
+        self.assertIsNone(recovered.load_parking_record(PLATE))
+        self.assertEqual(list((self.data_dir / 'journal').glob('*.jsonl')), [])
+
+    def test_replay_completes_half_applied_pickup_without_duplicate_payment(self):
+        """Test that a payment written before the crash is not written again, credits are fixed"""
+        entry = pickup_entry('tx1')
+        self.file_handler.save_payment_record(PLATE, entry['payment'])
+        self.crash_after_journaling(entry)
+
+        recovered = FileHandler(self.data_dir)
+        FileHandler(self.data_dir)  # replaying again changes nothing
+
+        self.assertEqual(len(recovered.load_payment_records(PLATE)), 1)
+        self.assertEqual(recovered.load_credit_balance(PLATE), 5.0)
+        self.assertIsNone(recovered.load_parking_record(PLATE))
+
+    def test_replay_does_not_overwrite_later_pickup(self):
+        """Test that an old journal entry leaves credits of a later pickup alone"""
+        old = pickup_entry('tx1', credit_balance=5.0)
+        self.file_handler.save_payment_record(PLATE, old['payment'])
+        later = pickup_entry('tx2', arrival_time='2024-03-05 08:00', credit_balance=0.0)
+        self.file_handler.save_payment_record(PLATE, later['payment'])
+        self.file_handler.save_credit_balance(PLATE, 0.0, 'tx2')
+        self.crash_after_journaling(old)
+
+        recovered = FileHandler(self.data_dir)
+
+        self.assertEqual([p['txid'] for p in recovered.load_payment_records(PLATE)], ['tx1', 'tx2'])
+        self.assertEqual(recovered.load_credit_balance(PLATE), 0.0)
+        # The car parked again is not the stay the old pickup was for
+        self.file_handler.save_parking_record(PLATE, {'car_identity': PLATE, 'arrival_time': '2024-03-06 08:00'})
+        self.crash_after_journaling(old)
+        FileHandler(self.data_dir)
+        self.assertIsNotNone(self.file_handler.load_parking_record(PLATE))
+
+    def test_torn_final_line_is_ignored(self):
+        """Test that a partially written entry, never acknowledged, is not replayed"""
+        self.crash_after_journaling(pickup_entry('tx1'))
+        segment = next((self.data_dir / 'journal').glob('*.jsonl'))
+        with open(segment, 'a') as f:
+            f.write(json.dumps(pickup_entry('tx2'))[:40])
+
+        recovered = FileHandler(self.data_dir)
+
+        self.assertEqual([p['txid'] for p in recovered.load_payment_records(PLATE)], ['tx1'])
+
+    def test_live_segment_is_not_replayed(self):
+        """Test that the journal of a running process is left alone"""
+        journal = PickupJournal(self.data_dir / 'journal')
+        journal._append(pickup_entry('tx1'))
+        self.addCleanup(journal.close)
+
+        recovered = FileHandler(self.data_dir)
+
+        self.assertEqual(recovered.load_payment_records(PLATE), [])
+        self.assertIsNotNone(recovered.load_parking_record(PLATE))
+
+    def test_failed_pickup_is_rolled_forward(self):
+        """Test that a pickup failing after its payment is finished instead of left half written"""
+        save_credit_balance = self.file_handler.save_credit_balance
+        calls = []
+
+        def fail_once(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return save_credit_balance(*args, **kwargs)
+
+        with mock.patch.object(self.file_handler, 'save_credit_balance', fail_once):
+            self.file_handler.record_pickup(PLATE, {'arrival_time': ARRIVAL, 'total_fee': 20.0}, 5.0)
+
+        self.assertEqual(len(self.file_handler.load_payment_records(PLATE)), 1)
+        self.assertEqual(self.file_handler.load_credit_balance(PLATE), 5.0)
+        self.assertIsNone(self.file_handler.load_parking_record(PLATE))
+        self.assertEqual(self.file_handler.journal._unresolved, set())
+
+    def test_plate_is_blocked_until_failed_pickup_is_finished(self):
+        """Test that a pickup which cannot be finished blocks the plate instead of charging twice"""
+        with mock.patch.object(self.file_handler, 'save_credit_balance', side_effect=OSError("disk full")):
+            with self.assertRaises(FileOperationException):
+                self.file_handler.record_pickup(PLATE, {'arrival_time': ARRIVAL, 'total_fee': 20.0}, 5.0)
+            with self.assertRaises(FileOperationException):
+                self.file_handler.load_parking_record(PLATE)
+
+        # Once the disk recovers the next access finishes the pickup
+        self.assertIsNone(self.file_handler.load_parking_record(PLATE))
+        self.assertEqual(len(self.file_handler.load_payment_records(PLATE)), 1)
+        self.assertEqual(self.file_handler.load_credit_balance(PLATE), 5.0)
+        self.assertEqual(self.file_handler.journal._unresolved, set())
+
+    def test_segment_is_truncated_without_machine_wide_sync(self):
+        """Test that a full segment is emptied after syncing only the files its pickups wrote"""
+        self.file_handler.journal.segment_bytes = 1
+        with mock.patch('os.sync', side_effect=AssertionError("os.sync called")):
+            self.file_handler.record_pickup(PLATE, {'arrival_time': ARRIVAL, 'total_fee': 20.0}, 5.0)
+            self.assertEqual(self.file_handler.journal._size, 0)
+            self.assertEqual(self.file_handler.journal._touched, set())
+            self.file_handler.journal.close()
+
+    def test_segment_recovered_by_another_process_is_skipped(self):
+        """Test that a dead segment removed by a process starting alongside does not fail startup"""
+        gone = self.data_dir / 'journal' / 'pickups-1-deadbeef.jsonl'
+
+        with mock.patch.object(Path, 'glob', return_value=[gone]):
+            self.assertEqual(PickupJournal(self.data_dir / 'journal').recover(lambda entry: None), 0)
+
+    def test_new_segment_is_locked_before_it_is_visible(self):
+        """Test that a segment only appears under its own name once its owner holds the lock"""
+        journal = PickupJournal(self.data_dir / 'journal')
+        self.addCleanup(journal.close)
+        journal._append(pickup_entry('tx1'))
+
+        self.assertEqual(list((self.data_dir / 'journal').glob('.*.tmp')), [])
+        PickupJournal(self.data_dir / 'journal').recover(lambda entry: None)
+        self.assertTrue(journal.path.exists())
+
+    def test_handler_is_not_kept_alive_by_its_journal(self):
+        """Test that closing a handler removes its segment and unused handlers can be collected"""
+        self.file_handler.record_pickup(PLATE, {'arrival_time': ARRIVAL, 'total_fee': 20.0}, 5.0)
+        self.file_handler.close()
+        self.assertEqual(list((self.data_dir / 'journal').glob('*.jsonl')), [])
+
+        handler = weakref.ref(FileHandler(self.data_dir))
+        gc.collect()
+        self.assertIsNone(handler())
+
+    def test_concurrent_pickups_share_fsyncs(self):
+        """Test group commit: concurrent pickups need fewer fsyncs than pickups"""
+        plates = [f"59C-{i:05d}" for i in range(16)]
+        for plate in plates:
+            self.file_handler.save_parking_record(plate, {'car_identity': plate, 'arrival_time': ARRIVAL})
+
+        fsync = os.fsync
+        fsync_calls = []
+
+        def slow_fsync(fd):
+            fsync_calls.append(fd)
+            time.sleep(0.01)
+            fsync(fd)
+
+        def pickup(plate):
+            self.file_handler.record_pickup(plate, {'arrival_time': ARRIVAL, 'total_fee': 20.0}, 0.0)
+
+        with mock.patch('os.fsync', slow_fsync):
+            threads = [threading.Thread(target=pickup, args=(plate,)) for plate in plates]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertLess(len(fsync_calls), len(plates))
+        for plate in plates:
+            self.assertEqual(len(self.file_handler.load_payment_records(plate)), 1)
+            self.assertIsNone(self.file_handler.load_parking_record(plate))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+import unittest
+import sys
+import os
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from src.services.parking_service import ParkingService
+from src.utils.file_handler import FileHandler
+from src.utils.record_cache import RecordCache
+
+PLATE = '59C-12345'
+
+
+class TestRecordCache(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.loads = 0
+
+    def load(self):
+        self.loads += 1
+        return self.loads
+
+    def test_hits_until_invalidated(self):
+        """Test that a value is loaded once and again after invalidation"""
+        cache = RecordCache(10)
+        path = self.temp_dir / 'a.json'
+
+        self.assertEqual(cache.get('a', path, self.load), 1)
+        self.assertEqual(cache.get('a', path, self.load), 1)
+        cache.invalidate('a')
+        self.assertEqual(cache.get('a', path, self.load), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_least_recently_used_is_evicted(self):
+        """Test that the cache keeps at most max_entries keys"""
+        cache = RecordCache(2)
+        for key in ('a', 'b', 'a', 'c'):
+            cache.get(key, self.temp_dir / key, lambda: key)
+
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(list(cache._entries), ['a', 'c'])
+
+    def test_mtime_check_sees_external_change(self):
+        """Test that a file replaced behind the cache's back is loaded again"""
+        cache = RecordCache(10, check_mtime=True)
+        path = self.temp_dir / 'a.json'
+        path.write_text('1')
+        cache.get('a', path, self.load)
+
+        replacement = self.temp_dir / 'b.json'
+        replacement.write_text('2')
+        os.replace(replacement, path)
+
+        self.assertEqual(cache.get('a', path, self.load), 2)
+
+    def test_disabled_cache_always_loads(self):
+        """Test that a size of 0 turns caching off"""
+        cache = RecordCache(0)
+        cache.get('a', self.temp_dir / 'a', self.load)
+        cache.get('a', self.temp_dir / 'a', self.load)
+        self.assertEqual(self.loads, 2)
+
+
+class TestFileHandlerCache(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.data_dir)
+
+    def test_pickup_reads_record_and_credits_once(self):
+        """Test that quote then commit, as at the terminal, reads each file from disk once"""
+        file_handler = FileHandler(self.data_dir, check_mtime=False)
+        parking_service = ParkingService(file_handler)
+        # An earlier visit leaves credits and a history summary to read
+        parking_service.park_car(PLATE, '2024-03-07 08:00')
+        parking_service.pickup_car(PLATE, '30', '2024-03-07 10:00')
+        parking_service.park_car(PLATE, '2024-03-08 08:00')
+
+        with mock.patch('src.utils.file_handler.json.load', wraps=json.load) as json_load:
+            quote = parking_service.quote_pickup(PLATE, '2024-03-08 10:00')
+            parking_service.commit_pickup(quote['quote_token'], '10')
+
+        # Parking record, credit balance and history summary
+        self.assertEqual(json_load.call_count, 3)
+        self.assertIsNone(file_handler.load_parking_record(PLATE))
+        self.assertEqual(file_handler.load_credit_balance(PLATE), 0.0)
+
+    def test_writes_of_other_process_are_seen(self):
+        """Test that with the mtime check a second handler's writes are not hidden by the cache"""
+        gate_a = FileHandler(self.data_dir, check_mtime=True)
+        gate_b = FileHandler(self.data_dir, check_mtime=True)
+
+        self.assertEqual(gate_a.load_credit_balance(PLATE), 0.0)
+        self.assertIsNone(gate_a.load_parking_record(PLATE))
+        gate_b.save_credit_balance(PLATE, 7.5)
+        gate_b.save_parking_record(PLATE, {'car_identity': PLATE, 'arrival_time': '2024-03-08 08:00'})
+
+        self.assertEqual(gate_a.load_credit_balance(PLATE), 7.5)
+        self.assertEqual(gate_a.load_parking_record(PLATE)['arrival_time'], '2024-03-08 08:00')
+
+    def test_cached_record_is_not_shared(self):
+        """Test that changing a loaded record does not change the cache"""
+        file_handler = FileHandler(self.data_dir)
+        file_handler.save_parking_record(PLATE, {'car_identity': PLATE, 'arrival_time': '2024-03-08 08:00'})
+
+        file_handler.load_parking_record(PLATE)['arrival_time'] = 'changed'
+
+        self.assertEqual(file_handler.load_parking_record(PLATE)['arrival_time'], '2024-03-08 08:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from src.utils.file_handler import FileHandler
+from src.utils.sqlite_handler import SQLiteHandler
+
+class TestSQLiteHandler(unittest.TestCase):
+
+    def setUp(self):
+        """Create a handler on a temporary database"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.handler = SQLiteHandler(os.path.join(self.temp_dir, 'parking.db'))
+
+    def tearDown(self):
+        self.handler.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_wal_mode(self):
+        """Test that the database runs in WAL mode"""
+        mode = self.handler._connection().execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode, 'wal')
+
+    def test_parking_record_round_trip(self):
+        """Test saving, loading and deleting a parking record"""
+        record = {
+            'car_identity': '59C-12345',
+            'arrival_time': '2023-11-10 08:00',
+            'departure_time': None,
+            'frequent_parking_number': '12348',
+            'total_fee': None,
+            'payment_amount': None,
+            'created_at': '2023-11-10 08:01'
+        }
+        self.handler.save_parking_record('59C-12345', record)
+        self.assertEqual(self.handler.load_parking_record('59C-12345'), record)
+
+        self.handler.delete_parking_record('59C-12345')
+        self.assertIsNone(self.handler.load_parking_record('59C-12345'))
+
+    def test_record_pickup(self):
+        """Test that a pickup stores payment and credits and closes the record"""
+        self.handler.save_parking_record('59C-12345', {'arrival_time': '2023-11-10 08:00'})
+        payment = {
+            'arrival_time': '2023-11-10 08:00',
+            'departure_time': '2023-11-10 10:00',
+            'total_fee': 20.0,
+            'payment_amount': 25.0,
+            'credits_used': 0.0
+        }
+
+        self.handler.record_pickup('59C-12345', payment, 5.0)
+
+        self.assertIsNone(self.handler.load_parking_record('59C-12345'))
+        self.assertEqual(self.handler.load_payment_records('59C-12345'), [payment])
+        self.assertEqual(self.handler.load_credit_balance('59C-12345'), 5.0)
+        self.assertEqual(self.handler.load_credit_balance('01E-00001'), 0.0)
+
+    def test_import_files(self):
+        """Test that the JSON file storage is copied once into the database"""
+        file_handler = FileHandler(os.path.join(self.temp_dir, 'files'))
+        self.addCleanup(file_handler.close)
+        file_handler.save_parking_record('65C-12345', {'car_identity': '65C-12345', 'arrival_time': '2023-11-12 08:00'})
+        file_handler.record_pickup('59C-12345', {
+            'arrival_time': '2023-11-10 08:00', 'departure_time': '2023-11-10 10:00',
+            'total_fee': 20.0, 'payment_amount': 25.0, 'credits_used': 0.0
+        }, 5.0, {'total_paid': 25.0, 'visit_count': 1, 'exported_position': 120, 'exported_count': 1})
+
+        self.assertEqual(self.handler.import_files(file_handler), 2)
+        self.assertEqual(self.handler.import_files(file_handler), 0)
+
+        self.assertEqual(self.handler.load_parking_record('65C-12345')['arrival_time'], '2023-11-12 08:00')
+        self.assertEqual([p['total_fee'] for p in self.handler.load_payment_records('59C-12345')], [20.0])
+        self.assertEqual(self.handler.load_credit_balance('59C-12345'), 5.0)
+        summary = self.handler.load_history_summary('59C-12345')
+        self.assertEqual((summary['visit_count'], summary['exported_position']), (1, None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from unittest import mock
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from config.settings import PRICING_CONFIG_PATH
+from src.utils import tariff_table
+from src.utils.tariff_table import load_tariff_table, get_tariff_table
+from src.services.pricing_service import PricingService
+
+class TestTariffTable(unittest.TestCase):
+
+    def setUp(self):
+        """Copy the pricing config so it can be edited"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_path = os.path.join(self.temp_dir, 'pricing_rates.py')
+        shutil.copy(PRICING_CONFIG_PATH, self.config_path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_segment_lookup(self):
+        """Test minute-of-week lookup of day type, period and limit"""
+        tariff = load_tariff_table(PRICING_CONFIG_PATH)
+
+        # 2023-11-11 is a Saturday
+        segment = tariff.segment_at(datetime(2023, 11, 11, 9, 30))
+        self.assertEqual(tariff.segment_day_type[segment], 'saturday')
+        self.assertEqual(tariff.segment_period[segment], '08:00-16:59')
+        self.assertEqual(tariff.segment_limit[segment], 4)
+        self.assertEqual(tariff.segment_end[segment], 17 * 60)
+
+        segment = tariff.segment_at(datetime(2023, 11, 13, 23, 59))
+        self.assertEqual(tariff.segment_day_type[segment], 'weekday')
+        self.assertEqual(tariff.segment_period[segment], '17:00-23:59')
+
+    def test_hot_reload(self):
+        """Test that an edited config file is picked up without a restart"""
+        arrival_time = datetime(2023, 11, 10, 8, 0)
+        departure_time = datetime(2023, 11, 10, 10, 0)
+
+        with mock.patch.object(tariff_table, 'PRICING_CONFIG_PATH', self.config_path), \
+                mock.patch.object(tariff_table, 'TARIFF_RELOAD_INTERVAL', 0), \
+                mock.patch.object(tariff_table, '_current', None):
+            self.assertEqual(PricingService.calculate_total_fee(arrival_time, departure_time), 20.00)
+            old_tariff = get_tariff_table()
+
+            with open(self.config_path) as f:
+                content = f.read()
+            with open(self.config_path, 'w') as f:
+                f.write(content.replace("'08:00-16:59': 10.00", "'08:00-16:59': 12.00"))
+            os.utime(self.config_path, ns=(0, os.stat(self.config_path).st_mtime_ns + 10 ** 9))
+
+            self.assertIsNot(get_tariff_table(), old_tariff)
+            self.assertEqual(PricingService.calculate_total_fee(arrival_time, departure_time), 24.00)
+
+            # A broken edit keeps the previous tariff in service
+            with open(self.config_path, 'w') as f:
+                f.write("PRICING_RATES = {")
+            os.utime(self.config_path, ns=(0, os.stat(self.config_path).st_mtime_ns + 2 * 10 ** 9))
+            self.assertEqual(PricingService.calculate_total_fee(arrival_time, departure_time), 24.00)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import unittest
+import sys
+import os
+import re
+import shutil
+import tempfile
+
+# Add the parent directory to the path so Python can find the src module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from config.settings import CAR_IDENTITY_PATTERN
+from src.services.event_ingest_service import EventIngestService, iter_events
+from src.services.parking_service import ParkingService
+from src.utils.file_handler import FileHandler
+from src.utils.frequent_parking_validator import validate_frequent_parking_number
+from src.utils.memory_storage import InMemoryStorage
+from src.utils.workload_generator import WorkloadGenerator, write_events
+
+class TestWorkloadGenerator(unittest.TestCase):
+
+    def test_plates_and_numbers_are_valid(self):
+        """Test that plates are unique and valid and member numbers pass the check digit"""
+        generator = WorkloadGenerator(seed=3, cars=5000)
+        plates = [generator.plate(i) for i in range(generator.cars)]
+
+        self.assertEqual(len(set(plates)), len(plates))
+        self.assertTrue(all(re.match(CAR_IDENTITY_PATTERN, plate) for plate in plates))
+
+        numbers = [generator.frequent_number(i) for i in range(generator.cars)]
+        members = [number for number in numbers if number is not None]
+        self.assertTrue(all(validate_frequent_parking_number(number) for number in members))
+        self.assertAlmostEqual(len(members) / len(numbers), 0.2, delta=0.03)
+
+    def test_seed_makes_runs_reproducible(self):
+        """Test that the same seed gives the same events and another seed does not"""
+        first = list(WorkloadGenerator(seed=7, cars=200).iter_events(days=2))
+        second = list(WorkloadGenerator(seed=7, cars=200).iter_events(days=2))
+        other = list(WorkloadGenerator(seed=8, cars=200).iter_events(days=2))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+
+    def test_events_ingest_cleanly(self):
+        """Test that a generated event file replays without a single rejected event"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir)
+        path = os.path.join(temp_dir, 'events.csv')
+
+        count = write_events(WorkloadGenerator(seed=1, cars=300).iter_events(days=7), path)
+        stats = EventIngestService(ParkingService(InMemoryStorage())).ingest(iter_events(path))
+
+        self.assertEqual(stats['processed'], count)
+        self.assertEqual(stats['failed'], 0)
+        self.assertEqual(stats['park'], stats['pickup'])
+
+    def test_populate_history(self):
+        """Test that pre-populated history and credits agree with each other"""
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir)
+        generator = WorkloadGenerator(seed=2, cars=20)
+        storage = FileHandler(data_dir)
+
+        self.assertEqual(generator.populate(storage, visits_per_car=15), 300)
+
+        car_identity = generator.plate(4)
+        records = storage.load_payment_records(car_identity)
+        self.assertEqual(len(records), 15)
+        self.assertTrue(all(a['departure_time'] < b['arrival_time'] for a, b in zip(records, records[1:])))
+
+        # Credits are whatever was overpaid and not yet spent
+        overpaid = sum(r['payment_amount'] - r['total_fee'] for r in records)
+        self.assertAlmostEqual(storage.load_credit_balance(car_identity), overpaid, places=6)
+
+        result = ParkingService(storage).generate_history(car_identity)
+        self.assertEqual(result['records_count'], 15)
+
+if __name__ == '__main__':
+    unittest.main()